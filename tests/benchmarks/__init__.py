@@ -0,0 +1 @@
+"""tilebench benchmarks."""
@@ -0,0 +1,125 @@
+"""Benchmark VSIStatsMiddleware overhead.
+
+$ pytest tests/benchmarks --benchmark-only --benchmark-group-by=group
+"""
+
+import logging
+import time
+from io import StringIO
+
+import pytest
+import rasterio
+from fastapi import FastAPI
+from rio_tiler.io import Reader
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.testclient import TestClient
+
+from tilebench import parse_rasterio_io_logs
+from tilebench.middleware import VSIStatsMiddleware, vsi_stats_header
+
+pytest.importorskip("pytest_benchmark")
+
+N_REQUESTS = 20
+
+
+def _tile_app(cog_url, sample_rate):
+    """Tile endpoint, behind the middleware (`sample_rate=None`: no middleware)."""
+    app = FastAPI()
+    if sample_rate is not None:
+        app.add_middleware(VSIStatsMiddleware, sample_rate=sample_rate)
+
+    @app.get("/tile")
+    async def tile():
+        # Same GDAL config for all the variants
+        with rasterio.Env(GDAL_DISABLE_READDIR_ON_OPEN="EMPTY_DIR"):
+            with Reader(cog_url) as cog:
+                cog.tile(1025, 974, 11)
+        return "OK"
+
+    return app
+
+
+def _requests(client):
+    for _ in range(N_REQUESTS):
+        assert client.get("/tile").status_code == 200
+
+
+@pytest.mark.parametrize("sample_rate", [None, 0.0, 0.1, 0.5, 1.0])
+def test_sampling_overhead(benchmark, cog_url, sample_rate):
+    """Requests cost at several sampling rates (`None`: no middleware)."""
+    benchmark.group = "middleware sampling"
+
+    with TestClient(_tile_app(cog_url, sample_rate)) as client:
+        benchmark.pedantic(_requests, args=(client,), rounds=5, warmup_rounds=1)
+
+
+def test_unsampled_overhead(cog_url):
+    """Requests that are not sampled cost about the same as without middleware."""
+
+    def _best_time(sample_rate):
+        with TestClient(_tile_app(cog_url, sample_rate)) as client:
+            _requests(client)  # warmup
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                _requests(client)
+                timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    baseline = _best_time(None)
+    unsampled = _best_time(0.0)
+    assert unsampled < baseline * 1.25 + 0.01
+
+
+class BaseHTTPVSIStatsMiddleware(BaseHTTPMiddleware):
+    """Previous `BaseHTTPMiddleware` based implementation (reference)."""
+
+    def __init__(self, app, config=None):
+        """Init Middleware."""
+        super().__init__(app)
+        self.config = config or {}
+
+    async def dispatch(self, request, call_next):
+        """Add VSI stats in headers."""
+        io_stream = StringIO()
+        logger = logging.getLogger("rasterio")
+        logger.setLevel(logging.DEBUG)
+        handler = logging.StreamHandler(io_stream)
+        logger.addHandler(handler)
+
+        gdal_config = {"CPL_DEBUG": "ON", "CPL_CURL_VERBOSE": "TRUE"}
+        with rasterio.Env(**gdal_config, **self.config):
+            response = await call_next(request)
+
+        logger.removeHandler(handler)
+        handler.close()
+
+        results = parse_rasterio_io_logs(io_stream.getvalue().splitlines())
+        response.headers["VSI-Stats"] = vsi_stats_header(results)
+        return response
+
+
+@pytest.mark.parametrize(
+    "middleware", [None, BaseHTTPVSIStatsMiddleware, VSIStatsMiddleware]
+)
+def test_requests_per_second(benchmark, middleware):
+    """Middleware overhead on a minimal endpoint (OPS * N_REQUESTS = requests/s)."""
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/")
+    async def root():
+        return "OK"
+
+    benchmark.group = "middleware implementation"
+
+    with TestClient(app) as client:
+
+        def _requests():
+            for _ in range(N_REQUESTS):
+                response = client.get("/")
+                assert response.status_code == 200
+                assert middleware is None or response.headers["VSI-Stats"]
+
+        benchmark(_requests)
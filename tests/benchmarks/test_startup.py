@@ -0,0 +1,85 @@
+"""Benchmark CLI startup (import time per command).
+
+$ pytest tests/benchmarks --benchmark-only --benchmark-group-by=group
+"""
+
+import json
+import re
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# Run a CLI command and write the imported modules to the file passed as first argument
+SCRIPT = """
+import json
+import sys
+
+from tilebench.scripts.cli import cli
+
+try:
+    cli(sys.argv[2:], standalone_mode=False)
+finally:
+    with open(sys.argv[1], "w") as f:
+        json.dump(sorted(sys.modules), f)
+"""
+
+# Web stack (and OpenTelemetry), only needed by `tilebench viz`
+VIZ_MODULES = [
+    "fastapi",
+    "starlette",
+    "uvicorn",
+    "jinja2",
+    "opentelemetry",
+    "tilebench.viz",
+]
+
+COMMANDS = {
+    "profile": ["profile", "{url}", "--tile", "11-1025-974"],
+    "random": ["random", "{url}", "--zoom", "11"],
+    "get-zooms": ["get-zooms", "{url}"],
+    "header": ["header", "{url}"],
+    "codec": ["codec", "{url}", "--max-blocks", "1"],
+    "advise": ["advise", "{url}"],
+    "estimate": ["estimate", "{url}", "--zoom", "9", "--max-tiles", "2"],
+    "manifest": ["manifest", "create", "{url}", "--zoom", "9"],
+    "anomalies": ["anomalies", "{url}", "--tile", "9-256-243"],
+    "viz": ["viz", "--help"],
+}
+
+
+def _import_time(stderr: str) -> float:
+    """Total import time (in seconds) from `python -X importtime` output."""
+    # Top-level imports only (nested imports are included in their parent time)
+    times = re.findall(r"^import time:\s+\d+ \|\s+(\d+) \| \S", stderr, re.MULTILINE)
+    return sum(int(t) for t in times) / 1e6
+
+
+def _run(args, modules_file):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT, modules_file, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_command_startup(benchmark, cog_url, tmp_path, command):
+    """Commands only import the subsystems they use."""
+    benchmark.group = "cli startup"
+
+    modules_file = str(tmp_path / "modules.json")
+    args = [arg.format(url=cog_url) for arg in COMMANDS[command]]
+    result = benchmark.pedantic(_run, args=(args, modules_file), rounds=3)
+
+    benchmark.extra_info["import_time"] = _import_time(result.stderr)
+
+    with open(modules_file) as f:
+        modules = json.load(f)
+
+    if command != "viz":
+        loaded = [m for m in VIZ_MODULES if m in modules]
+        assert not loaded, f"`tilebench {command}` imports {loaded}"
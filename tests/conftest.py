@@ -0,0 +1,102 @@
+"""Test fixtures."""
+
+import importlib.util
+
+import numpy
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from tests.handlers import FlakyHandler
+from tilebench.server import serve
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    """Directory with a small Web Mercator COG (and one COG per band)."""
+    path = tmp_path_factory.mktemp("data")
+    data = numpy.random.default_rng(0).integers(1, 255, (3, 1024, 1024), dtype="uint8")
+    with rasterio.open(
+        path / "cog.tif",
+        "w",
+        driver="COG",
+        width=1024,
+        height=1024,
+        count=3,
+        dtype="uint8",
+        crs="EPSG:3857",
+        transform=from_origin(0, 1000000, 100, 100),
+        blocksize=256,
+        compress="deflate",
+    ) as dst:
+        dst.write(data)
+
+    # One file per band (see `tests.readers.BandFileReader`)
+    for band in range(3):
+        with rasterio.open(
+            path / f"b{band + 1}.tif",
+            "w",
+            driver="COG",
+            width=1024,
+            height=1024,
+            count=1,
+            dtype="uint8",
+            crs="EPSG:3857",
+            transform=from_origin(0, 1000000, 100, 100),
+            blocksize=256,
+            compress="deflate",
+        ) as dst:
+            dst.write(data[band], 1)
+
+    return path
+
+
+@pytest.fixture(scope="session")
+def range_server(data_dir):
+    """Local HTTP server (with Range support) serving `data_dir`."""
+    with serve(str(data_dir)) as url:
+        yield url
+
+
+@pytest.fixture
+def cog_url(range_server):
+    """URL of the local COG."""
+    return f"{range_server}/cog.tif"
+
+
+@pytest.fixture
+def flaky_server(data_dir):
+    """Local HTTP server serving `data_dir`, with redirects and failing requests."""
+    with serve(str(data_dir), handler=FlakyHandler) as url:
+        yield url
+
+
+@pytest.fixture(scope="session")
+def xarray_dataset(data_dir):
+    """Small WGS84 dataset, written as a Zarr store (64x64 chunks) and a NetCDF file."""
+    xarray = pytest.importorskip("xarray")
+    pytest.importorskip("rioxarray")
+    pytest.importorskip("zarr")
+
+    data = numpy.random.default_rng(0).integers(1, 255, (256, 512), dtype="uint8")
+    ds = xarray.Dataset(
+        {"band": (("y", "x"), data)},
+        coords={
+            "x": 0.5 + (numpy.arange(512) + 0.5) * 0.1,
+            "y": 26.0 - (numpy.arange(256) + 0.5) * 0.1,
+        },
+    ).rio.write_crs("EPSG:4326")
+
+    # Keep the `grid_mapping` encoding set by rioxarray
+    encoding = {"band": {**ds["band"].encoding, "chunks": (64, 64)}}
+    ds.to_zarr(data_dir / "store.zarr", mode="w", encoding=encoding, consolidated=True)
+    if importlib.util.find_spec("h5netcdf"):
+        ds.to_netcdf(data_dir / "dataset.nc", engine="h5netcdf")
+
+    return ds
+
+
+@pytest.fixture
+def zarr_url(range_server, xarray_dataset):
+    """URL of the local Zarr store."""
+    return f"{range_server}/store.zarr"
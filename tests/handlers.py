@@ -0,0 +1,31 @@
+"""Custom HTTP request handlers used in tests."""
+
+from typing import Dict, Tuple
+
+from tilebench.server import RangeRequestHandler
+
+
+class FlakyHandler(RangeRequestHandler):
+    """Redirect `/redirect/{path}` and fail `/flaky/{path}` requests once (503)."""
+
+    failures: Dict[Tuple[str, str], int] = {}
+
+    def send_head(self):
+        """Redirect or fail the request (or serve the file)."""
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", self.path.replace("/redirect/", "/", 1))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        if self.path.startswith("/flaky/"):
+            key = (self.command, self.headers.get("Range", ""))
+            self.failures[key] = self.failures.get(key, 0) + 1
+            if self.failures[key] == 1:
+                self.send_error(503)
+                return None
+
+            self.path = self.path.replace("/flaky/", "/", 1)
+
+        return super().send_head()
@@ -0,0 +1,36 @@
+"""Custom rio-tiler readers used in tests."""
+
+from typing import Dict, Type
+
+import attr
+from morecantile import TileMatrixSet
+from rio_tiler.constants import WEB_MERCATOR_TMS
+from rio_tiler.io import BaseReader, MultiBandReader, Reader
+
+
+@attr.s
+class BandFileReader(MultiBandReader):
+    """Read bands stored as separate COGs (`{input}/b1.tif`, `{input}/b2.tif`, ...)."""
+
+    input: str = attr.ib()
+    tms: TileMatrixSet = attr.ib(default=WEB_MERCATOR_TMS)
+    reader_options: Dict = attr.ib(factory=dict)
+
+    reader: Type[BaseReader] = attr.ib(init=False, default=Reader)
+
+    minzoom: int = attr.ib(init=False)
+    maxzoom: int = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        """Get bounds and zooms from the first band."""
+        self.bands = ["b1", "b2", "b3"]
+        self.default_bands = self.bands
+        with self.reader(self._get_band_url("b1"), tms=self.tms) as cog:
+            self.bounds = cog.bounds
+            self.crs = cog.crs
+            self.minzoom = cog.minzoom
+            self.maxzoom = cog.maxzoom
+
+    def _get_band_url(self, band: str) -> str:
+        """Get band file URL."""
+        return f"{self.input}/{band}.tif"
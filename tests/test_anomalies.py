@@ -0,0 +1,163 @@
+"""Tests for tilebench.anomalies."""
+
+import morecantile
+import numpy
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from tilebench.anomalies import (
+    anomalies_geojson,
+    detect_anomalies,
+    find_anomalies,
+    predict_tiles,
+)
+from tilebench.server import serve
+
+
+def _record(tile, get=2, nbytes=1000, masked=False):
+    return {
+        "tile": tile,
+        "HEAD": 1,
+        "GET": get,
+        "bytes": nbytes,
+        "Timing": 0.1,
+        "masked": masked,
+    }
+
+
+@pytest.fixture(scope="module")
+def sparse_url(tmp_path_factory):
+    """GeoTIFF without overviews, with an empty (nodata) left half."""
+    path = tmp_path_factory.mktemp("sparse")
+    data = numpy.random.default_rng(0).integers(1, 255, (1, 1024, 1024), dtype="uint8")
+    data[:, :, :512] = 0
+    with rasterio.open(
+        path / "sparse.tif",
+        "w",
+        driver="GTiff",
+        width=1024,
+        height=1024,
+        count=1,
+        dtype="uint8",
+        crs="EPSG:3857",
+        transform=from_origin(0, 1000000, 100, 100),
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        compress="deflate",
+        nodata=0,
+    ) as dst:
+        dst.write(data)
+
+    with serve(str(path)) as url:
+        yield f"{url}/sparse.tif"
+
+
+def test_detect_anomalies():
+    """Flag and rank anomalous tiles."""
+    records = [_record(f"5-{x}-{y}") for x in range(3) for y in range(3)]
+    records[4] = _record("5-1-1", get=6, nbytes=5000)
+    records.append(_record("5-9-9", get=3, nbytes=1500, masked=True))
+    records.append(_record("6-0-0", get=2, nbytes=900))
+
+    predictions = {
+        "5-0-0": {
+            "level": 0,
+            "blocks": 1,
+            "GET": 1,
+            "bytes": 200,
+            "amplification": 4.0,
+            "full_resolution": True,
+        },
+        "5-0-1": {
+            "level": 1,
+            "blocks": 1,
+            "GET": 1,
+            "bytes": 900,
+            "amplification": 1.0,
+            "full_resolution": False,
+        },
+    }
+    header = {"GET": 1, "bytes": 100}
+
+    anomalies = detect_anomalies(records, predictions, header)
+    assert [a["tile"] for a in anomalies] == ["5-1-1", "5-9-9", "5-0-0"]
+    assert [a["rank"] for a in anomalies] == [1, 2, 3]
+
+    center = anomalies[0]
+    assert [a["type"] for a in center["anomalies"]] == ["neighbours"]
+    assert center["score"] == 4000
+    assert (
+        "GET 6 vs 2, bytes 5000 vs 1000 (median of 8 neighbours)" in center["explanation"]
+    )
+
+    masked = anomalies[1]
+    assert [a["type"] for a in masked["anomalies"]] == ["masked"]
+    assert masked["score"] == 1400
+    assert "fully masked" in masked["explanation"]
+
+    # 1000 bytes while 300 are predicted, read from the full resolution
+    corner = anomalies[2]
+    assert [a["type"] for a in corner["anomalies"]] == ["layout", "full_resolution"]
+    assert corner["score"] == 700
+
+    # Single tile zoom: nothing to compare to
+    assert not detect_anomalies([_record("6-0-0", get=10)])
+
+    # Without header, masked tiles fetching any data are flagged
+    anomalies = detect_anomalies([_record("6-0-0", masked=True)])
+    assert anomalies[0]["anomalies"][0]["type"] == "masked"
+
+
+def test_find_anomalies(sparse_url):
+    """Find masked and full resolution tiles."""
+    report = find_anomalies(sparse_url, zooms=[10])
+    assert report["tiles"] == 12
+    assert report["header"]["GET"] >= 1
+
+    anomalies = report["anomalies"]
+    assert [a["rank"] for a in anomalies] == list(range(1, len(anomalies) + 1))
+    assert [a["score"] for a in anomalies] == sorted(
+        (a["score"] for a in anomalies), reverse=True
+    )
+
+    # The left column of tiles only intersects empty (nodata) blocks
+    masked = [a["tile"] for a in anomalies if a["masked"]]
+    assert sorted(masked) == [f"10-512-{y}" for y in range(486, 490)]
+    for record in anomalies:
+        if record["masked"]:
+            assert "masked" in [a["type"] for a in record["anomalies"]]
+
+    # No overviews: zoom 9 tiles are read from the full resolution
+    report = find_anomalies(sparse_url, zooms=[9], factor=100)
+    assert report["tiles"] == 4
+    assert len(report["anomalies"]) == 4
+    for record in report["anomalies"]:
+        assert "full_resolution" in [a["type"] for a in record["anomalies"]]
+
+
+def test_predict_tiles(cog_url):
+    """Predict the blocks read by each tile."""
+    tiles = [morecantile.Tile(512, 486, 10), morecantile.Tile(256, 243, 9)]
+    predictions = predict_tiles(cog_url, tiles, chunk_size=1024)
+
+    assert predictions["10-512-486"]["level"] == 0
+    # Tile across 2 blocks (horizontally)
+    assert predictions["10-512-486"]["blocks"] == 2
+    assert predictions["10-512-486"]["GET"] == 2
+    assert predictions["10-512-486"]["bytes"] % 1024 == 0
+    assert not predictions["10-512-486"]["full_resolution"]
+    assert predictions["9-256-243"]["level"] == 1
+
+
+def test_anomalies_geojson():
+    """Anomalous tiles as GeoJSON features."""
+    anomalies = detect_anomalies([_record("1-0-0", masked=True)])
+    geojson = anomalies_geojson(anomalies)
+    assert len(geojson["features"]) == 1
+
+    feature = geojson["features"][0]
+    assert feature["properties"]["tile"] == "1-0-0"
+    assert feature["properties"]["types"] == ["masked"]
+    assert feature["geometry"]["coordinates"][0][0] == pytest.approx([-180, 85.0511287])
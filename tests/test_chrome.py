@@ -0,0 +1,92 @@
+"""tilebench.chrome tests."""
+
+import cProfile
+import pstats
+
+from tilebench.chrome import chrome_trace, parse_phases
+
+
+def _request(start, end, range=None, method="GET"):
+    return {
+        "method": method,
+        "url": "https://example.com/cog.tif",
+        "status": 206,
+        "http_version": "HTTP/1.1",
+        "range": range,
+        "bytes": 10,
+        "connection": 0,
+        "request_headers": {},
+        "response_headers": {},
+        "start": start,
+        "end": end,
+        "duration": end - start,
+    }
+
+
+def test_parse_phases():
+    """Split capture in phases."""
+    logs = [
+        "GDAL: GDALOpen(/vsicurl/cog.tif, this=0x1) succeeds as GTiff.",
+        "GDAL: GDALClose(/vsicurl/cog.tif, this=0x1)",
+    ]
+    phases = parse_phases(logs, [1.5, 3.0], 1.0, 4.0)
+    assert phases == [
+        {"name": "open /vsicurl/cog.tif", "start": 1.0, "end": 1.5},
+        {"name": "read /vsicurl/cog.tif", "start": 1.5, "end": 3.0},
+        {"name": "other", "start": 3.0, "end": 4.0},
+    ]
+    assert parse_phases([], [], 1.0, 4.0) == []
+
+
+def test_chrome_trace():
+    """Create trace events."""
+    requests = [
+        _request(10.0, 10.1, method="HEAD"),
+        _request(10.1, 10.3, range="0-9"),
+        _request(10.2, 10.4, range="10-19"),  # overlaps the previous request
+        _request(10.35, 10.5, range="20-29"),
+    ]
+    trace = chrome_trace("read", 10.0, 11.0, requests)
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert events[0] == {
+        "name": "read",
+        "cat": "tilebench",
+        "ph": "X",
+        "ts": 0,
+        "dur": 1e6,
+        "pid": 1,
+        "tid": 1,
+    }
+    http = [e for e in events if e["cat"] == "http"]
+    assert [e["name"] for e in http] == ["HEAD", "GET 0-9", "GET 10-19", "GET 20-29"]
+    assert [e["tid"] for e in http] == [10, 10, 11, 10]
+    assert http[1]["ts"] == 1e5
+    assert http[1]["dur"] == 2e5
+
+    lanes = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+    assert [e["tid"] for e in lanes] == [1, 10, 11]
+
+
+def test_chrome_trace_cprofile():
+    """Lay out cProfile stats."""
+
+    def _child():
+        return sum(range(200_000))
+
+    def _parent():
+        return _child() + _child()
+
+    prof = cProfile.Profile()
+    prof.enable()
+    _parent()
+    prof.disable()
+
+    stats = pstats.Stats(prof)
+    trace = chrome_trace("read", 0.0, 1.0, [], stats=stats, min_duration=0)
+    events = [e for e in trace["traceEvents"] if e.get("cat") == "python"]
+    parent = next(e for e in events if e["name"].startswith("_parent "))
+    child = next(e for e in events if e["name"].startswith("_child "))
+    assert child["args"]["ncalls"] == 2
+    # callees are nested in their caller
+    assert parent["ts"] <= child["ts"]
+    assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"] + 1
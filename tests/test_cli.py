@@ -4,6 +4,7 @@ import json
 import os
 from unittest.mock import patch
 
+import pytest
 from click.testing import CliRunner
 
 from tilebench.scripts.cli import cli
@@ -149,3 +150,512 @@ def test_tms():
     assert not result.exception
     assert result.exit_code == 0
     assert "-" in result.output
+
+
+def test_profile_timeline(cog_url):
+    """Add requests timeline to the output."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            cog_url,
+            "--tile",
+            "11-1025-974",
+            "--add-timeline",
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing", "Timeline"] == list(log)
+    assert ["requests", "max_concurrency", "serialized_wait", "critical_path"] == list(
+        log["Timeline"]
+    )
+
+
+def test_profile_pricing(cog_url, tmp_path):
+    """Add the object storage cost to the output."""
+    runner = CliRunner()
+
+    args = ["profile", cog_url, "--tile", "11-1025-974"]
+    result = runner.invoke(cli, [*args, "--pricing", "gcs", "--pricing-tier", "nearline"])
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing", "Cost"] == list(log)
+    assert log["Cost"]["pricing"] == "gcs"
+    assert log["Cost"]["tier"] == "nearline"
+    assert log["Cost"]["retrieval"] > 0
+
+    path = str(tmp_path / "pricing.json")
+    with open(path, "w") as f:
+        json.dump({"minio": {"get": 0, "head": 0}}, f)
+
+    result = runner.invoke(cli, [*args, "--pricing", "minio", "--pricing-file", path])
+    assert not result.exception
+    assert json.loads(result.output)["Cost"]["per_million"] == 0
+
+    result = runner.invoke(cli, [*args, "--pricing", "minio"])
+    assert result.exit_code == 2
+    assert "Unknown minio pricing" in result.output
+
+    result = runner.invoke(cli, [*args, "--pricing-tier", "nearline"])
+    assert result.exit_code == 2
+
+
+def test_profile_connections(flaky_server):
+    """Add connection diagnostics to the output."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            f"{flaky_server}/flaky/cog.tif",
+            "--tile",
+            "11-1025-974",
+            "--add-connections",
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+            "--config",
+            "GDAL_HTTP_MAX_RETRY=2",
+            "--config",
+            "GDAL_HTTP_RETRY_DELAY=0.1",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing", "Connections"] == list(log)
+    assert log["Connections"]["retries"]["count"] >= 1
+    assert log["Connections"]["errors"]["5xx"] >= 1
+
+
+def test_profile_fsspec(zarr_url):
+    """Profile a Zarr store with the fsspec IO backend."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            zarr_url,
+            "--zoom",
+            4,
+            "--reader",
+            "tilebench.readers.XarrayReader",
+            "-p",
+            "variable=band",
+            "--io",
+            "fsspec",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "LIST", "Chunks", "Timing"] == list(log)
+    assert log["GET"]["count"] > log["Chunks"]["count"] > 0
+    assert any(key.startswith("band/c/") for key in log["Chunks"]["keys"])
+
+
+def test_profile_repeat(cog_url):
+    """Repeat the read and summarize the runs."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            f"{cog_url}?cli=repeat",
+            "--tile",
+            "11-1025-974",
+            "--repeat",
+            "4",
+            "--warmup",
+            "1",
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing", "CPU", "Repeat"] == list(log)
+    assert log["Repeat"]["runs"] == 4
+    assert log["Repeat"]["warmup"] == 1
+    assert {"min", "median", "p95", "p99", "stddev"} <= set(log["Repeat"]["wall"])
+    assert {"min", "median", "p95", "p99", "stddev"} <= set(log["Repeat"]["cpu"])
+    # Runs do not reuse the cached data
+    assert log["Repeat"]["io_mismatch"] == []
+
+    result = runner.invoke(cli, ["profile", cog_url, "--repeat", "0"])
+    assert result.exit_code == 2
+
+
+def test_profile_trace_file(cog_url, tmp_path):
+    """Write Chrome trace file."""
+    runner = CliRunner()
+
+    trace_file = str(tmp_path / "trace.json")
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            cog_url,
+            "--tile",
+            "11-1025-974",
+            "--trace-file",
+            trace_file,
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    assert ["HEAD", "GET", "Timing"] == list(json.loads(result.output))
+    with open(trace_file) as f:
+        assert json.load(f)["traceEvents"]
+
+
+def test_profile_har_file(cog_url, tmp_path):
+    """Write HAR file."""
+    runner = CliRunner()
+
+    har_file = str(tmp_path / "tile.har")
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            cog_url,
+            "--tile",
+            "11-1025-974",
+            "--har-file",
+            har_file,
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    with open(har_file) as f:
+        assert json.load(f)["log"]["entries"]
+
+
+def test_profile_urls(range_server):
+    """Break down statistics per URL for multi-file readers."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            range_server,
+            "--tile",
+            "11-1025-974",
+            "--reader",
+            "tests.readers.BandFileReader",
+            "--add-urls",
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing", "URLs"] == list(log)
+
+    urls = log["URLs"]
+    assert sorted(urls) == [f"{range_server}/b{b}.tif" for b in [1, 2, 3]]
+    # Totals are kept
+    assert sum(u["GET"]["count"] for u in urls.values()) == log["GET"]["count"]
+    assert sum(u["GET"]["bytes"] for u in urls.values()) == log["GET"]["bytes"]
+    assert sorted(r for u in urls.values() for r in u["GET"]["ranges"]) == sorted(
+        log["GET"]["ranges"]
+    )
+    for stats in urls.values():
+        assert ["HEAD", "GET", "Timing"] == list(stats)
+        assert stats["GET"]["count"] > 0
+
+
+@pytest.mark.parametrize(
+    "method,params",
+    [
+        ("part", []),
+        ("part", ["-m", "bbox=0.5,8.5,0.6,8.6", "-m", "max_size=64"]),
+        ("preview", ["-m", "max_size=128"]),
+        ("point", []),
+        ("feature", []),
+        ("statistics", ["-m", "max_size=128", "-m", "percentiles=[5,95]"]),
+    ],
+)
+def test_profile_method(cog_url, method, params):
+    """Profile other reader methods."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            cog_url,
+            "--tile",
+            "11-1025-974",
+            "--method",
+            method,
+            *params,
+            "--config",
+            "GDAL_DISABLE_READDIR_ON_OPEN=EMPTY_DIR",
+            "--config",
+            f"CPL_VSIL_CURL_NON_CACHED=/vsicurl/{cog_url}",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing"] == list(log)
+    assert log["GET"]["count"] > 0
+
+
+def test_profile_encoding(cog_url):
+    """Benchmark output encoding."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        ["profile", cog_url, "--tile", "11-1025-974", "--add-encoding"],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert ["HEAD", "GET", "Timing", "Encoding"] == list(log)
+    assert {"PNG", "JPEG", "WEBP", "JP2OpenJPEG", "GTiff", "NPY"} == {
+        e["format"] for e in log["Encoding"]
+    }
+
+    result = runner.invoke(
+        cli,
+        ["profile", cog_url, "--method", "point", "--add-encoding"],
+    )
+    assert result.exit_code == 2
+
+
+def test_codec(cog_url):
+    """Benchmark blocks decoding."""
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["codec", cog_url, "--max-blocks", "2"])
+    assert not result.exception
+    assert result.exit_code == 0
+    log = json.loads(result.output)
+    assert log["compression"] == "DEFLATE"
+    assert log["blocks"] == 2
+    assert ["time", "MB/s", "block"] == list(log["decode"])
+
+
+def test_variants(data_dir, tmp_path):
+    """Compare COG layout variants."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "variants",
+            str(data_dir / "cog.tif"),
+            "--blocksize",
+            "256",
+            "--blocksize",
+            "512",
+            "--overviews",
+            "1",
+            "--tile",
+            "11-1024-978",
+            "--output-dir",
+            str(tmp_path),
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    rows = json.loads(result.output)
+    assert [row["name"] for row in rows] == [
+        "bs256_deflate_ovr1_nearest_pixel",
+        "bs512_deflate_ovr1_nearest_pixel",
+    ]
+    assert rows[0]["count"] == 1
+    assert (tmp_path / "bs256_deflate_ovr1_nearest_pixel.tif").exists()
+
+    result = runner.invoke(
+        cli,
+        ["variants", str(data_dir / "cog.tif"), "--tiles", "2", "--seed", "1"],
+    )
+    assert not result.exception
+    rows = json.loads(result.output)
+    assert len(rows) == 1
+    assert rows[0]["count"] == 2
+
+
+def test_advise(data_dir):
+    """Check overview coverage."""
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["advise", str(data_dir / "cog.tif")])
+    assert not result.exception
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert [z["zoom"] for z in report["zooms"]] == [8, 9, 10, 11]
+    assert report["recommended"] == [2, 4]
+
+    result = runner.invoke(
+        cli,
+        ["advise", str(data_dir / "cog.tif"), "--minzoom", "4", "--maxzoom", "9"],
+    )
+    assert not result.exception
+    report = json.loads(result.output)
+    assert report["zooms"][0]["level"] == 2
+    assert report["add"] == [8, 16, 32, 64]
+
+
+def test_estimate(cog_url):
+    """Estimate tiles cost per zoom."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "estimate",
+            cog_url,
+            "--zoom",
+            "10",
+            "--zoom",
+            "11",
+            "--max-tiles",
+            "10",
+            "--seed",
+            "1",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert [z["zoom"] for z in report["zooms"]] == [10, 11]
+    assert all(z["sampled"] <= 10 for z in report["zooms"])
+    assert report["pyramid"]["GET"]["total"] > 0
+
+    result = runner.invoke(cli, ["estimate", cog_url, "--zoom", "10", "--min-tiles", "1"])
+    assert result.exit_code == 2
+
+
+def test_header(cog_url):
+    """Measure the open cost."""
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["header", cog_url])
+    assert not result.exception
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert report["open"]["GET"]["count"] == 1
+    assert report["layout"]["contiguous"]
+    assert report["recommendation"] == {"GDAL_INGESTED_BYTES_AT_OPEN": 16384}
+    assert report["verified"]["GET"]["count"] == 1
+
+
+def test_anomalies(cog_url, tmp_path):
+    """Rank anomalous tiles and write them as GeoJSON."""
+    runner = CliRunner()
+
+    geojson = str(tmp_path / "anomalies.geojson")
+    result = runner.invoke(
+        cli,
+        ["anomalies", cog_url, "--zoom", "10", "--geojson", geojson],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert report["tiles"] == 12
+    assert ["tiles", "header", "anomalies"] == list(report)
+
+    with open(geojson) as f:
+        features = json.load(f)["features"]
+
+    assert [f["properties"]["tile"] for f in features] == [
+        a["tile"] for a in report["anomalies"]
+    ]
+
+    result = runner.invoke(
+        cli,
+        ["anomalies", cog_url, "--tile", "10-512-486", "--no-layout"],
+    )
+    assert not result.exception
+    assert json.loads(result.output)["tiles"] == 1
+
+
+def test_manifest(cog_url, tmp_path):
+    """Create, split and run a manifest and merge the shard results."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        [
+            "manifest",
+            "create",
+            cog_url,
+            "--zoom",
+            "10",
+            "--config",
+            "GDAL_HTTP_MAX_RETRY=3",
+        ],
+    )
+    assert not result.exception
+    assert result.exit_code == 0
+    manifest = json.loads(result.output)
+    assert manifest["dataset"] == cog_url
+    assert manifest["config"] == {"gdal_http_max_retry": "3"}
+    assert all(t.startswith("10-") for t in manifest["tiles"])
+
+    path = str(tmp_path / "manifest.json")
+    with open(path, "w") as f:
+        f.write(result.output)
+
+    result = runner.invoke(
+        cli,
+        ["manifest", "split", path, "--shards", "2", "--output-dir", str(tmp_path)],
+    )
+    assert not result.exception
+    shards = result.output.split()
+    assert [os.path.basename(s) for s in shards] == ["shard-0.json", "shard-1.json"]
+
+    # Run a shard file, or split the manifest on the fly
+    out0 = str(tmp_path / "result-0.json")
+    result = runner.invoke(cli, ["manifest", "run-shard", shards[0], "-o", out0])
+    assert not result.exception
+
+    result = runner.invoke(
+        cli, ["manifest", "run-shard", path, "--shard", "1", "--shards", "2"]
+    )
+    assert not result.exception
+    out1 = str(tmp_path / "result-1.json")
+    with open(out1, "w") as f:
+        f.write(result.output)
+
+    result = runner.invoke(cli, ["manifest", "merge", out0, out1])
+    assert not result.exception
+    merged = json.loads(result.output)
+    assert merged["tiles"] == len(manifest["tiles"])
+    assert merged["summary"]["10"]["count"] == len(manifest["tiles"])
+    assert "Cost" not in merged["summary"]["10"]
+
+    result = runner.invoke(cli, ["manifest", "merge", out0, out1, "--pricing", "azure"])
+    assert not result.exception
+    cost = json.loads(result.output)["summary"]["10"]["Cost"]
+    assert cost["pricing"] == "azure"
+    assert cost["per_million"] == pytest.approx(cost["tile"] * 1e6)
+
+    result = runner.invoke(cli, ["manifest", "run-shard", path, "--shard", "1"])
+    assert result.exit_code == 2
+
+    result = runner.invoke(
+        cli, ["manifest", "run-shard", path, "--shard", "2", "--shards", "2"]
+    )
+    assert result.exit_code == 2
@@ -0,0 +1,231 @@
+"""tilebench.codec tests."""
+
+import numpy
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from tilebench import capture
+from tilebench import codec as codec_module
+from tilebench.codec import (
+    _header_ranges,
+    _sparse_copy,
+    benchmark_codec,
+    block_layout,
+    block_windows,
+    read_bytes,
+)
+
+CODECS = [
+    ("DEFLATE", {"predictor": 2}),
+    ("ZSTD", {}),
+    ("LZW", {}),
+    ("LERC", {}),
+    ("WEBP", {}),
+    ("JPEG", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def codec_dir(tmp_path_factory):
+    """Small GeoTIFFs with different codecs."""
+    path = tmp_path_factory.mktemp("codecs")
+    data = numpy.random.default_rng(0).integers(0, 64, (3, 600, 500), dtype="uint8")
+    for compress, options in CODECS:
+        with rasterio.open(
+            path / f"{compress.lower()}.tif",
+            "w",
+            driver="GTiff",
+            width=500,
+            height=600,
+            count=3,
+            dtype="uint8",
+            crs="EPSG:3857",
+            transform=from_origin(0, 1000000, 100, 100),
+            tiled=True,
+            blockxsize=256,
+            blockysize=256,
+            compress=compress,
+            **options,
+        ) as dst:
+            dst.write(data)
+
+    with rasterio.open(
+        path / "band.tif",
+        "w",
+        driver="GTiff",
+        width=500,
+        height=600,
+        count=3,
+        dtype="uint16",
+        tiled=True,
+        compress="DEFLATE",
+        interleave="band",
+    ) as dst:
+        dst.write(data.astype("uint16"))
+
+    # Only the first block is written
+    with rasterio.open(
+        path / "sparse.tif",
+        "w",
+        driver="GTiff",
+        width=500,
+        height=600,
+        count=1,
+        dtype="uint8",
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        compress="DEFLATE",
+        SPARSE_OK=True,
+    ) as dst:
+        dst.write(data[:1, :256, :256], window=((0, 256), (0, 256)))
+
+    return path
+
+
+def test_block_layout(codec_dir):
+    """Get blocks windows, offsets and sizes."""
+    with rasterio.open(codec_dir / "deflate.tif") as src_dst:
+        windows = list(block_windows(src_dst))
+        assert len(windows) == 6  # 2 columns x 3 rows
+        assert windows[-1].width == 500 - 256
+        assert windows[-1].height == 600 - 512
+
+        blocks = block_layout(src_dst)
+        assert len(blocks) == 6
+        assert all(b["band"] is None for b in blocks)
+        assert len({b["offset"] for b in blocks}) == 6
+
+    with rasterio.open(codec_dir / "band.tif") as src_dst:
+        blocks = block_layout(src_dst)
+        assert len(blocks) == 18
+        assert [b["band"] for b in blocks[:3]] == [1, 2, 3]
+
+    # Empty blocks are skipped
+    with rasterio.open(codec_dir / "sparse.tif") as src_dst:
+        blocks = block_layout(src_dst)
+        assert len(blocks) == 1
+        assert blocks[0]["size"] > 0
+
+    # Not a GeoTIFF
+    with rasterio.open(codec_dir / "deflate.tif") as src_dst:
+        with rasterio.io.MemoryFile() as mem:
+            with mem.open(**{**src_dst.profile, "driver": "PNG"}) as png:
+                png.write(src_dst.read())
+            with mem.open() as png:
+                with pytest.raises(ValueError):
+                    block_layout(png)
+
+
+@pytest.mark.parametrize("compress", [c for c, _ in CODECS])
+def test_benchmark_codec(codec_dir, compress):
+    """Benchmark blocks decoding."""
+    stats = benchmark_codec(str(codec_dir / f"{compress.lower()}.tif"))
+    assert stats["compression"] == compress
+    assert stats["blocks"] == 6
+    assert stats["decompressed_bytes"] == 500 * 600 * 3
+    assert stats["compressed_bytes"] > 0
+    for step in ["fetch", "read", "decode"]:
+        assert stats[step]["time"] > 0
+        assert stats[step]["MB/s"] > 0
+        assert stats[step]["block"]["count"] == 6
+
+    if compress == "DEFLATE":
+        assert stats["predictor"] == "2"
+        assert stats["ratio"] > 1
+
+
+def test_benchmark_codec_band_interleave(codec_dir):
+    """Benchmark band interleaved blocks."""
+    stats = benchmark_codec(str(codec_dir / "band.tif"), max_blocks=3)
+    assert stats["interleave"] == "BAND"
+    assert stats["blocks"] == 3
+    # first block of each band
+    assert stats["decompressed_bytes"] == 3 * 256 * 256 * 2
+
+
+def test_benchmark_codec_http(cog_url):
+    """Benchmark blocks fetched from an HTTP server."""
+    stats = benchmark_codec(cog_url, ovr_level=0)
+    assert stats["width"] == 512
+    assert stats["blocks"] == 4
+    assert stats["fetch"]["block"]["count"] == 4
+
+
+def test_benchmark_codec_vsi(cog_url):
+    """Benchmark blocks fetched through a GDAL virtual file system path."""
+    stats = benchmark_codec(f"/vsicurl/{cog_url}", ovr_level=0)
+    assert stats["blocks"] == 4
+    assert stats["fetch"]["block"]["count"] == 4
+    assert stats["decode"]["block"]["count"] == 4
+
+
+def test_benchmark_codec_sparse(codec_dir):
+    """Benchmark a sparse GeoTIFF."""
+    stats = benchmark_codec(str(codec_dir / "sparse.tif"))
+    assert stats["blocks"] == 1
+    assert stats["empty_blocks"] == 5
+    assert stats["decode"]["block"]["count"] == 1
+
+
+def test_read_bytes(data_dir, cog_url):
+    """Read byte ranges of any path GDAL can open."""
+    with open(data_dir / "cog.tif", "rb") as f:
+        f.seek(100)
+        expected = f.read(1000)
+        size = f.seek(0, 2)
+
+    assert read_bytes(str(data_dir / "cog.tif"), 100, 1000) == expected
+    assert read_bytes(cog_url, 100, 1000) == expected
+    assert read_bytes(f"/vsicurl/{cog_url}", 100, 1000) == expected
+
+    # zero padded past the end of the file
+    assert read_bytes(cog_url, size - 2, 4)[2:] == b"\x00\x00"
+
+    # No request for empty ranges
+    with capture() as stats:
+        assert read_bytes(cog_url, 0, 0) == b""
+    assert stats["GET"]["count"] == 0
+
+
+def test_sparse_copy(cog_url):
+    """Read blocks from the in-memory copy, without any request."""
+    with rasterio.open(cog_url) as src_dst:
+        blocks = block_layout(src_dst)
+        expected = src_dst.read()
+
+    regions = [
+        (start, read_bytes(cog_url, start, end - start))
+        for start, end in _header_ranges(cog_url)
+    ]
+    regions.extend(
+        (b["offset"], read_bytes(cog_url, b["offset"], b["size"])) for b in blocks
+    )
+
+    with _sparse_copy(regions) as sparse_path:
+        with capture() as stats:
+            with rasterio.open(sparse_path) as src_dst:
+                numpy.testing.assert_array_equal(src_dst.read(), expected)
+
+    assert stats["HEAD"]["count"] == 0
+    assert stats["GET"]["count"] == 0
+
+
+def test_benchmark_codec_decode_requests(cog_url, monkeypatch):
+    """The decode pass does not make any request."""
+    requests = []
+    read_blocks = codec_module._read_blocks
+
+    def _read_blocks(*args):
+        with capture() as stats:
+            timings = read_blocks(*args)
+        requests.append(stats["HEAD"]["count"] + stats["GET"]["count"])
+        return timings
+
+    monkeypatch.setattr(codec_module, "_read_blocks", _read_blocks)
+    # The fetch pass does not fill GDAL's cache for the read pass
+    benchmark_codec(cog_url, ovr_level=0)
+    read, decode = requests
+    assert read > 0
+    assert decode == 0
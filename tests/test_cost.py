@@ -0,0 +1,127 @@
+"""Tests for tilebench.cost."""
+
+import json
+
+import pytest
+from rio_tiler.io import Reader
+
+from tilebench import Session, capture, load_pricing
+from tilebench import profile as profiler
+from tilebench.cost import GB, Pricing, tile_cost
+
+
+def test_pricing_cost():
+    """Requests are priced per 1,000 and bytes per GB."""
+    pricing = Pricing("test", get=0.4, head=0.2, list=5, egress=0.09, retrieval=0.01)
+    costs = pricing.cost(head=1, get=10, nbytes=GB, list=2)
+    assert costs["HEAD"] == pytest.approx(0.0002)
+    assert costs["GET"] == pytest.approx(0.004)
+    assert costs["LIST"] == pytest.approx(0.01)
+    assert costs["egress"] == pytest.approx(0.09)
+    assert costs["retrieval"] == pytest.approx(0.01)
+    assert costs["total"] == pytest.approx(0.1142)
+
+    assert Pricing("free", get=0, head=0).cost(get=10, nbytes=GB)["total"] == 0
+
+
+def test_load_pricing(tmp_path):
+    """Load presets, tiers and overrides."""
+    s3 = load_pricing()
+    assert s3.name == "s3"
+    assert s3.tier is None
+    assert s3.get == 0.0004
+    assert s3.retrieval == 0
+
+    ia = load_pricing("s3", tier="standard-ia")
+    assert ia.tier == "standard-ia"
+    assert ia.get > s3.get
+    assert ia.retrieval == 0.01
+    assert ia.egress == s3.egress
+
+    assert load_pricing("gcs", egress=0).egress == 0
+
+    path = tmp_path / "pricing.json"
+    path.write_text(
+        json.dumps(
+            {
+                "s3": {"egress": 0, "tiers": {"express": {"get": 0.0002}}},
+                "r2": {"get": 0.00036, "head": 0.00036},
+            }
+        )
+    )
+    assert load_pricing("s3", path=str(path)).egress == 0
+    assert load_pricing("s3", tier="standard-ia", path=str(path)).get == ia.get
+    assert load_pricing("s3", tier="express", path=str(path)).get == 0.0002
+
+    r2 = load_pricing("r2", path=str(path))
+    assert r2 == Pricing("r2", get=0.00036, head=0.00036)
+
+    with pytest.raises(ValueError, match="Unknown r2 pricing"):
+        load_pricing("r2")
+
+    with pytest.raises(ValueError, match="Unknown express tier"):
+        load_pricing("s3", tier="express")
+
+    with pytest.raises(ValueError, match="Invalid s3 pricing"):
+        load_pricing("s3", put=0.005)
+
+    path.write_text(json.dumps({"minio": {"egress": 0}}))
+    with pytest.raises(ValueError, match="Invalid minio pricing"):
+        load_pricing("minio", path=str(path))
+
+
+def test_tile_cost():
+    """Cost of one read and projection for one million reads."""
+    pricing = Pricing("test", get=1, head=1, list=1, egress=1)
+    results = {
+        "HEAD": {"count": 1},
+        "GET": {"count": 3, "bytes": GB // 2},
+        "Timing": 0.1,
+    }
+    cost = tile_cost(results, pricing)
+    assert cost["pricing"] == "test"
+    assert cost["tier"] is None
+    assert cost["LIST"] == 0
+    assert cost["total"] == pytest.approx(0.004 + 0.5)
+    assert cost["per_million"] == pytest.approx(cost["total"] * 1e6)
+
+    cost = tile_cost({**results, "LIST": {"count": 1}}, pricing)
+    assert cost["LIST"] == 0.001
+
+
+def test_profile_cost(cog_url):
+    """Add the `Cost` of profiled calls and aggregated sessions."""
+    pricing = load_pricing("s3")
+    session = Session()
+
+    @profiler(
+        quiet=True,
+        add_to_return=True,
+        config={"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"},
+        session=session,
+        label=lambda src_path, x, y, z: z,
+        pricing=pricing,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    _, stats = _read_tile(cog_url, 1025, 974, 11)
+    assert stats["Cost"] == tile_cost(stats, pricing)
+    assert stats["Cost"]["GET"] == stats["GET"]["count"] * pricing.get / 1000
+    _read_tile(cog_url, 1026, 974, 11)
+
+    with capture(pricing=pricing) as stats:
+        with Reader(cog_url) as cog:
+            cog.tile(1025, 974, 11)
+
+    assert stats["Cost"]["total"] > 0
+
+    summary = session.summary(pricing=pricing)
+    cost = summary["11"]["Cost"]
+    assert cost["pricing"] == "s3"
+    assert cost["tile"] == pytest.approx(cost["total"] / 2)
+    assert cost["per_million"] == pytest.approx(cost["tile"] * 1e6)
+    assert cost["GET"] == summary["11"]["GET"]["count"] * pricing.get / 1000
+
+    assert "Cost" not in session.summary()["11"]
@@ -0,0 +1,37 @@
+"""tilebench.encoding tests."""
+
+import numpy
+from rio_tiler.models import ImageData
+
+from tilebench.encoding import FORMATS, benchmark_encoding
+
+
+def test_benchmark_encoding():
+    """Benchmark image encoding."""
+    data = numpy.random.default_rng(0).integers(0, 255, (3, 256, 256), dtype="uint8")
+    img = ImageData(data)
+
+    results = benchmark_encoding(img)
+    assert len(results) == len(FORMATS)
+    for entry, (img_format, options) in zip(results, FORMATS):
+        assert entry["format"] == img_format
+        assert entry["options"] == options
+        assert "error" not in entry
+        assert entry["time"] > 0
+        assert entry["cpu"] >= 0
+        assert entry["size"] > 0
+        assert entry["memory"] >= 0
+
+    png = {r["options"]["zlevel"]: r for r in results if r["format"] == "PNG"}
+    assert png[9]["size"] <= png[1]["size"]
+    npy = next(r for r in results if r["format"] == "NPY")
+    assert npy["size"] > 4 * 256 * 256  # data and mask
+    assert npy["memory"] > 0
+
+    results = benchmark_encoding(img, formats=[("JPEG", {"quality": 50})], repeat=3)
+    assert len(results) == 1
+    assert results[0]["size"] > 0
+
+    # Errors are reported
+    results = benchmark_encoding(img, formats=[("NOT_A_DRIVER", {})])
+    assert results[0]["error"]
@@ -0,0 +1,117 @@
+"""Tests for the fsspec IO backend."""
+
+import pytest
+
+from tilebench import capture, parse_fsspec_io_logs, parse_fsspec_requests
+
+fsspec = pytest.importorskip("fsspec")
+
+LOGS = [
+    "FSSPEC_INFO: GET bytes=500 range=- duration=0.002000 error=- url=https://a.b/s.zarr/zarr.json",
+    "FSSPEC_INFO: GET bytes=0 range=- duration=0.001000 error=FileNotFoundError url=https://a.b/s.zarr/.zmetadata",
+    "FSSPEC_INFO: GET bytes=100 range=- duration=0.004000 error=- url=https://a.b/s.zarr/band/c/0/0",
+    "FSSPEC_INFO: GET bytes=100 range=- duration=0.003000 error=- url=https://a.b/s.zarr/band/c/0/1",
+    "FSSPEC_INFO: HEAD bytes=0 range=- duration=0.001000 error=- url=https://a.b/file.nc",
+    "FSSPEC_INFO: GET bytes=1024 range=0-1023 duration=0.005000 error=- url=https://a.b/file.nc",
+    "FSSPEC_INFO: LIST bytes=0 range=- duration=0.001000 error=- url=https://a.b/",
+    "not an fsspec request",
+]
+
+
+def test_parse_fsspec_io_logs():
+    """Count requests, bytes and chunks."""
+    stats = parse_fsspec_io_logs(LOGS)
+    assert stats["HEAD"] == {"count": 1}
+    assert stats["LIST"] == {"count": 1}
+    assert stats["GET"] == {"count": 5, "bytes": 1724, "ranges": ["0-1023"]}
+    assert stats["Chunks"] == {
+        "count": 3,
+        "keys": ["band/c/0/0", "band/c/0/1", "https://a.b/file.nc"],
+    }
+
+
+def test_parse_fsspec_requests():
+    """Requests start with the call (log lines are emitted when calls end)."""
+    requests = parse_fsspec_requests(LOGS, timestamps=[float(i) for i in range(8)])
+    assert len(requests) == 7
+    assert [req["method"] for req in requests[4:]] == ["HEAD", "GET", "LIST"]
+
+    req = requests[5]
+    assert req["url"] == "https://a.b/file.nc"
+    assert req["range"] == "0-1023"
+    assert req["bytes"] == 1024
+    assert req["status"] is None
+    assert req["end"] == 5.0
+    assert req["start"] == pytest.approx(4.995)
+    assert req["duration"] == 0.005
+
+    assert requests[0]["range"] is None
+
+
+def test_capture_local_filesystem(tmp_path):
+    """Capture the requests of a (sync) fsspec filesystem."""
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 100)
+
+    fs = fsspec.filesystem("file")
+    with capture(io="fsspec", timeline=True) as stats:
+        fs.info(str(path))
+        fs.ls(str(tmp_path))
+        fs.cat_file(str(path), start=10, end=20)
+
+    assert stats["HEAD"]["count"] == 1
+    assert stats["LIST"]["count"] == 1
+    assert stats["GET"] == {"count": 1, "bytes": 10, "ranges": ["10-19"]}
+    assert stats["Chunks"]["keys"] == [f"file://{path}"]
+    assert len(stats["Timeline"]["requests"]) == 3
+
+    # Requests outside of a capture are not recorded
+    fs.cat_file(str(path))
+    with capture(io="fsspec") as stats:
+        pass
+
+    assert stats["GET"]["count"] == 0
+
+
+def test_capture_zarr(zarr_url):
+    """Capture the chunks read by the Xarray reader."""
+    from tilebench.readers import XarrayReader
+
+    with capture(io="fsspec") as stats:
+        with XarrayReader(zarr_url, variable="band") as src:
+            img = src.tile(9, 6, 4)
+
+    assert img.data.shape == (1, 256, 256)
+    assert stats["HEAD"]["count"] == 0
+    assert "zarr.json" not in stats["Chunks"]["keys"]
+    assert {"x/c/0", "y/c/0"} < set(stats["Chunks"]["keys"])
+
+    # Dataset opened before the capture: only the chunks of the tile
+    with XarrayReader(zarr_url, variable="band") as src:
+        with capture(io="fsspec", urls=True) as stats:
+            src.tile(9, 6, 4)
+
+    keys = [f"band/c/0/{x}" for x in range(3, 7)]
+    assert sorted(stats["Chunks"]["keys"]) == keys
+    assert stats["Chunks"]["count"] == 4
+    assert stats["GET"]["count"] == 4
+    assert stats["GET"]["bytes"] == sum(
+        info["GET"]["bytes"] for info in stats["URLs"].values()
+    )
+    assert sorted(stats["URLs"]) == [f"{zarr_url}/{key}" for key in keys]
+
+
+def test_capture_netcdf(range_server, xarray_dataset):
+    """Capture the HEAD/GET requests of a NetCDF file."""
+    pytest.importorskip("h5netcdf")
+    from tilebench.readers import XarrayReader
+
+    url = f"{range_server}/dataset.nc"
+    with capture(io="fsspec") as stats:
+        with XarrayReader(url, variable="band") as src:
+            src.tile(9, 6, 4)
+
+    assert stats["HEAD"]["count"] == 1
+    assert stats["GET"]["count"] >= 1
+    assert stats["GET"]["ranges"][0].startswith("0-")
+    assert stats["Chunks"]["keys"] == [url]
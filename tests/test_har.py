@@ -0,0 +1,92 @@
+"""tilebench.har tests."""
+
+import json
+
+from tilebench import __version__
+from tilebench.har import append_har, har_entry, har_log
+
+
+def _request(start, end, **kwargs):
+    req = {
+        "method": "GET",
+        "url": "https://example.com/cog.tif?token=abc",
+        "status": 206,
+        "http_version": "HTTP/1.1",
+        "range": "0-9",
+        "bytes": 10,
+        "connection": 0,
+        "request_headers": {"Host": "example.com", "Range": "bytes=0-9"},
+        "response_headers": {
+            "Content-Type": "image/tiff",
+            "Content-Range": "bytes 0-9/100",
+        },
+        "start": start,
+        "end": end,
+        "duration": end - start,
+    }
+    req.update(kwargs)
+    return req
+
+
+def test_har_entry():
+    """Create HAR entries."""
+    entry = har_entry(_request(0.0, 0.25), pageref="page_0")
+    assert entry["startedDateTime"] == "1970-01-01T00:00:00+00:00"
+    assert entry["time"] == 250
+    assert entry["timings"]["wait"] == 250
+    assert entry["pageref"] == "page_0"
+    assert entry["connection"] == "0"
+    assert entry["request"]["method"] == "GET"
+    assert entry["request"]["httpVersion"] == "HTTP/1.1"
+    assert entry["request"]["queryString"] == [{"name": "token", "value": "abc"}]
+    assert {"name": "Range", "value": "bytes=0-9"} in entry["request"]["headers"]
+    assert entry["response"]["status"] == 206
+    assert entry["response"]["statusText"] == "Partial Content"
+    assert entry["response"]["content"] == {"size": 10, "mimeType": "image/tiff"}
+    assert {
+        "name": "Content-Range",
+        "value": "bytes 0-9/100",
+    } in entry["response"]["headers"]
+    assert "comment" not in entry
+
+    # VSIFILE requests have no status, version or headers
+    entry = har_entry(
+        _request(
+            0.0,
+            0.1,
+            status=None,
+            http_version=None,
+            connection=None,
+            request_headers={},
+            response_headers={},
+        )
+    )
+    assert entry["response"]["status"] == 0
+    assert entry["response"]["statusText"] == ""
+    assert entry["request"]["headers"] == [{"name": "Range", "value": "bytes=0-9"}]
+    assert "connection" not in entry
+    assert "pageref" not in entry
+    assert entry["comment"]
+
+
+def test_har_log(tmp_path):
+    """Create and append HAR documents."""
+    har = har_log("read", 1.0, 2.0, [_request(1.0, 1.5), _request(1.5, 2.0)])
+    log = har["log"]
+    assert log["version"] == "1.2"
+    assert log["creator"] == {"name": "tilebench", "version": __version__}
+    assert len(log["pages"]) == 1
+    assert log["pages"][0]["pageTimings"]["onLoad"] == 1000
+    assert [e["pageref"] for e in log["entries"]] == [log["pages"][0]["id"]] * 2
+
+    path = str(tmp_path / "rolling.har")
+    for i in range(3):
+        append_har(
+            path, har_log(f"read {i}", i, i + 1, [_request(i, i + 1)]), max_pages=2
+        )
+
+    with open(path) as f:
+        log = json.load(f)["log"]
+
+    assert [p["title"] for p in log["pages"]] == ["read 1", "read 2"]
+    assert len(log["entries"]) == 2
@@ -0,0 +1,128 @@
+"""tilebench.header tests."""
+
+import numpy
+import pytest
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.transform import from_origin
+
+from tilebench.header import analyze_open, open_cost, tiff_layout
+from tilebench.server import serve
+
+PROFILE = {
+    "width": 2048,
+    "height": 2048,
+    "count": 1,
+    "dtype": "uint8",
+    "crs": "EPSG:3857",
+    "transform": from_origin(0, 1000000, 100, 100),
+    "compress": "deflate",
+}
+
+
+@pytest.fixture(scope="module")
+def header_dir(tmp_path_factory):
+    """COG with a large header and GeoTIFF with overviews after the data."""
+    path = tmp_path_factory.mktemp("header")
+    data = numpy.ones((1, 2048, 2048), dtype="uint8")
+
+    # ~50KB of metadata, parsed at open
+    with rasterio.open(
+        path / "large_header.tif", "w", driver="COG", blocksize=64, **PROFILE
+    ) as dst:
+        dst.update_tags(**{f"key{i}": "x" * 1000 for i in range(50)})
+        dst.write(data)
+
+    with rasterio.open(
+        path / "not_contiguous.tif",
+        "w",
+        driver="GTiff",
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        **PROFILE,
+    ) as dst:
+        dst.write(data)
+
+    with rasterio.open(path / "not_contiguous.tif", "r+") as dst:
+        dst.build_overviews([2, 4], Resampling.nearest)
+
+    return path
+
+
+def test_tiff_layout(data_dir, header_dir, cog_url):
+    """Locate IFDs."""
+    layout = tiff_layout(str(data_dir / "cog.tif"))
+    assert not layout["bigtiff"]
+    assert len(layout["ifds"]) == 3
+    assert layout["contiguous"]
+    assert layout["open_end"] <= layout["header_end"] <= layout["data_offset"]
+    assert layout["structural_metadata"]["LAYOUT"] == "IFDS_BEFORE_DATA"
+    assert tiff_layout(cog_url) == layout
+    assert tiff_layout(f"/vsicurl/{cog_url}") == layout
+
+    layout = tiff_layout(str(header_dir / "large_header.tif"))
+    assert layout["contiguous"]
+    assert 50000 < layout["open_end"] < layout["header_end"]
+
+    layout = tiff_layout(str(header_dir / "not_contiguous.tif"))
+    assert len(layout["ifds"]) == 3
+    assert not layout["contiguous"]
+    assert layout["ifds"][-1]["offset"] > layout["data_offset"]
+    assert layout["structural_metadata"] is None
+
+
+def test_tiff_layout_bigtiff(tmp_path):
+    """Locate IFDs of a BigTIFF."""
+    with rasterio.open(
+        tmp_path / "big.tif",
+        "w",
+        driver="COG",
+        blocksize=256,
+        BIGTIFF="YES",
+        **PROFILE,
+    ) as dst:
+        dst.write(numpy.ones((1, 2048, 2048), dtype="uint8"))
+
+    layout = tiff_layout(str(tmp_path / "big.tif"))
+    assert layout["bigtiff"]
+    assert len(layout["ifds"]) == 4
+    assert layout["contiguous"]
+
+
+def test_tiff_layout_invalid(tmp_path):
+    """Not a TIFF."""
+    (tmp_path / "file.bin").write_bytes(b"\x89PNG" + b"0" * 100)
+    with pytest.raises(ValueError):
+        tiff_layout(str(tmp_path / "file.bin"))
+
+
+def test_open_cost(cog_url):
+    """Profile the dataset open."""
+    stats = open_cost(cog_url)
+    assert stats["GET"]["count"] == 1
+    assert stats["GET"]["ranges"] == ["0-16383"]
+
+    stats = open_cost(cog_url, config={"GDAL_INGESTED_BYTES_AT_OPEN": "32768"})
+    assert stats["GET"]["ranges"] == ["0-32767"]
+
+
+def test_analyze_open(header_dir):
+    """Recommend and verify GDAL_INGESTED_BYTES_AT_OPEN."""
+    with serve(str(header_dir)) as url:
+        report = analyze_open(f"{url}/large_header.tif")
+        assert report["open"]["GET"]["count"] > 1
+        ingested = report["recommendation"]["GDAL_INGESTED_BYTES_AT_OPEN"]
+        assert ingested % 16384 == 0
+        assert ingested >= report["layout"]["open_end"]
+        assert report["verified"]["GET"]["count"] == 1
+        assert report["verified"]["GET"]["bytes"] == ingested
+
+        # GDAL virtual file system path
+        report = analyze_open(f"/vsicurl/{url}/large_header.tif")
+        assert report["recommendation"]["GDAL_INGESTED_BYTES_AT_OPEN"] == ingested
+        assert report["verified"]["GET"]["count"] == 1
+
+        report = analyze_open(f"{url}/not_contiguous.tif")
+        assert report["recommendation"] == {}
+        assert report["verified"] is None
@@ -0,0 +1,117 @@
+"""Tests for tilebench.manifest."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import morecantile
+import pytest
+
+from tilebench.manifest import (
+    Manifest,
+    merge_results,
+    parse_tile,
+    run_manifest,
+    tile_id,
+)
+from tilebench.session import Session
+from tilebench.variants import sample_tiles
+
+
+def test_tile_id():
+    """Tile identifiers round trip."""
+    tile = morecantile.Tile(1025, 974, 11)
+    assert tile_id(tile) == "11-1025-974"
+    assert parse_tile("11-1025-974") == tile
+
+
+def test_manifest(tmp_path):
+    """Split and serialize manifests."""
+    tiles = [morecantile.Tile(x, 0, 3) for x in range(7)]
+    manifest = Manifest("cog.tif", tiles=tiles, config={"GDAL_CACHEMAX": "10"})
+
+    shards = manifest.split(3)
+    assert [s.shard for s in shards] == [0, 1, 2]
+    assert all(s.shards == 3 for s in shards)
+    assert all(s.config == manifest.config for s in shards)
+    assert sorted(t for s in shards for t in s.tiles) == tiles
+    assert [len(s.tiles) for s in shards] == [3, 2, 2]
+
+    # More shards than tiles
+    assert [len(s.tiles) for s in manifest.split(10)].count(0) == 3
+
+    with pytest.raises(ValueError):
+        manifest.split(0)
+
+    with pytest.raises(ValueError):
+        shards[0].split(2)
+
+    path = str(tmp_path / "manifest.json")
+    manifest.to_json(path)
+    assert Manifest.from_json(path) == manifest
+    assert manifest.to_dict()["tiles"][1] == "3-1-0"
+
+    assert manifest.get_tms().id == "WebMercatorQuad"
+    assert manifest.get_reader().__name__ == "Reader"
+
+
+def test_run_manifest_shards(cog_url):
+    """Merged shards (profiled in other processes) match the whole manifest."""
+    tiles = sample_tiles(cog_url, zooms=[9, 10], count=None)
+    manifest = Manifest(cog_url, tiles=tiles)
+
+    # Fresh processes, not to reuse the GDAL cache of `sample_tiles`
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        full = executor.submit(run_manifest, manifest).result()
+
+    assert full["tiles"] == len(tiles)
+
+    with ProcessPoolExecutor(max_workers=3, mp_context=ctx) as executor:
+        results = list(executor.map(run_manifest, manifest.split(3)))
+
+    merged = merge_results(results)
+    assert merged["dataset"] == cog_url
+    assert merged["shards"] == 3
+    assert merged["tiles"] == len(tiles)
+
+    for label, group in full["session"]["groups"].items():
+        merged_group = merged["session"]["groups"][label]
+        for key in ["count", "HEAD", "GET", "bytes", "GETs", "Bytes"]:
+            assert merged_group[key] == group[key]
+
+        assert merged_group["Timing"]["count"] == group["Timing"]["count"]
+
+    summary = Session.from_dict(full["session"]).summary()
+    assert set(merged["summary"]) == {"9", "10"}
+    for label in summary:
+        assert merged["summary"][label]["GET"] == summary[label]["GET"]
+        assert merged["summary"][label]["bytes"] == summary[label]["bytes"]
+
+
+def test_merge_results():
+    """Check shards before merging."""
+    result = {
+        "dataset": "cog.tif",
+        "shard": 0,
+        "shards": 2,
+        "tiles": 0,
+        "session": {"relative_accuracy": 0.01, "groups": {}},
+    }
+
+    with pytest.raises(ValueError):
+        merge_results([])
+
+    with pytest.raises(ValueError):
+        merge_results([result, result])
+
+    with pytest.raises(ValueError):
+        merge_results([result, {**result, "shard": 1, "dataset": "other.tif"}])
+
+    with pytest.raises(ValueError):
+        merge_results([result, {**result, "shard": 1, "shards": 3}])
+
+    with pytest.warns(UserWarning, match="Missing shards"):
+        merged = merge_results([result])
+
+    assert merged["tiles"] == 0
+    assert merged["summary"] == {}
@@ -0,0 +1,55 @@
+"""tilebench.methods tests."""
+
+import morecantile
+import pytest
+from rio_tiler.io import Reader
+from rio_tiler.models import ImageData, PointData
+
+from tilebench.methods import needs_tile, read
+
+TILE = morecantile.Tile(1025, 974, 11)
+
+
+def test_needs_tile():
+    """Check when a tile is needed."""
+    assert needs_tile("tile")
+    assert needs_tile("tile", {"indexes": 1})
+    assert needs_tile("part")
+    assert not needs_tile("part", {"bbox": [0, 0, 1, 1]})
+    assert needs_tile("point", {"lon": 0})
+    assert not needs_tile("point", {"lon": 0, "lat": 0})
+    assert not needs_tile("preview")
+    assert not needs_tile("statistics")
+
+
+@pytest.mark.parametrize(
+    "method,params,output",
+    [
+        ("tile", {}, ImageData),
+        ("part", {}, ImageData),
+        ("part", {"bbox": [0.5, 8.5, 0.6, 8.6], "max_size": 64}, ImageData),
+        ("preview", {"max_size": 128}, ImageData),
+        ("point", {}, PointData),
+        ("point", {"lon": 0.5, "lat": 8.5}, PointData),
+        ("feature", {}, ImageData),
+        ("statistics", {"max_size": 128}, dict),
+    ],
+)
+def test_read(data_dir, method, params, output):
+    """Call reader methods."""
+    with Reader(str(data_dir / "cog.tif")) as src_dst:
+        assert isinstance(read(src_dst, method, tile=TILE, **params), output)
+
+
+def test_read_tile_derived(data_dir):
+    """Derive arguments from the tile."""
+    with Reader(str(data_dir / "cog.tif")) as src_dst:
+        img = read(src_dst, "part", tile=TILE, tilesize=128)
+        assert max(img.width, img.height) == 128
+        assert img.bounds == pytest.approx(tuple(src_dst.tms.bounds(TILE)))
+
+        with pytest.raises(ValueError):
+            read(src_dst, "part")
+
+        with pytest.raises(ValueError):
+            read(src_dst, "something")
@@ -1,11 +1,19 @@
 """Tests for tilebench."""
 
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
 import rasterio
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from rio_tiler.io import Reader
 from starlette.testclient import TestClient
 from vsifile.rasterio import opener
 
+from tilebench.har import append_har
 from tilebench.middleware import NoCacheMiddleware, VSIStatsMiddleware
 
 COG_PATH = "https://noaa-eri-pds.s3.amazonaws.com/2022_Hurricane_Ian/20221002a_RGB/20221002aC0795145w325100n.tif"
@@ -59,6 +67,29 @@ def test_middleware():
         assert "VSI-Stats" not in response.headers
 
 
+def test_middleware_fsspec(zarr_url):
+    """Capture the fsspec requests of an Xarray reader."""
+    from tilebench.readers import XarrayReader
+
+    app = FastAPI()
+    app.add_middleware(VSIStatsMiddleware, io="fsspec")
+
+    @app.get("/tile")
+    def tile():
+        """Read tile."""
+        with XarrayReader(zarr_url, variable="band") as src:
+            src.tile(9, 6, 4)
+            return "I got tile"
+
+    with TestClient(app) as client:
+        response = client.get("/tile")
+        assert response.status_code == 200
+        stats = response.headers["VSI-Stats"]
+        assert "head;count=0" in stats
+        assert "get;count=" in stats
+        assert "get;count=0" not in stats
+
+
 def test_middleware_vsifile():
     """Simple test."""
     app = FastAPI()
@@ -109,3 +140,342 @@ def test_middleware_vsifile():
         assert response.status_code == 200
         assert response.headers["content-type"] == "application/json"
         assert "VSI-Stats" not in response.headers
+
+
+def test_middleware_connections(flaky_server):
+    """Add connection diagnostics to the VSI-Stats header."""
+    url = f"{flaky_server}/redirect/cog.tif"
+    app = FastAPI()
+    app.add_middleware(
+        VSIStatsMiddleware,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{url}",
+        },
+        connections=True,
+    )
+
+    @app.get("/info")
+    async def info():
+        with Reader(url) as cog:
+            return cog.info().model_dump(exclude_none=True)
+
+    with TestClient(app) as client:
+        stats = client.get("/info").headers["VSI-Stats"]
+        conn = dict(item.split("=") for item in stats.split(", conn;")[1].split(";"))
+        assert list(conn) == [
+            "new",
+            "reused",
+            "tls",
+            "redirects",
+            "retries",
+            "backoff",
+            "4xx",
+            "5xx",
+        ]
+        assert int(conn["redirects"]) >= 1
+        assert int(conn["5xx"]) == 0
+
+
+def test_middleware_metrics(cog_url):
+    """Expose Prometheus metrics per route template."""
+    app = FastAPI()
+    app.add_middleware(
+        VSIStatsMiddleware,
+        config={"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"},
+        metrics=True,
+    )
+
+    @app.get("/tiles/{z}/{x}/{y}")
+    def tile(z: int, x: int, y: int):
+        """Read tile."""
+        with Reader(cog_url) as cog:
+            cog.tile(x, y, z)
+            return "I got tile"
+
+    with TestClient(app) as client:
+        for x, y in [(1025, 974), (1026, 974)]:
+            response = client.get(f"/tiles/11/{x}/{y}")
+            assert response.status_code == 200
+            assert response.headers["VSI-Stats"]
+
+        response = client.get("/missing")
+        assert response.status_code == 404
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "VSI-Stats" not in response.headers
+        metrics = response.text
+        assert 'tilebench_get_requests_count{route="/tiles/{z}/{x}/{y}"} 2.0' in metrics
+        assert 'tilebench_get_bytes_sum{route="/tiles/{z}/{x}/{y}"}' in metrics
+        assert 'tilebench_head_requests_count{route="/tiles/{z}/{x}/{y}"} 2.0' in metrics
+        assert (
+            'tilebench_request_duration_seconds_bucket{le="+Inf",route="/tiles/{z}/{x}/{y}"} 2.0'
+            in metrics
+        )
+        assert 'route="__unmatched__"' in metrics
+        assert "/tiles/11/" not in metrics
+
+    # Metrics endpoint is only available when enabled
+    app = FastAPI()
+    app.add_middleware(VSIStatsMiddleware)
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+        assert response.status_code == 404
+
+
+def test_middleware_sampling():
+    """Only capture sampled requests."""
+
+    def _app(**kwargs):
+        app = FastAPI()
+        app.add_middleware(VSIStatsMiddleware, **kwargs)
+
+        @app.get("/tiles")
+        def tiles():
+            return "tiles"
+
+        @app.get("/info")
+        def info():
+            return "info"
+
+        return app
+
+    with TestClient(_app(sample_rate=0)) as client:
+        assert "VSI-Stats" not in client.get("/tiles").headers
+        response = client.get("/tiles", headers={"X-VSI-Stats": "1"})
+        assert "VSI-Stats" in response.headers
+
+    with TestClient(_app(sample_rate=0, force_header=None)) as client:
+        response = client.get("/tiles", headers={"X-VSI-Stats": "1"})
+        assert "VSI-Stats" not in response.headers
+
+    with TestClient(_app(sample_every=3)) as client:
+        sampled = ["VSI-Stats" in client.get("/tiles").headers for _ in range(6)]
+        assert sampled == [False, False, True, False, False, True]
+
+    with TestClient(_app(sample_rate=0, route_sample_rates={"/tiles": 1})) as client:
+        assert "VSI-Stats" in client.get("/tiles").headers
+        assert "VSI-Stats" not in client.get("/info").headers
+
+    with TestClient(_app(sample_rate=0.5)) as client:
+        sampled = ["VSI-Stats" in client.get("/tiles").headers for _ in range(200)]
+        assert 0 < sum(sampled) < 200
+
+
+def test_middleware_sampling_config():
+    """GDAL config is applied to the requests that are not sampled."""
+    app = FastAPI()
+    app.add_middleware(VSIStatsMiddleware, config={"A_OPT": "1"}, sample_rate=0)
+
+    @app.get("/config")
+    async def config():
+        return rasterio.env.getenv().get("A_OPT")
+
+    with TestClient(app) as client:
+        response = client.get("/config")
+        assert "VSI-Stats" not in response.headers
+        assert response.json() == "1"
+
+        response = client.get("/config", headers={"X-VSI-Stats": "1"})
+        assert "VSI-Stats" in response.headers
+        assert response.json() == "1"
+
+
+@pytest.mark.asyncio
+async def test_middleware_streaming_trailers(cog_url):
+    """Send stats as HTTP trailers for streaming responses."""
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        """Read data while streaming the response."""
+
+        async def _body():
+            yield b"start"
+            with Reader(cog_url) as cog:
+                cog.tile(1025, 975, 11)
+            yield b"end"
+
+        return StreamingResponse(_body())
+
+    middleware = VSIStatsMiddleware(
+        app,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        trailers=True,
+    )
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "extensions": {"http.response.trailers": {}},
+    }
+
+    received = []
+
+    async def receive():
+        if received:  # wait for disconnect
+            await asyncio.Event().wait()
+
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+
+    start = messages[0]
+    assert start["type"] == "http.response.start"
+    assert start["trailers"]
+    headers = dict(start["headers"])
+    # No IO happened before the response started
+    assert headers[b"vsi-stats"].startswith(b"head;count=0, get;count=0")
+    assert headers[b"trailer"] == b"VSI-Stats"
+
+    trailers = messages[-1]
+    assert trailers["type"] == "http.response.trailers"
+    stats = dict(trailers["headers"])[b"vsi-stats"].decode()
+    assert "head;count=0" not in stats
+    assert "get;count=0" not in stats
+
+    # Trailers are not sent when the server does not support them
+    scope.pop("extensions")
+    messages.clear()
+    received.clear()
+    await middleware(scope, receive, send)
+    assert "trailers" not in messages[0]
+    assert b"trailer" not in dict(messages[0]["headers"])
+    assert messages[-1]["type"] == "http.response.body"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sample_rate", [1.0, 0.0])
+async def test_middleware_concurrent(cog_url, sample_rate):
+    """Overlapping requests succeed and only get their own stats."""
+    app = FastAPI()
+    app.add_middleware(
+        VSIStatsMiddleware,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        sample_rate=sample_rate,
+    )
+
+    @app.get("/info")
+    async def info():
+        """Read the header and wait (starts and ends first)."""
+        with Reader(cog_url) as cog:
+            cog.info()
+        await asyncio.sleep(0.1)
+        return "info"
+
+    @app.get("/tile")
+    async def tile():
+        """Read a tile while /info is in flight and wait (ends last)."""
+        await asyncio.sleep(0.05)
+        with Reader(cog_url) as cog:
+            cog.tile(1025, 974, 11)
+        await asyncio.sleep(0.3)
+        return "tile"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Stats of each request alone
+        alone = [await client.get(path) for path in ["/info", "/tile"]]
+        responses = await asyncio.gather(client.get("/info"), client.get("/tile"))
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert [r.json() for r in responses] == ["info", "tile"]
+    if sample_rate:
+        assert [r.headers["VSI-Stats"] for r in responses] == [
+            r.headers["VSI-Stats"] for r in alone
+        ]
+        assert alone[0].headers["VSI-Stats"] != alone[1].headers["VSI-Stats"]
+    else:
+        assert all("VSI-Stats" not in r.headers for r in responses)
+
+
+def test_middleware_har(cog_url, tmp_path):
+    """Write HAR files."""
+    app = FastAPI()
+    app.add_middleware(
+        VSIStatsMiddleware,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        har_dir=str(tmp_path / "hars"),
+        har_file=str(tmp_path / "rolling.har"),
+        har_max_pages=2,
+    )
+
+    @app.get("/tiles/{z}/{x}/{y}")
+    async def tile(z: int, x: int, y: int):
+        """Read tile."""
+        with Reader(cog_url) as cog:
+            cog.tile(x, y, z)
+            return "I got tile"
+
+    with TestClient(app) as client:
+        for x, y in [(1025, 974), (1026, 974), (1025, 975)]:
+            response = client.get(f"/tiles/11/{x}/{y}")
+            assert response.status_code == 200
+
+    hars = sorted((tmp_path / "hars").iterdir())
+    assert len(hars) == 3
+    har = json.loads(hars[0].read_text())["log"]
+    assert har["pages"][0]["title"] == "GET /tiles/11/1025/974"
+    assert har["entries"]
+    assert {e["request"]["url"] for e in har["entries"]} == {cog_url}
+
+    rolling = json.loads((tmp_path / "rolling.har").read_text())["log"]
+    assert [p["title"] for p in rolling["pages"]] == [
+        "GET /tiles/11/1026/974",
+        "GET /tiles/11/1025/975",
+    ]
+    pages = {p["id"] for p in rolling["pages"]}
+    assert rolling["entries"]
+    assert all(e["pageref"] in pages for e in rolling["entries"])
+
+
+def test_middleware_har_thread(cog_url, tmp_path, monkeypatch):
+    """HAR files are written outside of the event loop thread."""
+    threads = {}
+
+    def _append_har(*args, **kwargs):
+        threads["har"] = threading.get_ident()
+        return append_har(*args, **kwargs)
+
+    monkeypatch.setattr("tilebench.har.append_har", _append_har)
+
+    app = FastAPI()
+    app.add_middleware(VSIStatsMiddleware, har_file=str(tmp_path / "rolling.har"))
+
+    @app.get("/info")
+    async def info():
+        threads["loop"] = threading.get_ident()
+        with Reader(cog_url) as cog:
+            return cog.info().model_dump(exclude_none=True)
+
+    with TestClient(app) as client:
+        assert client.get("/info").status_code == 200
+
+    assert threads["har"] != threads["loop"]
+    assert json.loads((tmp_path / "rolling.har").read_text())["log"]["pages"]
@@ -0,0 +1,124 @@
+"""tilebench.overviews tests."""
+
+import morecantile
+import numpy
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from tilebench.overviews import (
+    ifd_levels,
+    overview_coverage,
+    reader_levels,
+    select_level,
+)
+
+
+@pytest.fixture
+def no_overviews(tmp_path):
+    """Tiled GeoTIFF (4096x4096) without overviews."""
+    path = tmp_path / "no_overviews.tif"
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=4096,
+        height=4096,
+        count=1,
+        dtype="uint8",
+        crs="EPSG:3857",
+        transform=from_origin(0, 1000000, 100, 100),
+        tiled=True,
+        blockxsize=512,
+        blockysize=512,
+        compress="deflate",
+    ) as dst:
+        dst.write(numpy.ones((1, 4096, 4096), dtype="uint8"))
+
+    return str(path)
+
+
+def test_ifd_levels(data_dir):
+    """Get IFD info."""
+    ifd = ifd_levels(str(data_dir / "cog.tif"))
+    assert [level["Level"] for level in ifd] == [0, 1, 2]
+    assert [level["Decimation"] for level in ifd] == [0, 2, 4]
+    assert [level["MercatorZoom"] for level in ifd] == [11, 10, 9]
+    assert ifd[0]["MercatorResolution"] == pytest.approx(100)
+    assert ifd[2]["MercatorResolution"] == pytest.approx(400)
+
+    ifd = ifd_levels(str(data_dir / "cog.tif"), morecantile.tms.get("WGS1984Quad"))
+    assert ifd[0]["MercatorZoom"] != 11
+
+
+def test_reader_levels(data_dir, zarr_url):
+    """Get the IFDs of a reader."""
+    from rio_tiler.io import Reader
+
+    from tilebench.readers import XarrayReader
+
+    path = str(data_dir / "cog.tif")
+    with Reader(path) as src:
+        assert reader_levels(path, src) == ifd_levels(path)
+
+    with XarrayReader(zarr_url, variable="band") as src:
+        ifd = reader_levels(zarr_url, src)
+        assert len(ifd) == 1
+        assert ifd[0]["Blocksize"] == (src.height, src.width)
+        assert ifd[0]["MercatorZoom"] == src.maxzoom
+
+
+def test_select_level(data_dir):
+    """Select the IFD for an output resolution."""
+    ifd = ifd_levels(str(data_dir / "cog.tif"))
+    assert select_level(ifd, 50)["Level"] == 0
+    assert select_level(ifd, 150)["Level"] == 0
+    assert select_level(ifd, 200)["Level"] == 1
+    assert select_level(ifd, 399)["Level"] == 1
+    assert select_level(ifd, 1000)["Level"] == 2
+    assert select_level(ifd, 350, threshold=1.2)["Level"] == 2
+
+
+def test_overview_coverage(data_dir):
+    """Overviews cover all the zooms."""
+    report = overview_coverage(str(data_dir / "cog.tif"))
+    assert report["minzoom"] == 8
+    assert report["maxzoom"] == 11
+    assert [z["zoom"] for z in report["zooms"]] == [8, 9, 10, 11]
+    assert [z["level"] for z in report["zooms"]] == [2, 1, 0, 0]
+    assert all(z["amplification"] <= 4 for z in report["zooms"])
+    assert not any(z["full_resolution"] for z in report["zooms"])
+    assert report["add"] == []
+    assert report["remove"] == []
+    assert report["recommended"] == [2, 4]
+
+    # Overview 4 is not used
+    report = overview_coverage(str(data_dir / "cog.tif"), minzoom=9)
+    assert report["remove"] == [4]
+    assert report["recommended"] == [2]
+
+    # 512px tiles need finer IFDs
+    report = overview_coverage(str(data_dir / "cog.tif"), tilesize=512)
+    assert [z["level"] for z in report["zooms"]] == [1, 0, 0, 0]
+
+
+def test_overview_coverage_missing(no_overviews):
+    """Zooms read from the full resolution."""
+    report = overview_coverage(no_overviews)
+    assert report["minzoom"] == 6
+    assert report["maxzoom"] == 11
+    assert all(z["level"] == 0 for z in report["zooms"])
+    assert [z["full_resolution"] for z in report["zooms"]] == [
+        True,
+        True,
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert report["zooms"][0]["amplification"] > 100
+    assert report["add"] == [2, 4, 8, 16]
+    assert report["recommended"] == [2, 4, 8, 16]
+
+    report = overview_coverage(no_overviews, max_amplification=16)
+    assert report["add"] == [4, 8, 16]
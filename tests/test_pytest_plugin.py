@@ -0,0 +1,92 @@
+"""Tests for tilebench.pytest_plugin."""
+
+import json
+
+import pytest
+
+pytest_plugins = ["pytester"]
+
+TEST_MODULE = """
+from rio_tiler.io import Reader
+
+CONFIG = {{
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "CPL_VSIL_CURL_NON_CACHED": "/vsicurl/{url}",
+}}
+
+
+def _read():
+    with Reader("{url}") as src:
+        src.point(0.46, 8.5)
+
+
+def test_read(tilebench_budget):
+    with tilebench_budget(max_head=10, max_get=10, config=CONFIG) as stats:
+        _read()
+
+    assert stats["GET"]["count"] > 0
+"""
+
+
+@pytest.fixture
+def pytester(pytester, monkeypatch):
+    """pytester with the tilebench plugin only (as if it was installed)."""
+    monkeypatch.setenv("PYTEST_DISABLE_PLUGIN_AUTOLOAD", "1")
+    return pytester
+
+
+def test_budget(pytester, cog_url):
+    """Fail when over budget."""
+    pytester.makepyfile(
+        TEST_MODULE.format(url=cog_url)
+        + """
+
+def test_over_budget(tilebench_budget):
+    with tilebench_budget(name="read", max_get=0, snapshot=False, config=CONFIG):
+        _read()
+"""
+    )
+    result = pytester.runpytest("-p", "tilebench.pytest_plugin", "-k", "over_budget")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_over_budget::read over budget:",
+            "GET: * > 0 (budget)",
+            "*tilebench budgets*",
+            "test *HEAD*GET*bytes*time*status",
+            "*test_over_budget::read * FAIL",
+        ]
+    )
+
+
+def test_snapshot(pytester, cog_url):
+    """Compare to the snapshot, updated with --tilebench-update."""
+    pytester.makepyfile(TEST_MODULE.format(url=cog_url))
+    snapshot = pytester.path / "tilebench_snapshot.json"
+
+    result = pytester.runpytest("-p", "tilebench.pytest_plugin")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*no snapshot for*--tilebench-update*"])
+    assert not snapshot.exists()
+
+    result = pytester.runpytest("-p", "tilebench.pytest_plugin", "--tilebench-update")
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(["*test_read * ok", "snapshot updated: *"])
+    baseline = json.loads(snapshot.read_text())
+    assert list(baseline) == ["test_snapshot.py::test_read"]
+    assert baseline["test_snapshot.py::test_read"]["GET"] > 0
+
+    result = pytester.runpytest("-p", "tilebench.pytest_plugin")
+    result.assert_outcomes(passed=1)
+
+    # A regression (fewer GET in the baseline)
+    baseline["test_snapshot.py::test_read"]["GET"] -= 1
+    snapshot.write_text(json.dumps(baseline))
+    result = pytester.runpytest("-p", "tilebench.pytest_plugin")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["GET: * > * (snapshot)"])
+
+    # ... within the tolerance
+    pytester.makeini("[pytest]\ntilebench_tolerance = 1.0\n")
+    result = pytester.runpytest("-p", "tilebench.pytest_plugin")
+    result.assert_outcomes(passed=1)
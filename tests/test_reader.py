@@ -1,9 +1,15 @@
 """Tests for tilebench."""
 
+import asyncio
+import inspect
+import json
+
+import pytest
 import rasterio
 from rio_tiler.io import Reader
 from vsifile.rasterio import opener
 
+from tilebench import capture
 from tilebench import profile as profiler
 
 COG_PATH = "https://noaa-eri-pds.s3.amazonaws.com/2022_Hurricane_Ian/20221002a_RGB/20221002aC0795145w325100n.tif"
@@ -68,3 +74,349 @@ def test_vsifile():
     assert stats.get("GET")
     assert stats.get("Timing")
     assert "WarpKernels" in stats
+
+
+@pytest.mark.asyncio
+async def test_async(cog_url):
+    """Profile coroutine functions."""
+
+    @profiler(
+        add_to_return=True,
+        quiet=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+    )
+    async def _read_tile(src_path: str, x: int, y: int, z: int):
+        def _read():
+            with Reader(src_path) as cog:
+                return cog.tile(x, y, z)
+
+        return await asyncio.to_thread(_read)
+
+    assert inspect.iscoroutinefunction(_read_tile)
+    img, ref = await _read_tile(f"{cog_url}?task=0", 1025, 974, 11)
+    assert img.data.shape == (3, 256, 256)
+    assert ref["HEAD"]["count"]
+    assert ref["GET"]["count"]
+    assert ref["Timing"]
+
+    # Concurrent tasks only report their own requests
+    results = await asyncio.gather(
+        _read_tile(f"{cog_url}?task=1", 1025, 974, 11),
+        _read_tile(f"{cog_url}?task=2", 1025, 974, 11),
+    )
+    for _, stats in results:
+        assert stats["HEAD"] == ref["HEAD"]
+        assert stats["GET"]["count"] == ref["GET"]["count"]
+
+
+def test_repeat(cog_url):
+    """Repeat the profiled function."""
+    calls = []
+
+    @profiler(
+        add_to_return=True,
+        quiet=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        repeat=5,
+        warmup=2,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        calls.append(1)
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    img, stats = _read_tile(cog_url, 1025, 974, 11)
+    assert img.data.shape == (3, 256, 256)
+    assert len(calls) == 7
+    assert stats["CPU"] > 0
+
+    repeat = stats["Repeat"]
+    assert repeat["runs"] == 5
+    assert repeat["warmup"] == 2
+    assert len(repeat["samples"]) == 5
+    assert repeat["samples"][-1]["wall"] == stats["Timing"]
+    assert repeat["wall"]["min"] <= repeat["wall"]["median"] <= repeat["wall"]["p99"]
+    assert repeat["cpu"]["stddev"] >= 0
+    assert repeat["io_mismatch"] == []
+
+    # Cached data is reused by the next runs
+    @profiler(add_to_return=True, quiet=True, repeat=3)
+    def _read_cached(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    _, stats = _read_cached(f"{cog_url}?cache=1", 1025, 974, 11)
+    assert stats["Repeat"]["samples"][0]["GET"] > stats["Repeat"]["samples"][1]["GET"]
+    assert stats["Repeat"]["io_mismatch"] == [0]
+
+    # No Repeat summary for single runs
+    @profiler(add_to_return=True, quiet=True)
+    def _read_once(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    _, stats = _read_once(cog_url, 1025, 974, 11)
+    assert list(stats) == ["HEAD", "GET", "Timing"]
+
+    with pytest.raises(ValueError):
+        profiler(repeat=0)
+
+    with pytest.raises(ValueError):
+        profiler(warmup=-1)
+
+
+@pytest.mark.asyncio
+async def test_repeat_async(cog_url):
+    """Repeat coroutine functions."""
+
+    @profiler(add_to_return=True, quiet=True, repeat=3, warmup=1)
+    async def _read_tile(src_path: str, x: int, y: int, z: int):
+        def _read():
+            with Reader(src_path) as cog:
+                return cog.tile(x, y, z)
+
+        return await asyncio.to_thread(_read)
+
+    _, stats = await _read_tile(cog_url, 1025, 974, 11)
+    assert stats["Repeat"]["runs"] == 3
+    assert stats["Repeat"]["warmup"] == 1
+
+
+def test_capture(cog_url):
+    """Capture stats with a context manager."""
+    with capture(
+        kernels=True,
+        cprofile=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+    ) as stats:
+        with Reader(cog_url) as cog:
+            img = cog.tile(1025, 974, 11)
+
+    assert img.data.shape == (3, 256, 256)
+    assert stats["HEAD"]["count"]
+    assert stats["GET"]["count"]
+    assert "WarpKernels" in stats
+    assert stats["cprofile"]
+
+    with pytest.raises(ValueError):
+        with capture(io="unknown"):
+            pass
+
+
+def test_capture_nested_config():
+    """Nested captures apply their own config."""
+    with capture(config={"A_OPT": "1"}):
+        assert rasterio.env.getenv()["A_OPT"] == "1"
+
+        with capture(config={"GDAL_INGESTED_BYTES_AT_OPEN": "32768"}):
+            options = rasterio.env.getenv()
+            assert options["A_OPT"] == "1"
+            assert options["GDAL_INGESTED_BYTES_AT_OPEN"] == "32768"
+
+        options = rasterio.env.getenv()
+        assert options["A_OPT"] == "1"
+        assert "GDAL_INGESTED_BYTES_AT_OPEN" not in options
+
+    assert not rasterio.env.hasenv()
+
+
+@pytest.mark.asyncio
+async def test_capture_concurrent_config():
+    """Interleaved captures apply their config to the shared environment."""
+    started = asyncio.Event()
+
+    async def _first():
+        with capture(config={"A_OPT": "1"}):
+            started.set()
+            await asyncio.sleep(0.05)
+            return dict(rasterio.env.getenv())
+
+    async def _second():
+        await started.wait()
+        with capture(config={"B_OPT": "2"}):
+            return dict(rasterio.env.getenv())
+
+    first, second = await asyncio.gather(_first(), _second())
+    assert first["A_OPT"] == "1"
+    assert second["A_OPT"] == "1"
+    assert second["B_OPT"] == "2"
+    assert not rasterio.env.hasenv()
+
+
+@pytest.mark.asyncio
+async def test_capture_concurrent_cprofile():
+    """Only one capture profiles a thread at once."""
+    started = asyncio.Event()
+
+    async def _first():
+        with capture(cprofile=True) as stats:
+            started.set()
+            await asyncio.sleep(0.05)
+            sum(range(100000))
+        return stats
+
+    async def _second():
+        await started.wait()
+        with pytest.warns(UserWarning, match="cProfile is skipped"):
+            with capture(cprofile=True) as stats:
+                sum(range(100000))
+        return stats
+
+    first, second = await asyncio.gather(_first(), _second())
+    assert first["cprofile"]
+    assert "cprofile" not in second
+
+    # The thread can be profiled again
+    with capture(cprofile=True) as stats:
+        sum(range(100000))
+    assert stats["cprofile"]
+
+
+def test_timeline(cog_url):
+    """Add requests timeline."""
+
+    @profiler(
+        add_to_return=True,
+        quiet=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        timeline=True,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    _, stats = _read_tile(cog_url, 1025, 974, 11)
+    assert list(stats) == ["HEAD", "GET", "Timing", "Timeline"]
+
+    timeline = stats["Timeline"]
+    assert len(timeline["requests"]) == stats["HEAD"]["count"] + stats["GET"]["count"]
+    for req in timeline["requests"]:
+        assert req["url"] == cog_url
+        assert 0 <= req["start"] <= stats["Timing"]
+        assert req["duration"] >= 0
+
+    gets = [req for req in timeline["requests"] if req["method"] == "GET"]
+    assert [req["range"] for req in gets] == stats["GET"]["ranges"]
+    assert sum(req["bytes"] for req in gets) == stats["GET"]["bytes"]
+    assert timeline["max_concurrency"] >= 1
+    assert timeline["critical_path"] <= timeline["serialized_wait"] + 1e-6
+
+
+def test_trace_file(cog_url, tmp_path):
+    """Write Chrome trace file."""
+    trace_file = str(tmp_path / "trace.json")
+
+    @profiler(
+        add_to_return=True,
+        quiet=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        trace_file=trace_file,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    _, stats = _read_tile(cog_url, 1025, 974, 11)
+    assert list(stats) == ["HEAD", "GET", "Timing"]
+
+    with open(trace_file) as f:
+        trace = json.load(f)
+
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert events[0]["name"] == "test_trace_file.<locals>._read_tile"
+    http = [e for e in events if e["cat"] == "http"]
+    assert len(http) == stats["HEAD"]["count"] + stats["GET"]["count"]
+    phases = [e["name"] for e in events if e["cat"] == "phase"]
+    assert phases[0].startswith("open /vsicurl/")
+    assert any(e["cat"] == "python" for e in events)
+
+
+@pytest.mark.parametrize("io", ["rasterio", "vsifile"])
+def test_har_file(cog_url, tmp_path, io):
+    """Write HAR file."""
+    har_file = str(tmp_path / "tile.har")
+
+    @profiler(
+        add_to_return=True,
+        quiet=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        io=io,
+        har_file=har_file,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        opener_options = {"opener": opener} if io == "vsifile" else {}
+        with rasterio.open(src_path, **opener_options) as src_dst:
+            with Reader(None, dataset=src_dst) as cog:
+                return cog.tile(x, y, z)
+
+    _, stats = _read_tile(cog_url, 1025, 974, 11)
+
+    with open(har_file) as f:
+        log = json.load(f)["log"]
+
+    entries = log["entries"]
+    assert len(entries) == stats["HEAD"]["count"] + stats["GET"]["count"]
+    assert all(e["request"]["url"] == cog_url for e in entries)
+    gets = [e for e in entries if e["request"]["method"] == "GET"]
+    assert sum(e["response"]["bodySize"] for e in gets) == stats["GET"]["bytes"]
+    if io == "rasterio":
+        assert {e["response"]["status"] for e in gets} == {206}
+        assert all(e["response"]["httpVersion"].startswith("HTTP/") for e in gets)
+
+
+def test_capture_connections(flaky_server):
+    """Capture connection diagnostics."""
+    config = {
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+        "GDAL_HTTP_MAX_RETRY": "2",
+        "GDAL_HTTP_RETRY_DELAY": "0.1",
+    }
+
+    url = f"{flaky_server}/redirect/cog.tif"
+    with capture(
+        connections=True,
+        config={**config, "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{url}"},
+    ) as stats:
+        with Reader(url) as cog:
+            cog.tile(1025, 974, 11)
+
+    conn = stats["Connections"]
+    assert conn["redirects"] >= 1
+    assert conn["new"] + conn["reused"] == stats["HEAD"]["count"] + stats["GET"]["count"]
+    assert conn["tls_handshakes"] == 0
+    assert conn["retries"]["count"] == 0
+    assert conn["errors"] == {"4xx": 0, "5xx": 0}
+
+    url = f"{flaky_server}/flaky/cog.tif"
+    with capture(
+        connections=True,
+        config={**config, "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{url}"},
+    ) as stats:
+        with Reader(url) as cog:
+            cog.tile(1025, 974, 11)
+
+    conn = stats["Connections"]
+    assert conn["retries"]["count"] >= 1
+    assert conn["retries"]["backoff"] == pytest.approx(0.1 * conn["retries"]["count"])
+    assert conn["errors"]["5xx"] >= conn["retries"]["count"]
+    assert conn["errors"]["4xx"] == 0
+    # Connections are closed after an error, retries open new ones
+    assert conn["new"] > 1
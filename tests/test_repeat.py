@@ -0,0 +1,61 @@
+"""Tests for tilebench.repeat."""
+
+import numpy
+import pytest
+
+from tilebench.repeat import describe, outliers, percentile, summarize_runs
+
+
+def test_percentile():
+    """Same as numpy (linear interpolation)."""
+    values = numpy.random.default_rng(0).lognormal(0, 1, 101)
+    for q in [0, 50, 95, 99, 100]:
+        assert percentile(values, q) == pytest.approx(numpy.percentile(values, q))
+
+    assert percentile([3], 99) == 3
+
+
+def test_describe():
+    """Summary statistics."""
+    stats = describe([1.0, 2.0, 3.0, 4.0])
+    assert stats["min"] == 1.0
+    assert stats["median"] == 2.5
+    assert stats["mean"] == 2.5
+    assert stats["stddev"] == pytest.approx(numpy.std([1, 2, 3, 4], ddof=1))
+
+    assert describe([1.0])["stddev"] == 0.0
+
+
+def test_outliers():
+    """Values outside of Tukey's fences."""
+    assert outliers([1.0, 1.1, 0.9, 1.0, 1.05, 3.0]) == [5]
+    assert outliers([1.0, 1.1, 1.0, 1.05, 1.0]) == []
+    # Not enough values
+    assert outliers([1.0, 1.0, 10.0]) == []
+
+
+def test_summarize_runs():
+    """Time statistics and IO mismatch."""
+    runs = [
+        {
+            "HEAD": {"count": 1},
+            "GET": {"count": get, "bytes": get * 100},
+            "Timing": wall,
+            "CPU": wall / 2,
+        }
+        for get, wall in [(2, 0.1), (2, 0.11), (3, 0.12), (2, 0.1), (2, 0.5)]
+    ]
+    summary = summarize_runs(runs, warmup=1)
+    assert summary["runs"] == 5
+    assert summary["warmup"] == 1
+    assert summary["wall"]["min"] == 0.1
+    assert summary["cpu"]["median"] == 0.055
+    assert summary["samples"][2] == {
+        "wall": 0.12,
+        "cpu": 0.06,
+        "HEAD": 1,
+        "GET": 3,
+        "bytes": 300,
+    }
+    assert summary["io_mismatch"] == [2]
+    assert summary["outliers"] == [4]
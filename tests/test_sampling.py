@@ -0,0 +1,144 @@
+"""tilebench.sampling tests."""
+
+import morecantile
+import pytest
+import rasterio
+
+from tilebench.overviews import ifd_levels
+from tilebench.sampling import (
+    _block_span,
+    _next_stratum,
+    sample_zooms,
+    stratified_estimate,
+    tile_stratum,
+)
+
+TMS = morecantile.tms.get("WebMercatorQuad")
+
+
+def test_block_span():
+    """Count the blocks intersecting a pixel range."""
+    assert _block_span(0, 256, 256, 1024) == 1
+    assert _block_span(0, 256.0000001, 256, 1024) == 1
+    assert _block_span(10, 300, 256, 1024) == 2
+    assert _block_span(-100, 2000, 256, 1024) == 4
+    assert _block_span(2000, 2100, 256, 1024) == 1
+
+
+def test_tile_stratum(data_dir):
+    """Tiles position relative to the block grid."""
+    path = str(data_dir / "cog.tif")
+    ifd = ifd_levels(path)
+    with rasterio.open(path) as src_dst:
+        # zoom 11 tiles (76m) are 196px of the 100m full resolution (256px blocks)
+        strata = {
+            tile_stratum(tile, src_dst, ifd[0])
+            for tile in TMS.tiles(*TMS.bounds(morecantile.Tile(512, 487, 10)), [11])
+        }
+        assert strata <= {"1x1", "1x2", "2x1", "2x2"}
+
+        # Zoom 7 tile covering the 600 first rows of the dataset
+        tile = morecantile.Tile(64, 60, 7)
+        assert tile_stratum(tile, src_dst, ifd[0]) == "4x3"
+        assert tile_stratum(tile, src_dst, ifd[2]) == "1x1"
+
+
+def test_stratified_estimate():
+    """Stratified means and confidence intervals."""
+    strata = {
+        "a": {
+            "weight": 0.75,
+            "values": [{"GET": 1, "bytes": 100, "Timing": 0.1}] * 3,
+        },
+        "b": {
+            "weight": 0.25,
+            "values": [
+                {"GET": 2, "bytes": 100, "Timing": 0.1},
+                {"GET": 4, "bytes": 300, "Timing": 0.3},
+            ],
+        },
+    }
+    estimates = stratified_estimate(strata, confidence=0.95)
+    assert estimates["GET"]["mean"] == pytest.approx(0.75 * 1 + 0.25 * 3)
+    # var_b = 2, n_b = 2
+    assert estimates["GET"]["error"] == pytest.approx(1.959964 * 0.25, rel=1e-5)
+    assert estimates["GET"]["ci"] == pytest.approx(
+        [
+            estimates["GET"]["mean"] - estimates["GET"]["error"],
+            estimates["GET"]["mean"] + estimates["GET"]["error"],
+        ]
+    )
+
+    # Fully sampled strata have no error
+    strata["b"]["size"] = 2
+    assert stratified_estimate(strata)["GET"]["error"] == 0
+
+    # A single sample does not tell the variance of a stratum
+    strata["b"] = {"weight": 0.25, "values": strata["b"]["values"][:1], "size": 10}
+    assert stratified_estimate(strata)["GET"]["error"] == float("inf")
+
+    # ... unless it is the only tile of the stratum
+    strata["b"]["size"] = 1
+    assert stratified_estimate(strata)["GET"]["error"] == 0
+
+
+def test_next_stratum():
+    """Strata with less than 2 samples are sampled first."""
+    value = {"GET": 1, "bytes": 100, "Timing": 0.1}
+    strata = {
+        "a": {"weight": 0.9, "values": [value, {**value, "GET": 5}], "pool": [1]},
+        "b": {"weight": 0.1, "values": [value], "pool": [2]},
+    }
+    assert _next_stratum(strata, min_tiles=1) is strata["b"]
+
+    strata["b"]["pool"] = []
+    assert _next_stratum(strata, min_tiles=1) is strata["a"]
+
+
+def test_sample_zooms(cog_url):
+    """Sample tiles until the confidence intervals are reached."""
+    report = sample_zooms(cog_url, relative_error=0.2, max_tiles=20, seed=1)
+    assert [z["zoom"] for z in report["zooms"]] == [9, 10, 11]
+
+    for z in report["zooms"]:
+        assert 0 < z["sampled"] <= min(20, z["tiles"])
+        assert sum(s["count"] for s in z["strata"].values()) == z["sampled"]
+        assert sum(s["weight"] for s in z["strata"].values()) == pytest.approx(1)
+        assert z["GET"]["mean"] >= 1
+        assert z["bytes"]["mean"] > 0
+        for metric in ["GET", "bytes", "Timing"]:
+            lower, upper = z[metric]["ci"]
+            assert lower <= z[metric]["mean"] <= upper
+        if z["converged"]:
+            assert z["GET"]["error"] <= 0.2 * z["GET"]["mean"]
+
+    pyramid = report["pyramid"]
+    assert pyramid["tiles"] == sum(z["tiles"] for z in report["zooms"])
+    assert pyramid["GET"]["total"] == pytest.approx(
+        sum(z["tiles"] * z["GET"]["mean"] for z in report["zooms"])
+    )
+
+    # Stops at `max_tiles`
+    report = sample_zooms(cog_url, zooms=[11], relative_error=0.0001, max_tiles=6)
+    assert report["zooms"][0]["sampled"] == 6
+    assert not report["zooms"][0]["converged"]
+
+    with pytest.raises(ValueError):
+        sample_zooms(cog_url, zooms=[11], min_tiles=1)
+
+
+def test_sample_zooms_reader(zarr_url):
+    """Open the dataset through the reader (not only rasterio datasets)."""
+    from tilebench.readers import XarrayReader
+
+    report = sample_zooms(
+        zarr_url,
+        zooms=[4],
+        max_tiles=4,
+        seed=1,
+        reader=XarrayReader,
+        reader_params={"variable": "band"},
+    )
+    zoom = report["zooms"][0]
+    assert zoom["level"] == 0
+    assert 0 < zoom["sampled"] <= 4
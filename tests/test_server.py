@@ -0,0 +1,58 @@
+"""tilebench.server tests."""
+
+import time
+import urllib.request
+
+import pytest
+
+from tests.handlers import FlakyHandler
+from tilebench.server import serve
+
+
+def test_serve(tmp_path):
+    """Serve files with Range support."""
+    (tmp_path / "file.bin").write_bytes(bytes(range(256)))
+
+    with serve(str(tmp_path)) as url:
+        with urllib.request.urlopen(f"{url}/file.bin") as response:
+            assert response.status == 200
+            assert len(response.read()) == 256
+
+        request = urllib.request.Request(
+            f"{url}/file.bin", headers={"Range": "bytes=10-19"}
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 206
+            assert response.headers["Content-Range"] == "bytes 10-19/256"
+            assert response.read() == bytes(range(10, 20))
+
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/missing.bin")
+
+
+def test_serve_latency(tmp_path):
+    """Add latency to each request."""
+    (tmp_path / "file.bin").write_bytes(b"0" * 16)
+
+    with serve(str(tmp_path), latency=0.2) as url:
+        start = time.perf_counter()
+        with urllib.request.urlopen(f"{url}/file.bin") as response:
+            response.read()
+        assert time.perf_counter() - start >= 0.2
+
+
+def test_serve_handler(tmp_path):
+    """Serve files with a custom request handler."""
+    (tmp_path / "file.bin").write_bytes(b"0" * 16)
+
+    with serve(str(tmp_path), handler=FlakyHandler) as url:
+        with urllib.request.urlopen(f"{url}/redirect/file.bin") as response:
+            assert response.url == f"{url}/file.bin"
+            assert response.read() == b"0" * 16
+
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{url}/flaky/file.bin")
+        assert excinfo.value.code == 503
+
+        with urllib.request.urlopen(f"{url}/flaky/file.bin") as response:
+            assert response.read() == b"0" * 16
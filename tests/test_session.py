@@ -0,0 +1,107 @@
+"""Tests for tilebench.session."""
+
+import json
+
+import numpy
+import pytest
+from rio_tiler.io import Reader
+
+from tilebench import Histogram, Session
+from tilebench import profile as profiler
+
+
+def test_histogram():
+    """Percentiles should be within the relative accuracy."""
+    values = numpy.random.default_rng(0).lognormal(0, 1, 10000)
+
+    hist = Histogram(relative_accuracy=0.01)
+    for v in values:
+        hist.add(v)
+
+    assert hist.count == 10000
+    assert hist.mean == pytest.approx(values.mean())
+    for q in [50, 95, 99]:
+        expected = numpy.percentile(values, q, method="lower")
+        assert hist.percentile(q) == pytest.approx(expected, rel=0.02)
+
+    # memory is bounded by the range of values, not the number of values
+    assert len(hist.buckets) < 1000
+
+    hist.add(0)
+    assert hist.percentile(0) == 0
+
+    with pytest.raises(ValueError):
+        hist.add(-1)
+
+    other = Histogram(relative_accuracy=0.01)
+    other.add(1000)
+    hist.merge(other)
+    assert hist.count == 10002
+    assert hist.max == 1000
+
+    assert Histogram.from_dict(json.loads(json.dumps(hist.to_dict()))) == hist
+
+    with pytest.raises(ValueError):
+        hist.merge(Histogram(relative_accuracy=0.05))
+
+    assert Histogram().percentile(50) is None
+
+
+def test_session(cog_url, tmp_path):
+    """Aggregate profiled calls."""
+    session = Session()
+
+    @profiler(
+        quiet=True,
+        config={"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"},
+        session=session,
+        label=lambda src_path, x, y, z: z,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    for x, y in [(1025, 974), (1026, 974), (1025, 975)]:
+        _read_tile(cog_url, x, y, 11)
+
+    _read_tile(cog_url, 512, 487, 10)
+
+    summary = session.summary()
+    assert list(summary) == ["11", "10"]
+    assert summary["11"]["count"] == 3
+    assert summary["11"]["GET"]["count"]
+    assert summary["11"]["GET"]["mean"] == summary["11"]["GET"]["count"] / 3
+    assert summary["11"]["GET"]["bytes"]
+    assert summary["11"]["Timing"]["p50"]
+    assert summary["11"]["Timing"]["p99"] <= summary["11"]["Timing"]["max"]
+    assert summary["10"]["count"] == 1
+
+    path = tmp_path / "session.json"
+    assert json.loads(session.to_json(str(path))) == json.loads(path.read_text())
+
+    session.record(
+        {"HEAD": {"count": 1}, "GET": {"count": 2, "bytes": 10}, "Timing": 0.1}
+    )
+    assert session.summary()["all"]["GET"]["bytes"] == 10
+
+
+def test_session_merge():
+    """Merged sessions match one session with all the calls."""
+    results = [
+        {"HEAD": {"count": 1}, "GET": {"count": n, "bytes": n * 100}, "Timing": n / 8}
+        for n in range(1, 11)
+    ]
+
+    whole = Session()
+    parts = [Session(), Session()]
+    for i, result in enumerate(results):
+        whole.record(result, label=i % 3)
+        parts[i % 2].record(result, label=i % 3)
+
+    merged = Session.from_dict(json.loads(json.dumps(parts[0].to_dict())))
+    merged.merge(parts[1])
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.summary() == whole.summary()
+
+    with pytest.raises(ValueError):
+        merged.merge(Session(relative_accuracy=0.05))
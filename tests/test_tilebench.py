@@ -3,6 +3,12 @@
 import pytest
 from rio_tiler.io import Reader
 
+from tilebench import (
+    parse_connections,
+    parse_rasterio_requests,
+    parse_timeline,
+    parse_urls,
+)
 from tilebench import profile as profiler
 
 
@@ -42,3 +48,137 @@ def test_profiler(src_path, head, get):
     assert stats["HEAD"]["count"] == head
     assert stats["GET"]["count"] == get
     assert stats["GET"]["bytes"] == 386677
+
+
+def test_parse_timeline():
+    """Detect concurrent requests."""
+
+    def _req(start, end):
+        return {
+            "method": "GET",
+            "url": "https://somewhere.com/cog.tif",
+            "range": None,
+            "bytes": 10,
+            "connection": None,
+            "start": start,
+            "end": end,
+            "duration": end - start,
+        }
+
+    timeline = parse_timeline(
+        [_req(10, 11), _req(11, 12), _req(11.5, 13), _req(11.5, 12.5), _req(15, 16)],
+        origin=10,
+    )
+    assert [r["start"] for r in timeline["requests"]] == [0, 1, 1.5, 1.5, 5]
+    assert timeline["max_concurrency"] == 3
+    assert timeline["serialized_wait"] == 5.5
+    assert timeline["critical_path"] == 4
+
+    timeline = parse_timeline([], origin=0)
+    assert timeline["max_concurrency"] == 0
+    assert timeline["critical_path"] == 0
+
+
+def test_parse_urls():
+    """Break down requests per URL."""
+
+    def _req(method, url, range=None, bytes=0, duration=1.0):
+        return {
+            "method": method,
+            "url": url,
+            "range": range,
+            "bytes": bytes,
+            "duration": duration,
+        }
+
+    urls = parse_urls(
+        [
+            _req("HEAD", "https://somewhere.com/b1.tif"),
+            _req("GET", "https://somewhere.com/b1.tif", "0-9", 10),
+            _req("HEAD", "https://somewhere.com/b2.tif", duration=0.5),
+            _req("GET", "https://somewhere.com/b1.tif", "20-29,40-49", 20),
+        ]
+    )
+    assert list(urls) == ["https://somewhere.com/b1.tif", "https://somewhere.com/b2.tif"]
+    assert urls["https://somewhere.com/b1.tif"] == {
+        "HEAD": {"count": 1},
+        "GET": {"count": 2, "bytes": 30, "ranges": ["0-9", "20-29", "40-49"]},
+        "Timing": 3.0,
+    }
+    assert urls["https://somewhere.com/b2.tif"]["GET"]["count"] == 0
+    assert urls["https://somewhere.com/b2.tif"]["Timing"] == 0.5
+    assert parse_urls([]) == {}
+
+
+def test_parse_rasterio_requests_threads():
+    """Parse logs of requests sent from many threads."""
+
+    def _get(path, rng):
+        return [
+            f"CURL_INFO_HEADER_OUT: GET {path} HTTP/1.1",
+            "Host: somewhere.com",
+            f"Range: bytes={rng}",
+            "",
+        ]
+
+    def _response(rng, size):
+        return [
+            "CURL_INFO_HEADER_IN: HTTP/1.1 206 Partial Content",
+            f"CURL_INFO_HEADER_IN: Content-Range: bytes {rng}/{size}",
+            "CURL_INFO_TEXT: Connection #0 to host somewhere.com left intact",
+        ]
+
+    # thread 2 request is sent first but thread 1 gets its response first
+    logs = [
+        *_get("/b1.tif", "0-9"),
+        *_get("/b2.tif", "0-19"),
+        *_response("0-19", 200),
+        *_response("0-9", 100),
+    ]
+    threads = [1] * 4 + [2] * 4 + [2] * 3 + [1] * 3
+
+    requests = parse_rasterio_requests(logs, threads=threads)
+    assert [(r["url"], r["bytes"]) for r in requests] == [
+        ("https://somewhere.com/b1.tif", 10),
+        ("https://somewhere.com/b2.tif", 20),
+    ]
+
+    # Without threads, responses are matched in order
+    requests = parse_rasterio_requests(logs)
+    assert [(r["url"], r["bytes"]) for r in requests] == [
+        ("https://somewhere.com/b1.tif", 20),
+        ("https://somewhere.com/b2.tif", 10),
+    ]
+
+
+def test_parse_connections():
+    """Parse connection diagnostics from CURL logs."""
+    logs = [
+        "CURL_INFO_TEXT: Established connection to example.com (1.2.3.4 port 443) from 10.0.0.1 port 50000",
+        "CURL_INFO_TEXT: SSL connection using TLSv1.3 / TLS_AES_256_GCM_SHA384 / X25519 / RSASSA-PSS",
+        "CURL_INFO_HEADER_OUT: HEAD /redirect.tif HTTP/1.1",
+        "CURL_INFO_HEADER_IN: HTTP/1.1 302 Found",
+        "CURL_INFO_TEXT: Issue another request to this URL: 'https://example.com/cog.tif'",
+        "CURL_INFO_TEXT: Reusing existing https: connection with host example.com",
+        "CURL_INFO_HEADER_OUT: HEAD /cog.tif HTTP/1.1",
+        "CURL_INFO_HEADER_IN: HTTP/1.1 200 OK",
+        "CURL_INFO_TEXT: Re-using existing connection #0 with host example.com",
+        "CURL_INFO_HEADER_OUT: GET /cog.tif HTTP/1.1",
+        "CURL_INFO_HEADER_IN: HTTP/2 503",
+        "CPLE_AppDefined in HTTP error code: 503 - https://example.com/cog.tif. Retrying again in 0.5 secs",
+        "CURL_INFO_TEXT: Connected to example.com (1.2.3.4) port 443 (#1)",
+        "CURL_INFO_HEADER_OUT: GET /cog.tif HTTP/1.1",
+        "CURL_INFO_HEADER_IN: HTTP/1.1 429 Too Many Requests",
+        "CPLE_AppDefined in HTTP error code: 429 - https://example.com/cog.tif. Retrying again in 1.0 secs",
+        "CURL_INFO_HEADER_OUT: GET /cog.tif HTTP/1.1",
+        "CURL_INFO_HEADER_IN: HTTP/1.1 206 Partial Content",
+    ]
+    assert parse_connections(logs) == {
+        "new": 2,
+        "reused": 2,
+        "tls_handshakes": 1,
+        "redirects": 1,
+        "retries": {"count": 2, "backoff": 1.5},
+        "errors": {"4xx": 1, "5xx": 1},
+    }
+    assert parse_connections([])["new"] == 0
@@ -0,0 +1,95 @@
+"""Tests for tilebench.tracing."""
+
+import pytest
+from fastapi import FastAPI
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from rio_tiler.io import Reader
+from starlette.testclient import TestClient
+
+from tilebench import profile as profiler
+from tilebench import tracing
+from tilebench.middleware import VSIStatsMiddleware
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """In-memory span exporter."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(
+        tracing.trace, "get_tracer", lambda name: provider.get_tracer(name)
+    )
+    return exporter
+
+
+def test_profile_spans(exporter, cog_url):
+    """One parent span per call and one child span per HEAD/GET."""
+
+    @profiler(
+        quiet=True,
+        add_to_return=True,
+        config={"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"},
+        tracing=True,
+    )
+    def _read_tile(src_path: str, x: int, y: int, z: int):
+        with Reader(src_path) as cog:
+            return cog.tile(x, y, z)
+
+    _, stats = _read_tile(cog_url, 1025, 974, 11)
+
+    spans = exporter.get_finished_spans()
+    parent = [s for s in spans if s.parent is None]
+    assert len(parent) == 1
+    parent = parent[0]
+    assert "_read_tile" in parent.name
+    assert parent.attributes["tilebench.get.count"] == stats["GET"]["count"]
+
+    children = [s for s in spans if s.parent is not None]
+    assert all(s.parent.span_id == parent.context.span_id for s in children)
+    assert len([s for s in children if s.name == "HEAD"]) == stats["HEAD"]["count"]
+
+    gets = [s for s in children if s.name == "GET"]
+    assert len(gets) == stats["GET"]["count"]
+    assert sum(s.attributes["tilebench.bytes"] for s in gets) == stats["GET"]["bytes"]
+    for span in gets:
+        assert span.attributes["url.full"] == cog_url
+        assert span.attributes["http.response.status_code"] == 206
+        assert span.attributes["http.request.header.range"] in stats["GET"]["ranges"]
+        assert parent.start_time <= span.start_time <= span.end_time <= parent.end_time
+
+
+def test_middleware_spans(exporter, cog_url):
+    """Emit spans from the middleware."""
+    app = FastAPI()
+    app.add_middleware(
+        VSIStatsMiddleware,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{cog_url}",
+        },
+        tracing=True,
+    )
+
+    # NOTE: TestClient runs the app outside the main thread, GDAL logs are only
+    # captured when the read happens in the middleware thread (async endpoint)
+    @app.get("/tiles/{z}/{x}/{y}")
+    async def tile(z: int, x: int, y: int):
+        """Read tile."""
+        with Reader(cog_url) as cog:
+            cog.tile(x, y, z)
+            return "I got tile"
+
+    with TestClient(app) as client:
+        response = client.get("/tiles/11/1026/975")
+        assert response.status_code == 200
+
+    spans = exporter.get_finished_spans()
+    parent = [s for s in spans if s.parent is None][0]
+    assert parent.name == "tilebench GET /tiles/{z}/{x}/{y}"
+    assert parent.attributes["http.route"] == "/tiles/{z}/{x}/{y}"
+    children = [s for s in spans if s.parent is not None]
+    assert [s.name for s in children].count("HEAD") == 1
+    assert [s.name for s in children].count("GET") >= 1
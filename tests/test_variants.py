@@ -0,0 +1,104 @@
+"""tilebench.variants tests."""
+
+import morecantile
+import pytest
+import rasterio
+
+from tilebench.variants import (
+    _overview_factors,
+    profile_variants,
+    sample_tiles,
+    variant_matrix,
+    variant_name,
+    write_variant,
+)
+
+
+def test_variant_matrix():
+    """Create all the combinations of layout options."""
+    matrix = variant_matrix(blocksize=[256, 512], interleave=["pixel", "band"])
+    assert len(matrix) == 4
+    assert matrix[0] == {
+        "blocksize": 256,
+        "compress": "deflate",
+        "overviews": "auto",
+        "overview_resampling": "nearest",
+        "interleave": "pixel",
+    }
+    assert variant_name(matrix[0]) == "bs256_deflate_ovrauto_nearest_pixel"
+    assert len({variant_name(v) for v in matrix}) == 4
+
+
+@pytest.mark.parametrize(
+    "size,blocksize,overviews,expected",
+    [
+        (1024, 256, "auto", [2, 4]),
+        (1024, 512, "auto", [2]),
+        (256, 256, "auto", []),
+        (1024, 256, 1, [2]),
+        (1024, 256, 0, []),
+        (1024, 512, 3, [2, 4, 8]),
+    ],
+)
+def test_overview_factors(size, blocksize, overviews, expected):
+    """Compute overview decimations."""
+    assert _overview_factors(size, size, blocksize, overviews) == expected
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"blocksize": 256, "compress": "zstd", "interleave": "pixel"},
+        {"blocksize": 512, "compress": "lzw", "interleave": "band", "overviews": 0},
+        {"blocksize": 128, "overviews": 2, "overview_resampling": "average"},
+    ],
+)
+def test_write_variant(data_dir, tmp_path, options):
+    """Write a COG with a given layout."""
+    dst_path = str(tmp_path / "variant.tif")
+    write_variant(str(data_dir / "cog.tif"), dst_path, **options)
+
+    with rasterio.open(dst_path) as src_dst:
+        blocksize = options["blocksize"]
+        assert src_dst.block_shapes[0] == (blocksize, blocksize)
+        assert src_dst.compression.value == options.get("compress", "deflate").upper()
+        assert src_dst.interleaving.value == options.get("interleave", "pixel").upper()
+        expected = _overview_factors(
+            src_dst.width, src_dst.height, blocksize, options.get("overviews", "auto")
+        )
+        assert src_dst.overviews(1) == expected
+
+    assert not (tmp_path / "variant.tif.tmp.tif").exists()
+
+
+def test_sample_tiles(data_dir):
+    """Pick random tiles intersecting the dataset."""
+    src_path = str(data_dir / "cog.tif")
+    tiles = sample_tiles(src_path, zooms=[10, 11], count=3, seed=1)
+    assert len(tiles) == 6
+    assert [t.z for t in tiles] == [10, 10, 10, 11, 11, 11]
+    assert tiles == sample_tiles(src_path, zooms=[10, 11], count=3, seed=1)
+
+    # Default to the dataset maxzoom
+    tiles = sample_tiles(src_path, count=1000)
+    assert len({t.z for t in tiles}) == 1
+    assert len(tiles) < 1000
+
+
+def test_profile_variants(data_dir, tmp_path):
+    """Profile the same tiles against each variant."""
+    variants = variant_matrix(blocksize=[256, 512], interleave=["pixel", "band"])
+    tiles = [morecantile.Tile(1024, 978, 11), morecantile.Tile(512, 489, 10)]
+    rows = profile_variants(str(data_dir / "cog.tif"), variants, tiles, str(tmp_path))
+    assert len(rows) == 4
+    for row, variant in zip(rows, variants):
+        assert row["name"] == variant_name(variant)
+        assert row["blocksize"] == variant["blocksize"]
+        assert row["file_size"] > 0
+        assert row["count"] == 2
+        assert row["GET"]["count"] > 0
+        assert row["bytes"]["count"] == 2
+        assert row["Timing"]["count"] == 2
+
+    pixel, band = rows[0], rows[1]
+    assert band["GET"]["count"] > pixel["GET"]["count"]
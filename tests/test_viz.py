@@ -1,6 +1,7 @@
 """Tests for tilebench."""
 
 import attr
+import pytest
 import rasterio
 from rio_tiler.io import Reader
 from starlette.testclient import TestClient
@@ -93,3 +94,88 @@ def test_viz_vsifile():
         response = client.get("/tiles.geojson?ovr_level=1")
         assert response.status_code == 200
         assert response.headers["content-type"] == "application/geo+json"
+
+
+def test_viz_method(cog_url):
+    """Profile other reader methods."""
+    app = TileDebug(
+        src_path=cog_url,
+        config={"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"},
+        method="point",
+    )
+    with TestClient(app.app) as client:
+        response = client.get("/tiles/11/1025/974")
+        assert response.status_code == 200
+        assert "get;count=" in response.headers["VSI-Stats"]
+
+    app = TileDebug(
+        src_path=cog_url,
+        config={"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR"},
+        method="part",
+        method_params={"max_size": 64},
+    )
+    with TestClient(app.app) as client:
+        response = client.get("/tiles/11/1025/974")
+        assert response.status_code == 200
+
+    with pytest.raises(ValueError):
+        TileDebug(src_path=cog_url, method="something")
+
+
+def test_viz_grid(cog_url):
+    """Return the internal blocks grid."""
+    app = TileDebug(src_path=cog_url)
+    with TestClient(app.app) as client:
+        response = client.get("/tiles.geojson?ovr_level=0")
+        assert response.status_code == 200
+        assert len(response.json()["features"]) == 16
+
+        response = client.get("/tiles.geojson?ovr_level=2")
+        assert len(response.json()["features"]) == 1
+
+
+def test_viz_info(cog_url, zarr_url):
+    """Return the zoom range of the reader and the IFDs of rasterio datasets."""
+    app = TileDebug(src_path=cog_url)
+    with TestClient(app.app) as client:
+        info = client.get("/info.geojson").json()["features"][0]["properties"]
+
+    with Reader(cog_url) as src:
+        assert info["minzoom"] == src.minzoom
+        assert info["maxzoom"] == src.maxzoom
+
+    assert info["overviews"] == len(info["ifd"]) - 1
+    assert info["overviews"] > 0
+
+    from tilebench.readers import XarrayReader
+
+    app = TileDebug(
+        src_path=zarr_url, reader=XarrayReader, reader_params={"variable": "band"}
+    )
+    with TestClient(app.app) as client:
+        info = client.get("/info.geojson").json()["features"][0]["properties"]
+
+    with XarrayReader(zarr_url, variable="band") as src:
+        assert info["minzoom"] == src.minzoom
+        assert info["maxzoom"] == src.maxzoom
+
+    assert info["overviews"] == 0
+    assert info["ifd"][0]["MercatorZoom"] == info["maxzoom"]
+
+
+def test_viz_anomalies(cog_url):
+    """Return the anomalous tiles to overlay."""
+    app = TileDebug(src_path=cog_url)
+    with TestClient(app.app) as client:
+        response = client.get("/anomalies.geojson")
+        assert response.status_code == 200
+        assert response.json() == {"type": "FeatureCollection", "features": []}
+
+    anomalies = {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "geometry": None, "properties": {"rank": 1}}],
+    }
+    app = TileDebug(src_path=cog_url, anomalies=anomalies)
+    with TestClient(app.app) as client:
+        response = client.get("/anomalies.geojson")
+        assert response.json()["features"][0]["properties"] == {"rank": 1}
@@ -3,21 +3,136 @@
 __version__ = "0.18.0"
 
 import cProfile
+import functools
+import heapq
+import inspect
 import json
 import logging
 import pstats
+import re
 import sys
+import threading
 import time
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
 from io import StringIO
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import rasterio
 from loguru import logger as log
 
+from tilebench.cost import Pricing, load_pricing, tile_cost  # noqa
+from tilebench.session import Histogram, Session  # noqa
+
 fmt = "{time} | TILEBENCH | {message}"
 log.remove()
 log.add(sys.stderr, format=fmt)
 
+# Log handlers of the captures active in the current context (thread or asyncio task)
+_active_handlers: ContextVar[Tuple[logging.Handler, ...]] = ContextVar(
+    "tilebench_active_handlers", default=()
+)
+
+
+def _context_filter(handler: logging.Handler) -> Callable[[logging.LogRecord], bool]:
+    """Only keep records emitted in a context where `handler` is active."""
+
+    def _filter(record: logging.LogRecord) -> bool:
+        active = _active_handlers.get()
+        return not active or handler in active
+
+    return _filter
+
+
+class _LogRecorder(logging.Handler):
+    """Record log lines (and their timestamp and thread) emitted in the handler's context."""
+
+    def __init__(self):
+        """Init handler."""
+        super().__init__()
+        self.logs: List[str] = []
+        self.timestamps: List[float] = []
+        self.threads: List[Optional[int]] = []
+        self.addFilter(_context_filter(self))
+
+    def emit(self, record: logging.LogRecord):
+        """Split the record message in lines."""
+        try:
+            for line in self.format(record).splitlines():
+                self.logs.append(line)
+                self.timestamps.append(record.created)
+                self.threads.append(record.thread)
+        except Exception:  # pragma: nocover
+            self.handleError(record)
+
+
+# rasterio.Env shared by the (possibly interleaved) captures of the current thread
+_shared_env = threading.local()
+
+
+@contextmanager
+def _gdal_env(nested: bool = False, **options) -> Iterator[None]:
+    """Enter a rasterio.Env shared by all the active captures of the current thread.
+
+    Asyncio tasks run in the same thread and can exit their captures in any order,
+    which would break rasterio's (stack based) environment if each had its own. The
+    options of a capture joining the shared environment are applied to it.
+
+    Captures `nested` in another capture of the same context exit first, so they enter
+    their own (stacked) rasterio.Env.
+    """
+    if nested:
+        with rasterio.Env(**options):
+            yield
+        return
+
+    if not getattr(_shared_env, "count", 0):
+        _shared_env.env = rasterio.Env(**options)
+        _shared_env.env.__enter__()
+        _shared_env.count = 0
+    else:
+        rasterio.env.setenv(**options)
+
+    _shared_env.count += 1
+    try:
+        yield
+    finally:
+        _shared_env.count -= 1
+        if not _shared_env.count:
+            _shared_env.env.__exit__(None, None, None)
+            _shared_env.env = None
+
+
+# Capture profiling the current thread (cProfile only supports one profiler per thread)
+_profiling = threading.local()
+
+
+def _enable_profiler() -> Optional[cProfile.Profile]:
+    """Enable a cProfile profiler, unless the current thread is already profiled."""
+    if getattr(_profiling, "active", False):
+        warnings.warn(
+            "Another capture is already profiling this thread, cProfile is skipped.",
+            stacklevel=4,
+        )
+        return None
+
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError as e:  # python >= 3.12: another profiling tool is active
+        warnings.warn(f"cProfile is skipped: {e}", stacklevel=4)
+        return None
+
+    _profiling.active = True
+    return prof
+
+
+def _disable_profiler(prof: cProfile.Profile):
+    """Disable a profiler enabled with `_enable_profiler`."""
+    prof.disable()
+    _profiling.active = False
+
 
 def parse_rasterio_io_logs(logs: List[str]) -> Dict[str, Any]:
     """Parse Rasterio and CURL logs."""
@@ -97,6 +212,701 @@ def parse_vsifile_io_logs(logs: List[str]) -> Dict[str, Any]:
     }
 
 
+# fsspec request log line (see `tilebench.fsspec_io`)
+FSSPEC_LOG = re.compile(
+    r"FSSPEC_INFO: (?P<method>\w+) bytes=(?P<bytes>\d+) range=(?P<range>\S+) "
+    r"duration=(?P<duration>[\d.]+) error=(?P<error>\S+) url=(?P<url>.*)"
+)
+
+# Zarr metadata documents (not chunks)
+ZARR_METADATA = [".zarray", ".zattrs", ".zgroup", ".zmetadata", "zarr.json"]
+
+
+def _chunk_keys(urls: List[str]) -> List[str]:
+    """Distinct keys of the objects, relative to their Zarr store (`.zarr` directory).
+
+    URLs outside of a Zarr store are kept as is, Zarr metadata documents are excluded.
+    """
+    keys = [url.rpartition(".zarr/")[2] or url for url in urls]
+    return list(
+        dict.fromkeys(key for key in keys if key.rsplit("/", 1)[-1] not in ZARR_METADATA)
+    )
+
+
+def parse_fsspec_io_logs(logs: List[str]) -> Dict[str, Any]:
+    """Parse fsspec IO logs (see `tilebench.fsspec_io`).
+
+    `Chunks` lists the distinct objects fetched: chunk keys relative to their Zarr
+    store (metadata documents excluded), or URLs of the other files (e.g. NetCDF).
+    """
+    requests = [m.groupdict() for line in logs if (m := FSSPEC_LOG.search(line))]
+    gets = [req for req in requests if req["method"] == "GET"]
+    chunks = _chunk_keys([req["url"] for req in gets if req["error"] == "-"])
+
+    return {
+        "HEAD": {"count": len([req for req in requests if req["method"] == "HEAD"])},
+        "GET": {
+            "count": len(gets),
+            "bytes": sum(int(req["bytes"]) for req in gets),
+            "ranges": [req["range"] for req in gets if req["range"] != "-"],
+        },
+        "LIST": {"count": len([req for req in requests if req["method"] == "LIST"])},
+        "Chunks": {"count": len(chunks), "keys": chunks},
+        "WarpKernels": [],
+    }
+
+
+def parse_fsspec_requests(
+    logs: List[str],
+    timestamps: Optional[List[float]] = None,
+    threads: Optional[List[Optional[int]]] = None,
+) -> List[Dict[str, Any]]:
+    """Parse fsspec logs into a list of HEAD/LIST/GET requests.
+
+    Requests have the same schema as `parse_rasterio_requests` output, but fsspec calls
+    do not expose HTTP headers (`status`, `http_version` and `connection` are always
+    None). Log lines are emitted when the calls end, `start` is their timestamp minus
+    the call duration.
+
+    """
+    timestamps = timestamps or [0.0] * len(logs)
+
+    requests: List[Dict[str, Any]] = []
+    for line, ts in zip(logs, timestamps):
+        if match := FSSPEC_LOG.search(line):
+            duration = float(match["duration"])
+            requests.append(
+                {
+                    "method": match["method"],
+                    "url": match["url"],
+                    "status": None,
+                    "http_version": None,
+                    "range": None if match["range"] == "-" else match["range"],
+                    "bytes": int(match["bytes"]),
+                    "connection": None,
+                    "request_headers": {},
+                    "response_headers": {},
+                    "start": ts - duration,
+                    "end": ts,
+                    "duration": duration,
+                }
+            )
+
+    return requests
+
+
+def _range_size(value: str) -> int:
+    """Get the size of a `start-end` byte range."""
+    start, end = map(int, value.split("-"))
+    return end - start + 1
+
+
+def _curl_state() -> Dict[str, Any]:
+    """CURL logs parsing state (of one thread)."""
+    return {
+        "pending": [],  # requests waiting for a response
+        "sending": None,  # request headers being read
+        "receiving": None,  # request receiving its response
+        "next_connection": None,
+    }
+
+
+def _curl_header_out(
+    state: Dict[str, Any], value: str, ts: float
+) -> Optional[Dict[str, Any]]:
+    """Start a HEAD/GET request from a `CURL_INFO_HEADER_OUT` request line."""
+    method, path, *_ = value.split(" ") + [""]
+    if method not in ["HEAD", "GET"]:
+        return None
+
+    request = {
+        "method": method,
+        "path": path,
+        "url": None,
+        "status": None,
+        "http_version": None,
+        "range": None,
+        "bytes": 0,
+        "connection": state["next_connection"],
+        "request_headers": {},
+        "response_headers": {},
+        "start": ts,
+        "end": ts,
+    }
+    state["sending"] = request
+    state["next_connection"] = None
+    state["pending"].append(request)
+    return request
+
+
+def _curl_header_in(state: Dict[str, Any], value: str, ts: float):
+    """Match a response status line to a pending request, or add a response header."""
+    receiving = state["receiving"]
+    if value.startswith("HTTP/"):
+        if state["pending"]:
+            receiving = state["receiving"] = state["pending"].pop(0)
+            version, status, *_ = value.split(" ")
+            receiving["http_version"] = version
+            receiving["status"] = int(status)
+            receiving["end"] = ts
+
+    elif receiving is not None and value:
+        key, _, value = value.partition(":")
+        receiving["response_headers"][key.strip()] = value.strip()
+        receiving["end"] = ts
+
+
+def _curl_text(state: Dict[str, Any], line: str, ts: float):
+    """Track connections opened (or re-used) and released."""
+    if done := re.search(
+        r"shutting down connection #(\d+)|Connection #(\d+) to host .* left intact",
+        line,
+    ):
+        if (receiving := state["receiving"]) is not None:
+            receiving["connection"] = int(done.group(1) or done.group(2))
+            receiving["end"] = ts
+            state["receiving"] = None
+
+    elif opened := re.search(
+        r"Re-using existing connection #(\d+)|Connected to .*\(#(\d+)\)", line
+    ):
+        state["next_connection"] = int(opened.group(1) or opened.group(2))
+
+
+def _parse_curl_line(
+    state: Dict[str, Any], line: str, ts: float
+) -> Optional[Dict[str, Any]]:
+    """Update a parsing `state` with a log line, return the request it starts (if any)."""
+    if (sending := state["sending"]) is not None:
+        if not line.strip() or "CURL_INFO_" in line:
+            state["sending"] = None
+        else:
+            key, _, value = line.partition(":")
+            sending["request_headers"][key.strip()] = value.strip()
+            return None
+
+    if "CURL_INFO_HEADER_OUT: " in line:
+        return _curl_header_out(state, line.split("CURL_INFO_HEADER_OUT: ")[1], ts)
+
+    if "CURL_INFO_HEADER_IN: " in line:
+        _curl_header_in(state, line.split("CURL_INFO_HEADER_IN: ")[1].strip(), ts)
+
+    elif "CURL_INFO_TEXT: " in line:
+        _curl_text(state, line, ts)
+
+    return None
+
+
+def _finish_curl_request(req: Dict[str, Any], schemes: Dict[str, str]):
+    """Set the request URL, range, bytes and duration."""
+    host = req["request_headers"].get("Host", "")
+    req["url"] = f"{schemes.get(host, 'https')}://{host}{req.pop('path')}"
+
+    if rng := req["request_headers"].get("Range"):
+        req["range"] = rng.replace("bytes=", "")
+
+    headers = req["response_headers"]
+    if content_range := headers.get("Content-Range"):
+        req["bytes"] = _range_size(content_range.split(" ")[1].split("/")[0])
+    elif req["method"] == "GET" and headers.get("Content-Length"):
+        req["bytes"] = int(headers["Content-Length"])
+
+    req["duration"] = req["end"] - req["start"]
+
+
+def parse_rasterio_requests(
+    logs: List[str],
+    timestamps: Optional[List[float]] = None,
+    threads: Optional[List[Optional[int]]] = None,
+) -> List[Dict[str, Any]]:
+    """Parse CURL verbose logs into a list of HEAD/GET requests.
+
+    Each request has `method`, `url`, `status`, `http_version`, `range` (requested),
+    `bytes` (received), `connection` (CURL connection id), `request_headers`,
+    `response_headers` and, when `timestamps` (one per log line) are provided, `start`,
+    `end` and `duration` (in seconds).
+
+    When `threads` (id of the thread which emitted each log line) are provided, the
+    logs of each thread are parsed separately (e.g. multi-file readers using a thread
+    pool).
+
+    Note: CURL logs do not identify the transfers, when GDAL runs requests in parallel
+    in one thread, responses are matched to the requests in the order they were sent.
+
+    """
+    timestamps = timestamps or [0.0] * len(logs)
+    threads = threads or [None] * len(logs)
+
+    schemes = {
+        host: scheme
+        for line in logs
+        for scheme, host in re.findall(r"(https?)://([^/\s)]+)", line)
+    }
+
+    requests: List[Dict[str, Any]] = []
+    states: Dict[Optional[int], Dict[str, Any]] = {}
+
+    for line, ts, thread in zip(logs, timestamps, threads):
+        state = states.setdefault(thread, _curl_state())
+        if (request := _parse_curl_line(state, line, ts)) is not None:
+            requests.append(request)
+
+    for req in requests:
+        _finish_curl_request(req, schemes)
+
+    return requests
+
+
+def parse_vsifile_requests(
+    logs: List[str],
+    timestamps: Optional[List[float]] = None,
+    threads: Optional[List[Optional[int]]] = None,
+) -> List[Dict[str, Any]]:
+    """Parse VSIFILE logs into a list of HEAD/GET requests.
+
+    Requests have the same schema as `parse_rasterio_requests` output, but VSIFILE
+    logs do not include HTTP headers (`status`, `http_version` and `connection` are
+    always None) and requests end with the next log line (of the same thread, when
+    `threads` are provided).
+
+    """
+    timestamps = timestamps or [0.0] * len(logs)
+    threads = threads or [None] * len(logs)
+
+    requests: List[Dict[str, Any]] = []
+    urls: Dict[Optional[int], Optional[str]] = {}
+    currents: Dict[Optional[int], Dict[str, Any]] = {}
+    for line, ts, thread in zip(logs, timestamps, threads):
+        current = currents.get(thread)
+        if current is not None and current["end"] is None:
+            if "VSIFILE: Downloading: " in line:
+                ranges = line.split("VSIFILE: Downloading: ")[1].split(", ")
+                current["range"] = ",".join(ranges)
+                current["bytes"] = sum(_range_size(r) for r in ranges)
+                continue
+
+            if "VSIFILE: Using MultiRange Reads" not in line:
+                current["end"] = ts
+
+        if "VSIFILE: Opening " in line:
+            urls[thread] = line.split("VSIFILE: Opening ")[1].split(" (mode:")[0]
+
+        elif method := re.search(r"VSIFILE_INFO: (HEAD|GET)", line):
+            currents[thread] = {
+                "method": method.group(1),
+                "url": urls.get(thread),
+                "status": None,
+                "http_version": None,
+                "range": None,
+                "bytes": 0,
+                "connection": None,
+                "request_headers": {},
+                "response_headers": {},
+                "start": ts,
+                "end": None,
+            }
+            requests.append(currents[thread])
+
+    for req in requests:
+        if req["end"] is None:
+            req["end"] = req["start"]
+        req["duration"] = req["end"] - req["start"]
+
+    return requests
+
+
+def parse_timeline(requests: List[Dict[str, Any]], origin: float) -> Dict[str, Any]:
+    """Create a timeline of HEAD/GET requests and detect concurrent requests.
+
+    Args:
+        requests (list): Requests from `parse_rasterio_requests`/`parse_vsifile_requests`.
+        origin (float): Timeline origin (`time.time()` timestamp).
+
+    Returns:
+        dict: `requests` (start offset and duration in seconds), `max_concurrency`
+        (maximum number of requests in flight at once), `serialized_wait` (sum of
+        the requests duration) and `critical_path` (time with at least one request in
+        flight, i.e the IO wait if overlapping requests were perfectly parallel).
+
+    """
+    entries = [
+        {
+            "method": req["method"],
+            "url": req["url"],
+            "range": req["range"],
+            "bytes": req["bytes"],
+            "connection": req["connection"],
+            "start": req["start"] - origin,
+            "duration": req["duration"],
+        }
+        for req in requests
+    ]
+
+    max_concurrency = 0
+    critical_path = 0.0
+    in_flight: List[float] = []  # end time of the requests in flight (heap)
+    busy_start, busy_end = None, None
+    for req in sorted(requests, key=lambda r: r["start"]):
+        # requests ending before (or when) this one starts are done
+        while in_flight and in_flight[0] <= req["start"]:
+            heapq.heappop(in_flight)
+
+        heapq.heappush(in_flight, req["end"])
+        max_concurrency = max(max_concurrency, len(in_flight))
+
+        # Union of the requests intervals
+        if busy_end is None or req["start"] > busy_end:
+            if busy_end is not None:
+                critical_path += busy_end - busy_start
+            busy_start, busy_end = req["start"], req["end"]
+        else:
+            busy_end = max(busy_end, req["end"])
+
+    if busy_end is not None:
+        critical_path += busy_end - busy_start
+
+    return {
+        "requests": entries,
+        "max_concurrency": max_concurrency,
+        "serialized_wait": sum(req["duration"] for req in requests),
+        "critical_path": critical_path,
+    }
+
+
+def parse_urls(requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Break down HEAD/GET requests per URL.
+
+    Args:
+        requests (list): Requests from `parse_rasterio_requests`/`parse_vsifile_requests`.
+
+    Returns:
+        dict: `HEAD` (count), `GET` (count, bytes and ranges received) and `Timing`
+        (sum of the requests duration, in seconds) per URL, in the order the URLs were
+        requested.
+
+    """
+    urls: Dict[str, Dict[str, Any]] = {}
+    for req in requests:
+        url = urls.setdefault(
+            req["url"] or "",
+            {
+                "HEAD": {"count": 0},
+                "GET": {"count": 0, "bytes": 0, "ranges": []},
+                "Timing": 0.0,
+            },
+        )
+        url[req["method"]]["count"] += 1
+        url["Timing"] += req["duration"]
+        if req["method"] == "GET":
+            url["GET"]["bytes"] += req["bytes"]
+            if content_range := req.get("response_headers", {}).get("Content-Range"):
+                url["GET"]["ranges"].append(content_range.split(" ")[1].split("/")[0])
+            elif req["range"]:
+                url["GET"]["ranges"].extend(req["range"].split(","))
+
+    return urls
+
+
+def parse_connections(logs: List[str]) -> Dict[str, Any]:
+    """Parse connection-level diagnostics from CURL verbose logs.
+
+    Returns:
+        dict: `new` and `reused` connections, `tls_handshakes`, `redirects` followed,
+        GDAL `retries` (count and `backoff` time, in seconds) and HTTP `errors` (`4xx`
+        and `5xx` responses, including the retried ones).
+
+    """
+    stats: Dict[str, Any] = {
+        "new": 0,
+        "reused": 0,
+        "tls_handshakes": 0,
+        "redirects": 0,
+        "retries": {"count": 0, "backoff": 0.0},
+        "errors": {"4xx": 0, "5xx": 0},
+    }
+    for line in logs:
+        if re.search(r"Established connection to|Connected to .*\(#\d+\)", line):
+            stats["new"] += 1
+        elif "Reusing existing" in line or "Re-using existing connection" in line:
+            stats["reused"] += 1
+        elif "SSL connection using" in line:
+            stats["tls_handshakes"] += 1
+        elif "Issue another request to this URL" in line:
+            stats["redirects"] += 1
+        elif retry := re.search(r"Retrying again in ([\d.]+) secs", line):
+            stats["retries"]["count"] += 1
+            stats["retries"]["backoff"] += float(retry.group(1))
+        elif status := re.search(r"CURL_INFO_HEADER_IN: HTTP/\S+ ([45])\d\d", line):
+            stats["errors"][f"{status.group(1)}xx"] += 1
+
+    return stats
+
+
+def _cprofile_lines(prof: cProfile.Profile) -> List[str]:
+    """Format cProfile stats (header and functions with some time spent)."""
+    profile_stream = StringIO()
+    ps = pstats.Stats(prof, stream=profile_stream)
+    ps.strip_dirs().sort_stats("time", "ncalls").print_stats()
+    profile_lines = [p for p in profile_stream.getvalue().splitlines() if p]
+    stats_to_print = [p for p in profile_lines[3:] if float(p.split()[1]) > 0.0]
+    return [profile_lines[2], *stats_to_print]
+
+
+def _export_requests(
+    name: str,
+    t: "Timer",
+    requests: List[Dict[str, Any]],
+    results: Dict[str, Any],
+    tracing: bool = False,
+    trace_file: Optional[str] = None,
+    har_file: Optional[str] = None,
+    logs: Optional[List[str]] = None,
+    timestamps: Optional[List[float]] = None,
+    prof: Optional[cProfile.Profile] = None,
+):
+    """Export the requests as OpenTelemetry spans, Chrome trace and HAR files.
+
+    The open/read phases of the Chrome trace are parsed from the GDAL `logs` (if provided).
+    """
+    # Exporters are imported on demand, not to slow down the import of tilebench
+    if tracing:
+        from tilebench.tracing import emit_spans
+
+        emit_spans(
+            name,
+            t.start,
+            t.end,
+            requests,
+            attributes={
+                "tilebench.head.count": results["HEAD"]["count"],
+                "tilebench.get.count": results["GET"]["count"],
+                "tilebench.get.bytes": results["GET"]["bytes"],
+            },
+        )
+
+    if trace_file:
+        from tilebench.chrome import chrome_trace, parse_phases, write_chrome_trace
+
+        write_chrome_trace(
+            trace_file,
+            chrome_trace(
+                name,
+                t.start,
+                t.end,
+                requests,
+                phases=parse_phases(logs, timestamps, t.start, t.end) if logs else [],
+                stats=pstats.Stats(prof) if prof else None,
+            ),
+        )
+
+    if har_file:
+        from tilebench.har import har_log, write_har
+
+        write_har(har_file, har_log(name, t.start, t.end, requests))
+
+
+def _requests_results(
+    requests: List[Dict[str, Any]],
+    origin: float,
+    timeline: bool = False,
+    urls: bool = False,
+) -> Dict[str, Any]:
+    """`Timeline` and `URLs` entries of the results (if requested)."""
+    results: Dict[str, Any] = {}
+    if timeline:
+        results["Timeline"] = parse_timeline(requests, origin)
+
+    if urls:
+        results["URLs"] = parse_urls(requests)
+
+    return results
+
+
+# IO backends (logger name) and their logs/requests parsers
+IO_PARSERS: Dict[str, Tuple[Callable, Callable]] = {
+    "rasterio": (parse_rasterio_io_logs, parse_rasterio_requests),
+    "vsifile": (parse_vsifile_io_logs, parse_vsifile_requests),
+    "fsspec": (parse_fsspec_io_logs, parse_fsspec_requests),
+}
+
+
+@contextmanager
+def capture(
+    kernels: bool = False,
+    raw: bool = False,
+    cprofile: bool = False,
+    config: Optional[Dict] = None,
+    io: str = "rasterio",
+    session: Optional[Session] = None,
+    label: Any = "all",
+    tracing: bool = False,
+    name: str = "tilebench",
+    timeline: bool = False,
+    trace_file: Optional[str] = None,
+    har_file: Optional[str] = None,
+    urls: bool = False,
+    connections: bool = False,
+    cpu: bool = False,
+    pricing: Optional[Pricing] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Capture IO statistics for a block of code.
+
+    The yielded dictionary is filled with the parsed statistics when the block exits,
+    and recorded in `session` (under `label`) if provided.
+
+    Log records are attributed to the capture active in the current context (thread or
+    asyncio task), so concurrent captures do not mix each other's requests. Records
+    emitted outside any capture context (e.g. from worker threads) are shared by all
+    active captures.
+
+    With `timeline=True`, a `Timeline` entry is added to the statistics with the start
+    offset, duration, bytes, URL and connection of each request and the number of
+    requests actually in flight at once (see `parse_timeline`).
+
+    With `urls=True`, a `URLs` entry is added with the HEAD/GET statistics of each URL
+    (see `parse_urls`), useful for multi-file readers (e.g. STAC items or mosaics).
+
+    With `connections=True`, a `Connections` entry is added with the new/reused
+    connections, TLS handshakes, redirects, retries and 4xx/5xx responses (see
+    `parse_connections`, `rasterio` IO backend only).
+
+    With `cpu=True`, a `CPU` entry is added with the CPU time (user and system, of all
+    the threads of the process) spent in the block.
+
+    With `pricing`, a `Cost` entry is added with the object storage cost of the requests
+    and bytes, and the projected cost for one million reads (see `tilebench.cost`).
+
+    With `tracing=True`, an OpenTelemetry span (`name`) is emitted for the block with one
+    child span per HEAD/GET request (see `tilebench.tracing.emit_spans`).
+
+    With `trace_file`, a Chrome trace-event JSON file (viewable in Perfetto or
+    chrome://tracing) is written with the HEAD/GET requests, the dataset open/read
+    phases and the cProfile python stacks (see `tilebench.chrome.chrome_trace`).
+
+    With `har_file`, the HEAD/GET requests are written as a HAR (HTTP Archive) file
+    (see `tilebench.har.har_log`).
+
+    Captures nested in another capture (of the same context) enter their own GDAL
+    environment with their `config`.
+
+    Note: GDAL configuration options are process-wide, concurrent captures should use
+    the same `config`.
+
+    Note: cProfile profiles the current thread only, and only one capture can profile a
+    thread at once: concurrent (or nested) captures with `cprofile`/`trace_file` do not
+    get python stacks (a warning is emitted) while another one is profiling.
+
+    Examples:
+        >>> with capture() as stats:
+                with Reader(src_path) as cog:
+                    cog.tile(x, y, z)
+        >>> stats["GET"]["count"]
+
+    """
+    if io not in IO_PARSERS:
+        raise ValueError(f"Unsupported {io} IO backend")
+
+    if io == "fsspec":
+        # fsspec does not log its requests (see `tilebench.fsspec_io`)
+        from tilebench.fsspec_io import instrument
+
+        instrument()
+
+    results: Dict[str, Any] = {}
+
+    logger = logging.getLogger(io)
+    logger.setLevel(logging.DEBUG)
+    handler = _LogRecorder()
+    logger.addHandler(handler)
+    nested = bool(_active_handlers.get())
+    token = _active_handlers.set((*_active_handlers.get(), handler))
+
+    gdal_config = {**(config or {}), "CPL_DEBUG": "ON", "CPL_CURL_VERBOSE": "YES"}
+
+    prof = None
+    try:
+        with _gdal_env(nested=nested, **gdal_config):
+            with Timer() as t:
+                if cprofile or trace_file:
+                    prof = _enable_profiler()
+                try:
+                    yield results
+                finally:
+                    if prof:
+                        _disable_profiler(prof)
+
+    finally:
+        _active_handlers.reset(token)
+        logger.removeHandler(handler)
+        handler.close()
+
+    logs = handler.logs
+
+    parse_logs, parse_requests = IO_PARSERS[io]
+    results.update(parse_logs(logs))
+
+    results["Timing"] = t.elapsed
+    if cpu:
+        results["CPU"] = t.cpu
+
+    requests: List[Dict[str, Any]] = []
+    if timeline or tracing or trace_file or har_file or urls:
+        requests = parse_requests(logs, handler.timestamps, handler.threads)
+
+    results.update(_requests_results(requests, t.start, timeline=timeline, urls=urls))
+
+    if connections:
+        results["Connections"] = parse_connections(logs)
+
+    if cprofile and prof:
+        results["cprofile"] = _cprofile_lines(prof)
+
+    if pricing is not None:
+        results["Cost"] = tile_cost(results, pricing)
+
+    if not kernels:
+        results.pop("WarpKernels")
+
+    if raw:
+        results["logs"] = logs
+
+    if session is not None:
+        session.record(results, label=label)
+
+    _export_requests(
+        name,
+        t,
+        requests,
+        results,
+        tracing=tracing,
+        trace_file=trace_file,
+        har_file=har_file,
+        logs=logs if io == "rasterio" else None,
+        timestamps=handler.timestamps,
+        prof=prof,
+    )
+
+
+def _run_capture(warmup: bool, options: Dict[str, Any], **kwargs):
+    """Capture a measured run (or a warmup run, only with the GDAL config)."""
+    if warmup:
+        return capture(config=options["config"], io=options["io"])
+
+    return capture(**options, **kwargs)
+
+
+def _runs_results(runs: List[Dict[str, Any]], warmup: int = 0) -> Dict[str, Any]:
+    """Results of the last run, with the `Repeat` summary of all the runs."""
+    from tilebench.repeat import summarize_runs
+
+    results = runs[-1]
+    results["Repeat"] = summarize_runs(runs, warmup=warmup)
+    if results["Repeat"]["io_mismatch"]:
+        log.warning(f"IO counts differ between runs: {results['Repeat']['io_mismatch']}")
+
+    return results
+
+
 def profile(
     kernels: bool = False,
     add_to_return: bool = False,
@@ -105,66 +915,112 @@ def profile(
     cprofile: bool = False,
     config: Optional[Dict] = None,
     io="rasterio",
+    session: Optional[Session] = None,
+    label: Union[str, Callable[..., Any]] = "all",
+    tracing: bool = False,
+    timeline: bool = False,
+    trace_file: Optional[str] = None,
+    har_file: Optional[str] = None,
+    urls: bool = False,
+    connections: bool = False,
+    repeat: int = 1,
+    warmup: int = 0,
+    pricing: Optional[Pricing] = None,
 ):
-    """Profiling."""
-    if io not in ["rasterio", "vsifile"]:
+    """Profiling.
+
+    Works with both synchronous and asynchronous (`async def`) functions.
+
+    Results are recorded in `session` if provided, grouped by `label` which can be
+    a string or a callable receiving the wrapped function arguments.
+
+    With `repeat` (and `warmup`), the function is called `warmup` times (not measured)
+    and then `repeat` times. The results (and return value) are the ones of the last
+    run, with a `CPU` entry and a `Repeat` entry summarizing all the runs: wall and CPU
+    time statistics, runs whose IO counts differ from the others (`io_mismatch`) and
+    runs with an outlier wall time (see `tilebench.repeat.summarize_runs`).
+
+    With `pricing` (see `tilebench.cost.load_pricing`), a `Cost` entry is added with the
+    object storage cost of the call and the projected cost for one million calls.
+
+    """
+    if io not in IO_PARSERS:
         raise ValueError(f"Unsupported {io} IO backend")
 
-    def wrapper(func: Callable):
-        """Wrap a function."""
+    if repeat < 1 or warmup < 0:
+        raise ValueError("`repeat` must be greater than 0 and `warmup` positive")
 
-        def wrapped_f(*args, **kwargs):
-            """Wrapped function."""
-            io_stream = StringIO()
-            logger = logging.getLogger(io)
-            logger.setLevel(logging.DEBUG)
-            handler = logging.StreamHandler(io_stream)
-            logger.addHandler(handler)
+    repeated = repeat > 1 or warmup > 0
 
-            gdal_config = config or {}
-            gdal_config.update({"CPL_DEBUG": "ON", "CPL_CURL_VERBOSE": "YES"})
+    options = {
+        "kernels": kernels,
+        "raw": raw,
+        "cprofile": cprofile,
+        "config": config,
+        "io": io,
+        "session": session,
+        "tracing": tracing,
+        "timeline": timeline,
+        "trace_file": trace_file,
+        "har_file": har_file,
+        "urls": urls,
+        "connections": connections,
+        "cpu": repeated,
+        "pricing": pricing,
+    }
+
+    def _label(*args, **kwargs) -> Any:
+        return label(*args, **kwargs) if callable(label) else label
 
-            with rasterio.Env(**gdal_config):
-                with Timer() as t:
-                    prof = cProfile.Profile()
-                    retval = prof.runcall(func, *args, **kwargs)
-                    profile_stream = StringIO()
-                    ps = pstats.Stats(prof, stream=profile_stream)
-                    ps.strip_dirs().sort_stats("time", "ncalls").print_stats()
+    def _output(retval: Any, runs: List[Dict[str, Any]]):
+        results = _runs_results(runs, warmup=warmup) if repeated else runs[0]
+        if not quiet:
+            log.info(json.dumps(results))
 
-            logger.removeHandler(handler)
-            handler.close()
+        if add_to_return:
+            return retval, results
 
-            logs = io_stream.getvalue().splitlines()
-            profile_lines = [p for p in profile_stream.getvalue().splitlines() if p]
+        return retval
 
-            results = {}
-            if io == "vsifile":
-                results.update(parse_vsifile_io_logs(logs))
-            else:
-                results.update(parse_rasterio_io_logs(logs))
+    def wrapper(func: Callable):
+        """Wrap a function."""
+        if inspect.iscoroutinefunction(func):
 
-            results["Timing"] = t.elapsed
+            @functools.wraps(func)
+            async def async_wrapped_f(*args, **kwargs):
+                """Wrapped coroutine function."""
+                runs = []
+                for run in range(warmup + repeat):
+                    with _run_capture(
+                        run < warmup,
+                        options,
+                        label=_label(*args, **kwargs),
+                        name=func.__qualname__,
+                    ) as results:
+                        retval = await func(*args, **kwargs)
 
-            if cprofile:
-                stats_to_print = [
-                    p for p in profile_lines[3:] if float(p.split()[1]) > 0.0
-                ]
-                results["cprofile"] = [profile_lines[2], *stats_to_print]
+                    runs.append(results)
 
-            if not kernels:
-                results.pop("WarpKernels")
+                return _output(retval, runs[warmup:])
 
-            if raw:
-                results["logs"] = logs
+            return async_wrapped_f
 
-            if not quiet:
-                log.info(json.dumps(results))
+        @functools.wraps(func)
+        def wrapped_f(*args, **kwargs):
+            """Wrapped function."""
+            runs = []
+            for run in range(warmup + repeat):
+                with _run_capture(
+                    run < warmup,
+                    options,
+                    label=_label(*args, **kwargs),
+                    name=func.__qualname__,
+                ) as results:
+                    retval = func(*args, **kwargs)
 
-            if add_to_return:
-                return retval, results
+                runs.append(results)
 
-            return retval
+            return _output(retval, runs[warmup:])
 
         return wrapped_f
 
@@ -185,9 +1041,13 @@ class Timer(object):
     def __enter__(self):
         """Start timer."""
         self.start = time.time()
+        self._counter = time.perf_counter()
+        self._cpu = time.process_time()
         return self
 
     def __exit__(self, ty, val, tb):
         """Stop timer."""
         self.end = time.time()
-        self.elapsed = self.end - self.start
+        # Monotonic (and more precise) clock for the durations
+        self.elapsed = time.perf_counter() - self._counter
+        self.cpu = time.process_time() - self._cpu
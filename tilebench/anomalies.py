@@ -0,0 +1,427 @@
+"""Tile cost anomalies (tiles much more expensive than their neighbours or layout)."""
+
+import statistics
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+import morecantile
+import rasterio
+from rasterio._path import _parse_path as parse_path
+from rio_tiler.io import BaseReader, Reader
+
+from tilebench import capture
+from tilebench.codec import block_layout
+from tilebench.manifest import parse_tile, tile_id
+from tilebench.overviews import DEFAULT_TMS, ifd_levels, select_level
+from tilebench.sampling import tile_pixel_bounds
+from tilebench.variants import sample_tiles
+
+
+def _gdal_config(src_path: str, config: Optional[Dict] = None) -> Dict:
+    """GDAL config of the profiled reads (no directory listing, no cache)."""
+    return {
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+        "CPL_VSIL_CURL_NON_CACHED": parse_path(src_path).as_vsi(),
+        **(config or {}),
+    }
+
+
+def profile_open(
+    src_path: str,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+    reader: Type[BaseReader] = Reader,
+    reader_params: Optional[Dict] = None,
+    config: Optional[Dict] = None,
+) -> Dict[str, int]:
+    """HEAD/GET counts and bytes of the dataset open (paid by each profiled tile)."""
+    with capture(config=_gdal_config(src_path, config)) as stats:
+        with reader(src_path, tms=tms, **(reader_params or {})):
+            pass
+
+    return {
+        "HEAD": stats["HEAD"]["count"],
+        "GET": stats["GET"]["count"],
+        "bytes": stats["GET"]["bytes"],
+    }
+
+
+def profile_tiles(
+    src_path: str,
+    tiles: Sequence[morecantile.Tile],
+    tilesize: int = 256,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+    reader: Type[BaseReader] = Reader,
+    reader_params: Optional[Dict] = None,
+    config: Optional[Dict] = None,
+) -> List[Dict[str, Any]]:
+    """Profile tiles (the dataset is opened for each tile, without cache).
+
+    Returns:
+        list: `tile` (Z-X-Y), `HEAD`/`GET` counts, `bytes`, `Timing` and `masked` (the
+        output image is fully masked) of each tile.
+
+    """
+    gdal_config = _gdal_config(src_path, config)
+
+    records = []
+    for tile in tiles:
+        with capture(config=gdal_config) as stats:
+            with reader(src_path, tms=tms, **(reader_params or {})) as src:
+                img = src.tile(tile.x, tile.y, tile.z, tilesize=tilesize)
+
+        records.append(
+            {
+                "tile": tile_id(tile),
+                "HEAD": stats["HEAD"]["count"],
+                "GET": stats["GET"]["count"],
+                "bytes": stats["GET"]["bytes"],
+                "Timing": stats["Timing"],
+                "masked": bool(img.array.mask.all()),
+            }
+        )
+
+    return records
+
+
+def _level_blocks(src_path: str, level: int) -> Optional[List[Dict[str, Any]]]:
+    """Block layout of an IFD level (None if not available)."""
+    options = {"OVERVIEW_LEVEL": level - 1} if level else {}
+    with rasterio.open(src_path, **options) as src_dst:
+        try:
+            return block_layout(src_dst)
+        except ValueError:
+            return None
+
+
+def _intersects(window, bounds) -> bool:
+    """Check if a block window intersects pixel bounds."""
+    col0, row0, col1, row1 = (round(v, 6) for v in bounds)
+    return (
+        col0 < window.col_off + window.width
+        and col1 > window.col_off
+        and row0 < window.row_off + window.height
+        and row1 > window.row_off
+    )
+
+
+def _chunk_bytes(blocks: List[Dict[str, Any]], chunk_size: int) -> int:
+    """Bytes to fetch blocks in chunks of `chunk_size` bytes."""
+    chunks = {
+        i
+        for block in blocks
+        for i in range(
+            block["offset"] // chunk_size,
+            (block["offset"] + block["size"] - 1) // chunk_size + 1,
+        )
+    }
+    return len(chunks) * chunk_size
+
+
+def predict_tiles(
+    src_path: str,
+    tiles: Sequence[morecantile.Tile],
+    tilesize: int = 256,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+    chunk_size: int = 16384,
+) -> Dict[str, Dict[str, Any]]:
+    """Predict the blocks read by each tile from the IFDs block layout.
+
+    Blocks are fetched in chunks of `chunk_size` bytes (GDAL's
+    `CPL_VSIL_CURL_CHUNK_SIZE`), with at most one GET per block.
+
+    Returns:
+        dict: Per tile (Z-X-Y), the IFD `level` GDAL reads, the number of `blocks`
+        (and of `GET`) and the `bytes` to fetch them (None if the layout is not
+        available, e.g. not a GeoTIFF), the read `amplification` (source pixels per
+        output pixel) and the `full_resolution` flag for tiles read from the full
+        resolution because overviews are missing.
+
+    """
+    ifd = ifd_levels(src_path, tms)
+    native = ifd[0]
+
+    layouts: Dict[int, Optional[List[Dict[str, Any]]]] = {}
+    predictions = {}
+    with rasterio.open(src_path) as src_dst:
+        for tile in tiles:
+            matrix = tms.matrix(tile.z)
+            resolution = matrix.cellSize * matrix.tileWidth / tilesize
+            level = select_level(ifd, resolution)
+            if level["Level"] not in layouts:
+                layouts[level["Level"]] = _level_blocks(src_path, level["Level"])
+
+            prediction: Dict[str, Any] = {
+                "level": level["Level"],
+                "blocks": None,
+                "GET": None,
+                "bytes": None,
+                "amplification": (resolution / level["MercatorResolution"]) ** 2,
+                "full_resolution": level["Level"] == 0
+                and resolution / native["MercatorResolution"] >= 2,
+            }
+
+            blocks = layouts[level["Level"]]
+            if blocks is not None:
+                bounds = tile_pixel_bounds(tile, src_dst, level, tms)
+                blocks = [b for b in blocks if _intersects(b["window"], bounds)]
+                prediction.update(
+                    {
+                        "blocks": len(blocks),
+                        "GET": len(blocks),
+                        "bytes": _chunk_bytes(blocks, chunk_size),
+                    }
+                )
+
+            predictions[tile_id(tile)] = prediction
+
+    return predictions
+
+
+def _peers(
+    record: Dict[str, Any], records: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Neighbour tiles (or other tiles of the zoom) to compare a tile with."""
+    tile = parse_tile(record["tile"])
+    others = [
+        (parse_tile(r["tile"]), r)
+        for r in records
+        if r is not record and r["tile"].startswith(f"{tile.z}-")
+    ]
+    neighbours = [
+        r for t, r in others if abs(t.x - tile.x) <= 1 and abs(t.y - tile.y) <= 1
+    ]
+    if len(neighbours) >= 2:
+        return {"name": f"{len(neighbours)} neighbours", "records": neighbours}
+
+    if len(others) >= 2:
+        return {
+            "name": f"{len(others)} zoom {tile.z} tiles",
+            "records": [r for _, r in others],
+        }
+
+    return None
+
+
+def _neighbour_anomaly(
+    record: Dict[str, Any], peers: Dict[str, Any], factor: float
+) -> Optional[Dict[str, Any]]:
+    """GET count or bytes `factor` times above the median of the peers."""
+    medians = {
+        metric: statistics.median(r[metric] for r in peers["records"])
+        for metric in ["GET", "bytes"]
+    }
+    above = [
+        f"{metric} {record[metric]} vs {median:g}"
+        for metric, median in medians.items()
+        if record[metric] > factor * median
+    ]
+    if not above:
+        return None
+
+    return {
+        "type": "neighbours",
+        "explanation": f"{', '.join(above)} (median of {peers['name']})",
+        "excess": max(record["bytes"] - medians["bytes"], 0),
+    }
+
+
+def _layout_anomalies(
+    record: Dict[str, Any],
+    prediction: Dict[str, Any],
+    header: Dict[str, int],
+    tolerance: float,
+) -> List[Dict[str, Any]]:
+    """Tiles reading more than the block layout predicts or the full resolution."""
+    anomalies = []
+    if prediction["blocks"] is not None:
+        gets = header["GET"] + prediction["GET"]
+        nbytes = header["bytes"] + prediction["bytes"]
+        if record["GET"] > tolerance * gets or record["bytes"] > tolerance * nbytes:
+            anomalies.append(
+                {
+                    "type": "layout",
+                    "explanation": (
+                        f"GET {record['GET']} and {record['bytes']} bytes while the "
+                        f"block layout predicts {gets} GET and {nbytes} bytes "
+                        f"({prediction['blocks']} blocks of IFD level "
+                        f"{prediction['level']}, plus the dataset open)"
+                    ),
+                    "excess": max(record["bytes"] - nbytes, 0),
+                }
+            )
+
+    if prediction["full_resolution"]:
+        amplification = prediction["amplification"]
+        data = max(record["bytes"] - header["bytes"], 0)
+        anomalies.append(
+            {
+                "type": "full_resolution",
+                "explanation": (
+                    "read from the full resolution (missing overview), "
+                    f"{amplification:.1f} source pixels per output pixel"
+                ),
+                "excess": data - data / amplification,
+            }
+        )
+
+    return anomalies
+
+
+def detect_anomalies(
+    records: List[Dict[str, Any]],
+    predictions: Optional[Dict[str, Dict[str, Any]]] = None,
+    header: Optional[Dict[str, int]] = None,
+    factor: float = 2.0,
+    tolerance: float = 1.5,
+) -> List[Dict[str, Any]]:
+    """Flag anomalous tiles and rank them by the bytes they fetch in excess.
+
+    Anomalies:
+        - `neighbours`: GET count or bytes above `factor` times the median of the
+          neighbour tiles (or of the other tiles of the zoom, with less than 2
+          neighbours profiled).
+        - `layout`: GET count or bytes above `tolerance` times the ones predicted from
+          the blocks the tile intersects (plus the dataset open).
+        - `full_resolution`: tile read from the full resolution because overviews
+          are missing.
+        - `masked`: tile fetching data (more than the dataset open) and returning a
+          fully masked image.
+
+    Args:
+        records (list): Profiled tiles (see `profile_tiles`).
+        predictions (dict, optional): Predicted blocks per tile (see `predict_tiles`).
+        header (dict, optional): Dataset open GET count and bytes (see `profile_open`).
+        factor (float): Neighbours median factor.
+        tolerance (float): Predicted GET count and bytes tolerance.
+
+    Returns:
+        list: Anomalous tiles (records with their `rank`, `score`, `anomalies` and
+        `explanation`), the `score` is the number of bytes fetched in excess.
+
+    """
+    header = header or {"GET": 0, "bytes": 0}
+    predictions = predictions or {}
+
+    results = []
+    for record in records:
+        anomalies = []
+        peers = _peers(record, records)
+        if peers and (anomaly := _neighbour_anomaly(record, peers, factor)):
+            anomalies.append(anomaly)
+
+        if prediction := predictions.get(record["tile"]):
+            anomalies.extend(_layout_anomalies(record, prediction, header, tolerance))
+
+        if record["masked"] and record["GET"] > header["GET"]:
+            data = record["bytes"] - header["bytes"]
+            anomalies.append(
+                {
+                    "type": "masked",
+                    "explanation": (
+                        f"fetched {data} bytes of data "
+                        f"({record['GET'] - header['GET']} GET) "
+                        "but returned a fully masked image"
+                    ),
+                    "excess": max(data, 0),
+                }
+            )
+
+        if anomalies:
+            results.append(
+                {
+                    **record,
+                    "score": max(anomaly["excess"] for anomaly in anomalies),
+                    "anomalies": anomalies,
+                    "explanation": "; ".join(a["explanation"] for a in anomalies),
+                }
+            )
+
+    results = sorted(results, key=lambda r: r["score"], reverse=True)
+    return [{"rank": rank, **r} for rank, r in enumerate(results, 1)]
+
+
+def find_anomalies(
+    src_path: str,
+    zooms: Optional[Sequence[int]] = None,
+    tiles: Optional[Sequence[morecantile.Tile]] = None,
+    count: Optional[int] = None,
+    seed: Optional[int] = None,
+    tilesize: int = 256,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+    reader: Type[BaseReader] = Reader,
+    reader_params: Optional[Dict] = None,
+    config: Optional[Dict] = None,
+    layout: bool = True,
+    factor: float = 2.0,
+    tolerance: float = 1.5,
+) -> Dict[str, Any]:
+    """Profile tiles and rank the anomalous ones (see `detect_anomalies`).
+
+    Args:
+        src_path (str): Dataset path or URL.
+        zooms (list, optional): Zooms to take tiles from. Defaults to the dataset max zoom.
+        tiles (list, optional): Tiles to profile (instead of the tiles of `zooms`).
+        count (int, optional): Number of random tiles per zoom. Defaults to all the tiles.
+        seed (int, optional): Random seed.
+        tilesize (int): Output tile size.
+        tms (morecantile.TileMatrixSet): TileMatrixSet. Defaults to WebMercatorQuad.
+        reader (BaseReader): rio-tiler reader. Defaults to `rio_tiler.io.Reader`.
+        reader_params (dict, optional): Reader options.
+        config (dict, optional): GDAL configuration options.
+        layout (bool): Compare the tiles to the block layout (GDAL datasets only).
+        factor (float): Neighbours median factor.
+        tolerance (float): Predicted GET count and bytes tolerance.
+
+    Returns:
+        dict: Number of profiled `tiles`, dataset open cost (`header`) and the ranked
+        `anomalies`.
+
+    """
+    if tiles is None:
+        tiles = sample_tiles(src_path, zooms=zooms, count=count, seed=seed, tms=tms)
+
+    options: Dict[str, Any] = {
+        "tms": tms,
+        "reader": reader,
+        "reader_params": reader_params,
+        "config": config,
+    }
+    header = profile_open(src_path, **options)
+    records = profile_tiles(src_path, tiles, tilesize=tilesize, **options)
+    predictions = predict_tiles(src_path, tiles, tilesize, tms) if layout else None
+
+    return {
+        "tiles": len(records),
+        "header": header,
+        "anomalies": detect_anomalies(
+            records, predictions, header, factor=factor, tolerance=tolerance
+        ),
+    }
+
+
+def anomalies_geojson(
+    anomalies: List[Dict[str, Any]], tms: morecantile.TileMatrixSet = DEFAULT_TMS
+) -> Dict[str, Any]:
+    """GeoJSON FeatureCollection of the anomalous tiles (see `tilebench viz --anomalies`)."""
+    features = []
+    for record in anomalies:
+        w, s, e, n = tms.bounds(parse_tile(record["tile"]))
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[w, n], [w, s], [e, s], [e, n], [w, n]]],
+                },
+                "properties": {
+                    "rank": record["rank"],
+                    "tile": record["tile"],
+                    "score": record["score"],
+                    "GET": record["GET"],
+                    "bytes": record["bytes"],
+                    "types": [a["type"] for a in record["anomalies"]],
+                    "explanation": record["explanation"],
+                },
+            }
+        )
+
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,231 @@
+"""Chrome trace-event (Perfetto, chrome://tracing) export."""
+
+import json
+import pstats
+from typing import Any, Dict, List, Optional, Tuple
+
+PID = 1
+PHASES_TID = 1
+PYTHON_TID = 2
+HTTP_TID = 10  # first HTTP lane
+
+FuncKey = Tuple[str, int, str]
+
+
+def _us(seconds: float) -> float:
+    """Convert seconds to microseconds."""
+    return round(seconds * 1e6, 3)
+
+
+def parse_phases(
+    logs: List[str],
+    timestamps: List[float],
+    start: float,
+    end: float,
+) -> List[Dict[str, Any]]:
+    """Split a capture in `open`/`read` phases using GDAL Open/Close logs."""
+    phases = []
+    cursor = start
+    for line, ts in zip(logs, timestamps):
+        if "GDALOpen(" in line and "succeeds" in line:
+            name = line.split("GDALOpen(")[1].split(",")[0]
+            phases.append({"name": f"open {name}", "start": cursor, "end": ts})
+            cursor = ts
+
+        elif "GDALClose(" in line:
+            name = line.split("GDALClose(")[1].split(",")[0]
+            phases.append({"name": f"read {name}", "start": cursor, "end": ts})
+            cursor = ts
+
+    if phases and cursor < end:
+        phases.append({"name": "other", "start": cursor, "end": end})
+
+    return phases
+
+
+def _func_name(func: FuncKey) -> str:
+    filename, line, name = func
+    if filename == "~":  # built-in
+        return name
+
+    return f"{name} ({filename.split('/')[-1]}:{line})"
+
+
+def _profile_events(
+    stats: pstats.Stats,
+    origin: float,
+    min_duration: float,
+    max_depth: int = 64,
+) -> List[Dict[str, Any]]:
+    """Create events from cProfile stats.
+
+    cProfile only records aggregated times, functions are laid out as a flame graph
+    (callees placed one after the other inside their caller, sized by cumulative time).
+
+    """
+    raw: Dict[FuncKey, Any] = stats.stats  # type: ignore
+
+    children: Dict[FuncKey, List[Tuple[FuncKey, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, ct) in callers.items():
+            children.setdefault(caller, []).append((func, ct))
+
+    roots = [
+        (func, ct)
+        for func, (_, _, _, ct, callers) in raw.items()
+        if not any(caller in raw for caller in callers)
+        and "disable' of '_lsprof.Profiler" not in func[2]
+    ]
+
+    events: List[Dict[str, Any]] = []
+
+    def _add(func: FuncKey, start: float, duration: float, path: Tuple, depth: int):
+        events.append(
+            {
+                "name": _func_name(func),
+                "cat": "python",
+                "ph": "X",
+                "ts": _us(start - origin),
+                "dur": _us(duration),
+                "pid": PID,
+                "tid": PYTHON_TID,
+                "args": {"ncalls": raw[func][1], "cumtime": raw[func][3]},
+            }
+        )
+        if depth >= max_depth:
+            return
+
+        cursor = start
+        for child, ct in sorted(children.get(func, []), key=lambda c: -c[1]):
+            if child in path or ct < min_duration:
+                continue
+
+            # Recursive or shared callees can report more time than the caller
+            ct = min(ct, start + duration - cursor)
+            if ct <= 0:
+                break
+
+            _add(child, cursor, ct, (*path, child), depth + 1)
+            cursor += ct
+
+    cursor = origin
+    for func, ct in sorted(roots, key=lambda r: -r[1]):
+        if ct < min_duration:
+            continue
+        _add(func, cursor, ct, (func,), 0)
+        cursor += ct
+
+    return events
+
+
+def chrome_trace(
+    name: str,
+    start: float,
+    end: float,
+    requests: List[Dict[str, Any]],
+    phases: Optional[List[Dict[str, Any]]] = None,
+    stats: Optional[pstats.Stats] = None,
+    min_duration: float = 0.0005,
+) -> Dict[str, Any]:
+    """Create a Chrome trace-event document for a profiled read.
+
+    Args:
+        name (str): Read name.
+        start (float): Read start (`time.time()` timestamp).
+        end (float): Read end (`time.time()` timestamp).
+        requests (list): Requests from `parse_rasterio_requests`/`parse_vsifile_requests`.
+        phases (list, optional): Phases from `parse_phases`.
+        stats (pstats.Stats, optional): cProfile stats.
+        min_duration (float): Ignore python functions shorter than this (in seconds).
+
+    Returns:
+        dict: Trace document (`{"traceEvents": [...]}`).
+
+    """
+    events: List[Dict[str, Any]] = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": PID,
+            "tid": PHASES_TID,
+            "args": {"name": "tilebench"},
+        },
+        {
+            "name": name,
+            "cat": "tilebench",
+            "ph": "X",
+            "ts": 0,
+            "dur": _us(end - start),
+            "pid": PID,
+            "tid": PHASES_TID,
+        },
+    ]
+
+    for phase in phases or []:
+        events.append(
+            {
+                "name": phase["name"],
+                "cat": "phase",
+                "ph": "X",
+                "ts": _us(phase["start"] - start),
+                "dur": _us(phase["end"] - phase["start"]),
+                "pid": PID,
+                "tid": PHASES_TID,
+            }
+        )
+
+    if stats is not None:
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": PID,
+                "tid": PYTHON_TID,
+                "args": {"name": "python (cProfile, aggregated)"},
+            }
+        )
+        events.extend(_profile_events(stats, start, min_duration))
+
+    # Overlapping requests are placed on separate lanes
+    lanes: List[float] = []
+    for req in sorted(requests, key=lambda r: r["start"]):
+        lane = next((i for i, e in enumerate(lanes) if e <= req["start"]), None)
+        if lane is None:
+            lane = len(lanes)
+            lanes.append(req["end"])
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": PID,
+                    "tid": HTTP_TID + lane,
+                    "args": {"name": f"HTTP {lane}"},
+                }
+            )
+        lanes[lane] = req["end"]
+
+        events.append(
+            {
+                "name": f"{req['method']} {req['range'] or ''}".strip(),
+                "cat": "http",
+                "ph": "X",
+                "ts": _us(req["start"] - start),
+                "dur": _us(req["duration"]),
+                "pid": PID,
+                "tid": HTTP_TID + lane,
+                "args": {
+                    "url": req["url"],
+                    "status": req["status"],
+                    "bytes": req["bytes"],
+                    "connection": req["connection"],
+                },
+            }
+        )
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path: str, trace: Dict[str, Any]):
+    """Write a Chrome trace-event document."""
+    with open(path, "w") as f:
+        json.dump(trace, f)
@@ -0,0 +1,281 @@
+"""Compressed blocks decoding benchmark."""
+
+import math
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy
+import rasterio
+from rasterio import windows
+from rasterio._path import _parse_path as parse_path
+from rasterio.enums import Interleaving
+from rasterio.errors import NotGeoreferencedWarning
+from rasterio.io import MemoryFile
+
+from tilebench.session import Histogram
+
+
+def dims(total: int, chop: int):
+    """Given a total number of pixels, chop into equal chunks.
+
+    yeilds (offset, size) tuples
+    >>> list(dims(512, 256))
+    [(0, 256), (256, 256)]
+    >>> list(dims(502, 256))
+    [(0, 256), (256, 246)]
+    >>> list(dims(522, 256))
+    [(0, 256), (256, 256), (512, 10)]
+    """
+    for a in range(int(math.ceil(total / chop))):
+        offset = a * chop
+        yield offset, chop
+
+
+def block_windows(src_dst) -> Iterator[windows.Window]:
+    """Iterate over the internal blocks of a dataset (row by row).
+
+    Windows of the last row/column are clipped to the dataset size.
+    """
+    blockysize, blockxsize = src_dst.block_shapes[0]
+    for row_off, h in dims(src_dst.height, blockysize):
+        for col_off, w in dims(src_dst.width, blockxsize):
+            yield windows.Window(
+                col_off=col_off,
+                row_off=row_off,
+                width=min(w, src_dst.width - col_off),
+                height=min(h, src_dst.height - row_off),
+            )
+
+
+def block_layout(src_dst) -> List[Dict[str, Any]]:
+    """Get the window, band, offset and size (in bytes) of each compressed block.
+
+    Uses the `BLOCK_OFFSET_{x}_{y}`/`BLOCK_SIZE_{x}_{y}` items of GDAL's `TIFF`
+    metadata domain (GeoTIFF only). Pixel interleaved blocks hold all the bands.
+    Empty blocks (not written in sparse GeoTIFFs) are skipped.
+
+    """
+    if src_dst.driver != "GTiff":
+        raise ValueError("Block layout is only available for GeoTIFF")
+
+    blockysize, blockxsize = src_dst.block_shapes[0]
+
+    blocks = []
+    for window in block_windows(src_dst):
+        x = int(window.col_off // blockxsize)
+        y = int(window.row_off // blockysize)
+        for bidx in _block_bands(src_dst):
+            offset = src_dst.get_tag_item(f"BLOCK_OFFSET_{x}_{y}", "TIFF", bidx=bidx or 1)
+            size = src_dst.get_tag_item(f"BLOCK_SIZE_{x}_{y}", "TIFF", bidx=bidx or 1)
+            if not offset or not size or not int(size):
+                continue
+
+            blocks.append(
+                {
+                    "window": window,
+                    "band": bidx,
+                    "offset": int(offset),
+                    "size": int(size),
+                }
+            )
+
+    return blocks
+
+
+def _block_bands(src_dst) -> List[Optional[int]]:
+    """Bands of each block (`None` for pixel interleaved blocks)."""
+    if src_dst.interleaving == Interleaving.band:
+        return list(src_dst.indexes)
+
+    return [None]
+
+
+def read_bytes(src_path: str, offset: int, size: int) -> bytes:
+    """Read `size` bytes at `offset` of a file with GDAL.
+
+    The bytes are read as a raw (Byte) VRT band of the file, so any path GDAL can open
+    (local, HTTP(S), `s3://`, `/vsi...`) is supported, with the GDAL configuration of
+    the current environment. Bytes past the end of the file are read as zeros.
+
+    """
+    if size <= 0:
+        return b""
+
+    vsi_path = parse_path(src_path).as_vsi()
+    xml = (
+        f'<VRTDataset rasterXSize="{size}" rasterYSize="1">'
+        '<VRTRasterBand dataType="Byte" band="1" subClass="VRTRawRasterBand">'
+        f'<SourceFilename relativeToVRT="0">{escape(vsi_path)}</SourceFilename>'
+        f"<ImageOffset>{offset}</ImageOffset><PixelOffset>1</PixelOffset>"
+        f"<LineOffset>{size}</LineOffset></VRTRasterBand></VRTDataset>"
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with MemoryFile(xml.encode(), ext="vrt") as mem:
+            with mem.open() as src_dst:
+                return src_dst.read(1).tobytes()
+
+
+def _merge_ranges(
+    ranges: List[Tuple[int, int]], gap: int = 16384
+) -> List[Tuple[int, int]]:
+    """Merge (start, end) byte ranges closer than `gap` bytes."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+@contextmanager
+def _sparse_copy(regions: List[Tuple[int, bytes]]) -> Iterator[str]:
+    """Sparse in-memory copy of a file, made of (offset, data) regions.
+
+    The regions are stored in a `/vsimem/` file and mapped at their offsets with
+    GDAL's `/vsisparse/` virtual file system (unmapped bytes read as zeros).
+
+    """
+    with MemoryFile(b"".join(data for _, data in regions), ext="bin") as mem_data:
+        xml = ["<VSISparseFile>"]
+        source_offset = 0
+        for offset, data in regions:
+            xml.append(
+                f"<SubfileRegion><Filename>{mem_data.name}</Filename>"
+                f"<DestinationOffset>{offset}</DestinationOffset>"
+                f"<SourceOffset>{source_offset}</SourceOffset>"
+                f"<RegionLength>{len(data)}</RegionLength></SubfileRegion>"
+            )
+            source_offset += len(data)
+        xml.append("</VSISparseFile>")
+
+        with MemoryFile("".join(xml).encode(), ext="xml") as mem_xml:
+            yield f"/vsisparse/{mem_xml.name}"
+
+
+def _header_ranges(src_path: str) -> List[Tuple[int, int]]:
+    """Byte ranges of the TIFF header (IFDs and their tag data)."""
+    from tilebench.header import tiff_layout
+
+    layout = tiff_layout(src_path)
+    return _merge_ranges([(0, 16)] + [r for ifd in layout["ifds"] for r in ifd["ranges"]])
+
+
+def _read_blocks(
+    src_path: str, blocks: List[Dict[str, Any]], options: Dict[str, Any]
+) -> List[float]:
+    """Read (fetch and decode) every block with GDAL, in a newly opened dataset."""
+    timings = []
+    with rasterio.open(src_path, **options) as src_dst:
+        for block in blocks:
+            start = time.perf_counter()
+            src_dst.read(indexes=block["band"], window=block["window"])
+            timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def _stats(timings: List[float], nbytes: int) -> Dict[str, Any]:
+    """Total time, throughput and per-block latency summary."""
+    hist = Histogram()
+    for t in timings:
+        hist.add(t)
+
+    total = sum(timings)
+    return {
+        "time": total,
+        "MB/s": nbytes / total / 1e6 if total else None,
+        "block": hist.summary(),
+    }
+
+
+def benchmark_codec(
+    src_path: str,
+    ovr_level: Optional[int] = None,
+    max_blocks: Optional[int] = None,
+    config: Optional[Dict] = None,
+) -> Dict[str, Any]:
+    """Measure the network and decompression cost of the blocks of a COG.
+
+    1. `fetch`: raw compressed blocks are fetched through GDAL's virtual file systems
+       (one read, e.g. an HTTP Range request, per block), throughput is in compressed
+       MB/s. GDAL's cache of the file is disabled so `read` does not reuse them.
+    2. `read`: blocks are read with GDAL (fetch and decode).
+    3. `decode`: blocks are read again, without any IO, from an in-memory copy of the
+       header and of the compressed blocks fetched in 1. Throughput is in decompressed
+       MB/s.
+
+    Empty blocks (sparse GeoTIFFs) are skipped and counted in `empty_blocks`.
+
+    Args:
+        src_path (str): Path or URL of a GeoTIFF (any path GDAL can open).
+        ovr_level (int, optional): Overview level (`OVERVIEW_LEVEL` open option). Defaults to full resolution.
+        max_blocks (int, optional): Maximum number of blocks to benchmark.
+        config (dict, optional): GDAL configuration options.
+
+    Returns:
+        dict: Codec, predictor, block layout, number of (empty) blocks and sizes, and `fetch`, `read` and `decode` time, MB/s and per-block latency.
+
+    """
+    options = {"OVERVIEW_LEVEL": ovr_level} if ovr_level is not None else {}
+    env = {"CPL_VSIL_CURL_NON_CACHED": parse_path(src_path).as_vsi(), **(config or {})}
+
+    with rasterio.Env(**env):
+        with rasterio.open(src_path, **options) as src_dst:
+            structure = src_dst.tags(ns="IMAGE_STRUCTURE")
+            layout = block_layout(src_dst)
+            nblocks = len(list(block_windows(src_dst))) * len(_block_bands(src_dst))
+            blocks = layout[:max_blocks]
+            itemsizes = [numpy.dtype(dt).itemsize for dt in src_dst.dtypes]
+            info = {
+                "compression": structure.get("COMPRESSION", "NONE"),
+                "predictor": structure.get("PREDICTOR"),
+                "interleave": src_dst.interleaving.value
+                if src_dst.interleaving
+                else None,
+                "width": src_dst.width,
+                "height": src_dst.height,
+                "blocksize": src_dst.block_shapes[0],
+            }
+
+        compressed = sum(block["size"] for block in blocks)
+        decompressed = sum(
+            int(block["window"].width * block["window"].height)
+            * (itemsizes[block["band"] - 1] if block["band"] else sum(itemsizes))
+            for block in blocks
+        )
+
+        fetch = []
+        regions = []
+        for block in blocks:
+            start = time.perf_counter()
+            data = read_bytes(src_path, block["offset"], block["size"])
+            fetch.append(time.perf_counter() - start)
+            regions.append((block["offset"], data))
+
+        read = _read_blocks(src_path, blocks, options)
+
+        # Decode the fetched blocks (and the header) from memory, without any IO
+        regions.extend(
+            (start, read_bytes(src_path, start, end - start))
+            for start, end in _header_ranges(src_path)
+        )
+        with _sparse_copy(regions) as sparse_path:
+            decode = _read_blocks(sparse_path, blocks, options)
+
+    return {
+        **info,
+        "blocks": len(blocks),
+        "empty_blocks": nblocks - len(layout),
+        "compressed_bytes": compressed,
+        "decompressed_bytes": decompressed,
+        "ratio": decompressed / compressed if compressed else None,
+        "fetch": _stats(fetch, compressed),
+        "read": _stats(read, decompressed),
+        "decode": _stats(decode, decompressed),
+    }
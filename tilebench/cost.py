@@ -0,0 +1,152 @@
+"""Object storage cost model (requests and egress pricing)."""
+
+import copy
+import json
+from typing import Any, Dict, Optional
+
+import attr
+
+# 1 GB as billed by the cloud providers (GiB)
+GB = 1024**3
+
+# Indicative list prices (USD, us-east regions and internet egress first tier). Check
+# your provider pricing page and override them with a pricing file (see `load_pricing`).
+# Request prices are per 1,000 requests, `egress`/`retrieval` prices per GB. `tiers`
+# are the storage tiers (classes) overriding the request and retrieval prices.
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "s3": {
+        "get": 0.0004,
+        "head": 0.0004,
+        "list": 0.005,
+        "egress": 0.09,
+        "tiers": {
+            "standard-ia": {"get": 0.001, "head": 0.001, "list": 0.01, "retrieval": 0.01},
+            "glacier-ir": {"get": 0.01, "head": 0.01, "list": 0.02, "retrieval": 0.03},
+        },
+    },
+    "gcs": {
+        "get": 0.0004,
+        "head": 0.0004,
+        "list": 0.005,
+        "egress": 0.12,
+        "tiers": {
+            "nearline": {"get": 0.001, "head": 0.001, "list": 0.01, "retrieval": 0.01},
+            "coldline": {"get": 0.005, "head": 0.005, "list": 0.02, "retrieval": 0.02},
+        },
+    },
+    "azure": {
+        "get": 0.00044,
+        "head": 0.00044,
+        "list": 0.0065,
+        "egress": 0.087,
+        "tiers": {
+            "cool": {"get": 0.001, "head": 0.001, "retrieval": 0.01},
+        },
+    },
+}
+
+
+@attr.s(frozen=True)
+class Pricing:
+    """Object storage pricing.
+
+    Attributes:
+        name (str): Pricing name (preset or pricing file entry).
+        get (float): Price per 1,000 GET requests.
+        head (float): Price per 1,000 HEAD requests.
+        list (float): Price per 1,000 LIST requests (`fsspec` IO backend). Defaults to 0.
+        egress (float): Price per GB transferred (0 for in-region reads). Defaults to 0.
+        retrieval (float): Price per GB retrieved (infrequent access tiers). Defaults to 0.
+        tier (str, optional): Storage tier.
+
+    """
+
+    name: str = attr.ib()
+    get: float = attr.ib()
+    head: float = attr.ib()
+    list: float = attr.ib(default=0.0)
+    egress: float = attr.ib(default=0.0)
+    retrieval: float = attr.ib(default=0.0)
+    tier: Optional[str] = attr.ib(default=None)
+
+    def cost(
+        self, head: float = 0, get: float = 0, nbytes: float = 0, list: float = 0
+    ) -> Dict[str, float]:
+        """Cost of HEAD/GET/LIST requests and bytes transferred, and their `total`."""
+        costs = {
+            "HEAD": head * self.head / 1000,
+            "GET": get * self.get / 1000,
+            "LIST": list * self.list / 1000,
+            "egress": nbytes / GB * self.egress,
+            "retrieval": nbytes / GB * self.retrieval,
+        }
+        return {**costs, "total": sum(costs.values())}
+
+
+def load_pricing(
+    name: str = "s3",
+    tier: Optional[str] = None,
+    path: Optional[str] = None,
+    **overrides: float,
+) -> Pricing:
+    """Load a pricing preset (`s3`, `gcs` or `azure`).
+
+    Args:
+        name (str): Pricing name. Defaults to `s3`.
+        tier (str, optional): Storage tier of the pricing (e.g. `standard-ia`).
+        path (str, optional): JSON pricing file, whose entries override the presets
+            prices (e.g. `{"s3": {"egress": 0}}`, for in-region reads) or add new
+            pricings (e.g. `{"r2": {"get": 0.00036, "head": 0.00036}}`).
+        overrides (float): Prices overriding the pricing (and tier) ones.
+
+    Examples:
+        >>> load_pricing("s3", tier="standard-ia", egress=0)
+
+    """
+    presets = copy.deepcopy(PRESETS)
+    if path:
+        with open(path, "r") as f:
+            for key, prices in json.load(f).items():
+                preset = presets.setdefault(key, {})
+                tiers = {**preset.get("tiers", {}), **prices.pop("tiers", {})}
+                preset.update(prices, tiers=tiers)
+
+    if name not in presets:
+        raise ValueError(f"Unknown {name} pricing, available: {sorted(presets)}")
+
+    prices = presets[name]
+    tiers = prices.pop("tiers", {})
+    if tier is not None:
+        if tier not in tiers:
+            raise ValueError(f"Unknown {tier} tier for {name} pricing: {sorted(tiers)}")
+
+        prices.update(tiers[tier])
+
+    prices.update(overrides)
+    try:
+        return Pricing(name=name, tier=tier, **prices)
+    except TypeError as e:
+        raise ValueError(f"Invalid {name} pricing: {e}") from e
+
+
+def tile_cost(results: Dict[str, Any], pricing: Pricing) -> Dict[str, Any]:
+    """Cost of a `profile`/`capture` result.
+
+    Returns:
+        dict: `pricing` and `tier`, the cost of the `HEAD`, `GET` and `LIST` requests,
+        of the `egress` and `retrieval` bytes, the `total` cost and the projected cost
+        for one million reads (`per_million`).
+
+    """
+    costs = pricing.cost(
+        head=results["HEAD"]["count"],
+        get=results["GET"]["count"],
+        nbytes=results["GET"]["bytes"],
+        list=results.get("LIST", {}).get("count", 0),
+    )
+    return {
+        "pricing": pricing.name,
+        "tier": pricing.tier,
+        **costs,
+        "per_million": costs["total"] * 1e6,
+    }
@@ -0,0 +1,85 @@
+"""Output encoding benchmark."""
+
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from rio_tiler.models import ImageData
+
+FORMATS: List[Tuple[str, Dict[str, Any]]] = [
+    ("PNG", {"zlevel": 1}),
+    ("PNG", {"zlevel": 6}),
+    ("PNG", {"zlevel": 9}),
+    ("JPEG", {"quality": 85}),
+    ("WEBP", {"quality": 75}),
+    ("WEBP", {"lossless": True}),
+    ("JP2OpenJPEG", {}),
+    ("GTiff", {"compress": "deflate"}),
+    ("NPY", {}),
+]
+
+
+def benchmark_encoding(
+    img: ImageData,
+    formats: Optional[Sequence[Tuple[str, Dict[str, Any]]]] = None,
+    repeat: int = 1,
+) -> List[Dict[str, Any]]:
+    """Encode an image in many formats and measure the cost of each.
+
+    Args:
+        img (ImageData): Image (e.g. from a profiled `tile()` read).
+        formats (list, optional): `(format, creation options)` to benchmark. Defaults to `FORMATS`.
+        repeat (int): Number of encodings per format, the fastest is reported.
+
+    Returns:
+        list: `format`, `options`, `time` (wall, in seconds), `cpu` (process CPU time,
+        in seconds), `size` (output bytes) and `memory` (peak of the python/numpy
+        allocations, in bytes) for each format, or `error` if the format failed.
+
+    Note: memory allocated by GDAL drivers is not accounted in `memory`.
+
+    """
+    results = []
+    for img_format, options in formats or FORMATS:
+        entry: Dict[str, Any] = {"format": img_format, "options": options}
+        try:
+            timings = []
+            for _ in range(max(repeat, 1)):
+                tracing = tracemalloc.is_tracing()
+                if tracing:
+                    tracemalloc.reset_peak()
+                else:
+                    tracemalloc.start()
+
+                try:
+                    baseline, _ = tracemalloc.get_traced_memory()
+                    start, cpu_start = time.perf_counter(), time.process_time()
+                    content = img.render(img_format=img_format, **options)
+                    timings.append(
+                        (
+                            time.perf_counter() - start,
+                            time.process_time() - cpu_start,
+                        )
+                    )
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    if not tracing:
+                        tracemalloc.stop()
+
+        except Exception as e:  # noqa
+            entry["error"] = f"{type(e).__name__}: {e}"
+            results.append(entry)
+            continue
+
+        wall, cpu = min(timings)
+        entry.update(
+            {
+                "time": wall,
+                "cpu": cpu,
+                "size": len(content),
+                "memory": peak - baseline,
+            }
+        )
+        results.append(entry)
+
+    return results
@@ -0,0 +1,180 @@
+"""fsspec IO instrumentation (`fsspec` capture backend).
+
+fsspec filesystems do not log their requests, so the methods making requests are
+wrapped to emit one `FSSPEC_INFO` log line per call (on the `fsspec.tilebench`
+logger), parsed by `tilebench.parse_fsspec_io_logs`:
+
+- `info` (HEAD), `ls` (LIST) and `cat_file` (GET) of the filesystems (their `_info`,
+  `_ls` and `_cat_file` coroutines for async filesystems, e.g. HTTP, S3 or GCS)
+- `_fetch_range` (GET) of the buffered files (e.g. NetCDF/HDF5 files opened with
+  `fs.open`)
+
+Nested calls (e.g. `info` calling `ls`) are only logged once.
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+try:
+    from fsspec.asyn import AsyncFileSystem
+    from fsspec.spec import AbstractBufferedFile, AbstractFileSystem
+except ImportError:  # pragma: nocover
+    AsyncFileSystem = AbstractBufferedFile = AbstractFileSystem = None  # type: ignore
+
+logger = logging.getLogger("fsspec.tilebench")
+
+# Filesystem methods and the request they make
+FS_METHODS = {"info": "HEAD", "ls": "LIST", "cat_file": "GET"}
+
+_instrumented: Set[type] = set()
+_lock = threading.Lock()
+
+# Set while an instrumented call is running (nested calls are not logged)
+_in_request: ContextVar[bool] = ContextVar("tilebench_fsspec_request", default=False)
+
+
+def _request(obj: Any, args: Tuple, kwargs: Dict) -> Tuple[str, Optional[int]]:
+    """URL and start offset of a filesystem (or file) method call."""
+    if isinstance(obj, AbstractBufferedFile):
+        return obj.fs.unstrip_protocol(obj.path), args[0] if args else None
+
+    path = args[0] if args else kwargs.get("path", "")
+    start = args[1] if len(args) > 1 else kwargs.get("start")
+    return obj.unstrip_protocol(path), start
+
+
+def _log_request(
+    method: str,
+    obj: Any,
+    args: Tuple,
+    kwargs: Dict,
+    result: Any,
+    error: Optional[str],
+    duration: float,
+):
+    """Log one request."""
+    url, start = _request(obj, args, kwargs)
+    nbytes = len(result) if isinstance(result, (bytes, bytearray, memoryview)) else 0
+    has_range = nbytes and start is not None and start >= 0
+    rng = f"{start}-{start + nbytes - 1}" if has_range else "-"
+
+    logger.debug(
+        f"FSSPEC_INFO: {method} bytes={nbytes} range={rng} "
+        f"duration={duration:.6f} error={error or '-'} url={url}"
+    )
+
+
+def _wrap(func: Callable, method: str) -> Callable:
+    """Log the calls of a filesystem (or file) method."""
+    if getattr(func, "__tilebench__", False):
+        return func
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapped(self, *args, **kwargs):
+            if _in_request.get():
+                return await func(self, *args, **kwargs)
+
+            token = _in_request.set(True)
+            result, error = None, None
+            t0 = time.perf_counter()
+            try:
+                result = await func(self, *args, **kwargs)
+                return result
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                _in_request.reset(token)
+                duration = time.perf_counter() - t0
+                _log_request(method, self, args, kwargs, result, error, duration)
+
+        async_wrapped.__tilebench__ = True  # type: ignore
+        return async_wrapped
+
+    @functools.wraps(func)
+    def wrapped(self, *args, **kwargs):
+        if _in_request.get():
+            return func(self, *args, **kwargs)
+
+        token = _in_request.set(True)
+        result, error = None, None
+        t0 = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+            return result
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _in_request.reset(token)
+            duration = time.perf_counter() - t0
+            _log_request(method, self, args, kwargs, result, error, duration)
+
+    wrapped.__tilebench__ = True  # type: ignore
+    return wrapped
+
+
+def _instrument_class(cls: Any):
+    """Wrap the methods making requests defined by a filesystem (or file) class."""
+    if cls in _instrumented:
+        return
+
+    _instrumented.add(cls)
+    if issubclass(cls, AbstractBufferedFile):
+        names = {"_fetch_range": "GET"}
+    elif issubclass(cls, AsyncFileSystem):
+        names = {f"_{name}": method for name, method in FS_METHODS.items()}
+    else:
+        names = FS_METHODS
+
+    for name, method in names.items():
+        func = cls.__dict__.get(name)
+        if callable(func):
+            setattr(cls, name, _wrap(func, method))
+
+    if issubclass(cls, AbstractFileSystem):
+        # Cached instances hold sync versions of the (not wrapped) async methods
+        cls.clear_instance_cache()
+
+
+def _instrument_subclasses(base: type):
+    """Instrument a class, its subclasses and the subclasses defined later."""
+    classes = [base]
+    while classes:
+        cls = classes.pop()
+        _instrument_class(cls)
+        classes.extend(cls.__subclasses__())
+
+    init_subclass = base.__dict__.get("__init_subclass__")
+
+    def __init_subclass__(cls, **kwargs):
+        if init_subclass is not None:
+            init_subclass.__func__(cls, **kwargs)
+        else:
+            super(base, cls).__init_subclass__(**kwargs)
+
+        with _lock:
+            _instrument_class(cls)
+
+    base.__init_subclass__ = classmethod(__init_subclass__)  # type: ignore
+
+
+def instrument():
+    """Instrument the fsspec filesystems and files (once)."""
+    assert AbstractFileSystem is not None, (
+        "'fsspec' must be installed to use the fsspec IO backend (pip install tilebench[xarray])"
+    )
+
+    with _lock:
+        if AbstractFileSystem in _instrumented:
+            return
+
+        _instrument_subclasses(AbstractFileSystem)
+        _instrument_subclasses(AbstractBufferedFile)
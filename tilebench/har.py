@@ -0,0 +1,160 @@
+"""HAR (HTTP Archive 1.2) export."""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+_lock = threading.Lock()
+
+
+def _iso(ts: float) -> str:
+    """Convert a `time.time()` timestamp to ISO 8601."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _headers(headers: Dict[str, str]) -> List[Dict[str, str]]:
+    return [{"name": k, "value": v} for k, v in headers.items()]
+
+
+def _status_text(status: Optional[int]) -> str:
+    try:
+        return HTTPStatus(status).phrase if status else ""
+    except ValueError:
+        return ""
+
+
+def har_entry(req: Dict[str, Any], pageref: Optional[str] = None) -> Dict[str, Any]:
+    """Create a HAR entry from a `parse_rasterio_requests`/`parse_vsifile_requests` request."""
+    request_headers = dict(req["request_headers"])
+    if req["range"] and "Range" not in request_headers:
+        request_headers["Range"] = f"bytes={req['range']}"
+
+    response_headers = req["response_headers"]
+    http_version = req["http_version"] or ""
+    wait = req["duration"] * 1000
+
+    entry: Dict[str, Any] = {
+        "startedDateTime": _iso(req["start"]),
+        "time": wait,
+        "request": {
+            "method": req["method"],
+            "url": req["url"] or "",
+            "httpVersion": http_version,
+            "cookies": [],
+            "headers": _headers(request_headers),
+            "queryString": [
+                {"name": k, "value": v}
+                for k, v in parse_qsl(urlsplit(req["url"] or "").query)
+            ],
+            "headersSize": -1,
+            "bodySize": 0,
+        },
+        "response": {
+            "status": req["status"] or 0,
+            "statusText": _status_text(req["status"]),
+            "httpVersion": http_version,
+            "cookies": [],
+            "headers": _headers(response_headers),
+            "content": {
+                "size": req["bytes"],
+                "mimeType": response_headers.get(
+                    "Content-Type", "application/octet-stream"
+                ),
+            },
+            "redirectURL": response_headers.get("Location", ""),
+            "headersSize": -1,
+            "bodySize": req["bytes"],
+        },
+        "cache": {},
+        # Logs only give the request start and the response end
+        "timings": {
+            "blocked": -1,
+            "dns": -1,
+            "connect": -1,
+            "ssl": -1,
+            "send": 0,
+            "wait": wait,
+            "receive": 0,
+        },
+    }
+    if pageref:
+        entry["pageref"] = pageref
+    if req["connection"] is not None:
+        entry["connection"] = str(req["connection"])
+    if req["status"] is None:
+        entry["comment"] = "HTTP status and headers not available in the logs"
+
+    return entry
+
+
+def har_log(
+    name: str,
+    start: float,
+    end: float,
+    requests: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Create a HAR document with one page (the profiled read) and its requests.
+
+    Args:
+        name (str): Page title.
+        start (float): Read start (`time.time()` timestamp).
+        end (float): Read end (`time.time()` timestamp).
+        requests (list): Requests from `parse_rasterio_requests`/`parse_vsifile_requests`.
+
+    Returns:
+        dict: HAR document (`{"log": {...}}`).
+
+    """
+    from tilebench import __version__
+
+    page_id = f"page_{int(start * 1e6)}"
+    return {
+        "log": {
+            "version": "1.2",
+            "creator": {"name": "tilebench", "version": __version__},
+            "pages": [
+                {
+                    "startedDateTime": _iso(start),
+                    "id": page_id,
+                    "title": name,
+                    "pageTimings": {"onLoad": (end - start) * 1000},
+                }
+            ],
+            "entries": [har_entry(req, pageref=page_id) for req in requests],
+        }
+    }
+
+
+def write_har(path: str, har: Dict[str, Any]):
+    """Write a HAR document."""
+    with open(path, "w") as f:
+        json.dump(har, f)
+
+
+def append_har(path: str, har: Dict[str, Any], max_pages: Optional[int] = None):
+    """Append the pages and entries of a HAR document to a (rolling) HAR file.
+
+    When `max_pages` is set, the oldest pages (and their entries) are dropped.
+
+    """
+    with _lock:
+        if os.path.exists(path):
+            with open(path) as f:
+                log = json.load(f)["log"]
+            log["pages"].extend(har["log"]["pages"])
+            log["entries"].extend(har["log"]["entries"])
+        else:
+            log = har["log"]
+
+        if max_pages and len(log["pages"]) > max_pages:
+            log["pages"] = log["pages"][-max_pages:]
+            pages = {page["id"] for page in log["pages"]}
+            log["entries"] = [e for e in log["entries"] if e.get("pageref") in pages]
+
+        # Replace the file at once, so readers never see a partial document
+        write_har(f"{path}.tmp", {"log": log})
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,229 @@
+"""Dataset open cost and TIFF header layout."""
+
+import math
+import struct
+from typing import Any, Dict, List, Optional
+
+import rasterio
+from rasterio._path import _parse_path as parse_path
+
+from tilebench import capture
+from tilebench.codec import read_bytes
+
+CHUNK_SIZE = 16384
+
+# TIFF field types size (in bytes)
+TYPE_SIZES = {
+    1: 1,
+    2: 1,
+    3: 2,
+    4: 4,
+    5: 8,
+    6: 1,
+    7: 1,
+    8: 2,
+    9: 4,
+    10: 8,
+    11: 4,
+    12: 8,
+    13: 4,
+    16: 8,
+    17: 8,
+    18: 8,
+}
+TYPE_FORMATS = {3: "H", 4: "I", 13: "I", 16: "Q", 18: "Q"}
+
+STRIP_OFFSETS = 273
+TILE_OFFSETS = 324
+# Loaded lazily by GDAL (when reading blocks)
+STRILE_TAGS = (STRIP_OFFSETS, 279, TILE_OFFSETS, 325)
+
+
+class _ChunkedFile:
+    """Read a file by chunks (through GDAL, see `read_bytes`), keeping the fetched chunks."""
+
+    def __init__(self, src_path: str, chunk_size: int = CHUNK_SIZE):
+        self.src_path = src_path
+        self.chunk_size = chunk_size
+        self.chunks: Dict[int, bytes] = {}
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Read `size` bytes at `offset`."""
+        first = offset // self.chunk_size
+        last = (offset + size - 1) // self.chunk_size
+        for ix in range(first, last + 1):
+            if ix not in self.chunks:
+                self.chunks[ix] = read_bytes(
+                    self.src_path, ix * self.chunk_size, self.chunk_size
+                )
+
+        data = b"".join(self.chunks[ix] for ix in range(first, last + 1))
+        start = offset - first * self.chunk_size
+        return data[start : start + size]
+
+
+def _structural_metadata(f: _ChunkedFile, offset: int) -> Optional[Dict[str, str]]:
+    """Parse GDAL's COG `GDAL_STRUCTURAL_METADATA` ghost area (if any)."""
+    prefix = b"GDAL_STRUCTURAL_METADATA_SIZE="
+    if f.read(offset, len(prefix)) != prefix:
+        return None
+
+    size = int(f.read(offset + len(prefix), 6))
+    header = f.read(offset, 43 + size).decode(errors="ignore")
+    items = {}
+    for line in header.splitlines()[1:]:
+        if "=" in line:
+            key, value = line.split("=", 1)
+            items[key.strip()] = value.strip()
+
+    return items
+
+
+def tiff_layout(src_path: str) -> Dict[str, Any]:
+    """Locate the IFDs (and their out-of-line tag data) of a TIFF file.
+
+    Args:
+        src_path (str): Path or URL of a TIFF (any path GDAL can open), read with the
+            GDAL configuration of the current environment.
+
+    Returns:
+        dict: `bigtiff`, `ifds` (`offset`, `size`, `end`, including the tag data, and
+        byte `ranges`, of the IFD and its out-of-line tag data, of each IFD), `open_end` (end of what GDAL parses at open: the IFDs and their tag
+        data but the tile/strip offsets and byte counts, loaded when reading blocks),
+        `header_end` (end of the last IFD or tag data), `data_offset` (offset of the
+        first tile/strip), `contiguous` (all the IFDs and tag data are at the start of
+        the file, before any tile/strip) and the COG `structural_metadata`.
+
+    """
+    f = _ChunkedFile(src_path)
+
+    order = {b"II": "<", b"MM": ">"}.get(f.read(0, 2))
+    if order is None:
+        raise ValueError(f"{src_path} is not a TIFF file")
+
+    (version,) = struct.unpack(f"{order}H", f.read(2, 2))
+    bigtiff = version == 43
+    if bigtiff:
+        (ifd_offset,) = struct.unpack(f"{order}Q", f.read(8, 8))
+        count_fmt, entry_size, offset_fmt, inline_size = "Q", 20, "Q", 8
+        header_size = 16
+    elif version == 42:
+        (ifd_offset,) = struct.unpack(f"{order}I", f.read(4, 4))
+        count_fmt, entry_size, offset_fmt, inline_size = "H", 12, "I", 4
+        header_size = 8
+    else:
+        raise ValueError(f"{src_path} is not a TIFF file")
+
+    count_size = struct.calcsize(count_fmt)
+    offset_size = struct.calcsize(offset_fmt)
+
+    ifds: List[Dict[str, Any]] = []
+    data_offsets: List[int] = []
+    seen = set()
+    while ifd_offset and ifd_offset not in seen:
+        seen.add(ifd_offset)
+        (n,) = struct.unpack(f"{order}{count_fmt}", f.read(ifd_offset, count_size))
+        size = count_size + n * entry_size + offset_size
+        ifd = f.read(ifd_offset, size)
+
+        end = open_end = ifd_offset + size
+        ranges = [(ifd_offset, ifd_offset + size)]
+        for i in range(n):
+            entry = ifd[count_size + i * entry_size : count_size + (i + 1) * entry_size]
+            tag, dtype = struct.unpack(f"{order}HH", entry[:4])
+            (count,) = struct.unpack(f"{order}{offset_fmt}", entry[4 : 4 + offset_size])
+            nbytes = count * TYPE_SIZES.get(dtype, 1)
+
+            inline = nbytes <= inline_size
+            if not inline:
+                (value_offset,) = struct.unpack(
+                    f"{order}{offset_fmt}", entry[4 + offset_size :]
+                )
+                end = max(end, value_offset + nbytes)
+                ranges.append((value_offset, value_offset + nbytes))
+                if tag not in STRILE_TAGS:
+                    open_end = max(open_end, value_offset + nbytes)
+
+            if tag in (STRIP_OFFSETS, TILE_OFFSETS) and dtype in TYPE_FORMATS:
+                values = (
+                    entry[4 + offset_size : 4 + offset_size + nbytes]
+                    if inline
+                    else f.read(value_offset, nbytes)
+                )
+                fmt = f"{order}{count}{TYPE_FORMATS[dtype]}"
+                data_offsets.extend(v for v in struct.unpack(fmt, values) if v)
+
+        ifds.append(
+            {
+                "offset": ifd_offset,
+                "size": size,
+                "open_end": open_end,
+                "end": end,
+                "ranges": ranges,
+            }
+        )
+        (ifd_offset,) = struct.unpack(f"{order}{offset_fmt}", ifd[-offset_size:])
+
+    data_offset = min(data_offsets, default=None)
+    header_end = max(ifd["end"] for ifd in ifds)
+    open_end = max(ifd["open_end"] for ifd in ifds)
+
+    return {
+        "bigtiff": bigtiff,
+        "ifds": ifds,
+        "open_end": open_end,
+        "header_end": header_end,
+        "data_offset": data_offset,
+        "contiguous": data_offset is None or header_end <= data_offset,
+        "structural_metadata": _structural_metadata(f, header_size),
+    }
+
+
+def open_cost(src_path: str, config: Optional[Dict] = None) -> Dict[str, Any]:
+    """Profile a dataset opening (and the overviews IFD scan), without cache."""
+    gdal_config = {
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+        "CPL_VSIL_CURL_NON_CACHED": parse_path(src_path).as_vsi(),
+        **(config or {}),
+    }
+    with capture(config=gdal_config) as stats:
+        with rasterio.open(src_path) as src_dst:
+            src_dst.overviews(1)
+
+    return {key: stats[key] for key in ["HEAD", "GET", "Timing"]}
+
+
+def analyze_open(src_path: str, config: Optional[Dict] = None) -> Dict[str, Any]:
+    """Measure the open cost and recommend `GDAL_INGESTED_BYTES_AT_OPEN`.
+
+    The recommendation is the size of the header parsed at open (`open_end`: all the
+    IFDs and their tag data but the tile/strip offsets and byte counts) rounded up to
+    16KB, if the IFDs are contiguous at the start of the file. The dataset is then
+    opened again with the recommendation applied.
+
+    Returns:
+        dict: `open` cost, TIFF `layout`, `recommendation` (GDAL configuration options)
+        and `verified` open cost with the recommendation applied.
+
+    """
+    baseline = open_cost(src_path, config=config)
+    gdal_config = {
+        "CPL_VSIL_CURL_NON_CACHED": parse_path(src_path).as_vsi(),
+        **(config or {}),
+    }
+    with rasterio.Env(**gdal_config):
+        layout = tiff_layout(src_path)
+
+    recommendation: Dict[str, Any] = {}
+    verified = None
+    if layout["contiguous"]:
+        ingested = math.ceil(layout["open_end"] / CHUNK_SIZE) * CHUNK_SIZE
+        recommendation["GDAL_INGESTED_BYTES_AT_OPEN"] = ingested
+        verified = open_cost(src_path, config={**(config or {}), **recommendation})
+
+    return {
+        "open": baseline,
+        "layout": layout,
+        "recommendation": recommendation,
+        "verified": verified,
+    }
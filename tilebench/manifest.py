@@ -0,0 +1,187 @@
+"""Shardable benchmark manifests."""
+
+import importlib
+import json
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+import attr
+import morecantile
+from rasterio._path import _parse_path as parse_path
+from rio_tiler.io import BaseReader
+
+from tilebench import profile as profiler
+from tilebench.cost import Pricing
+from tilebench.session import Session
+
+
+def tile_id(tile: morecantile.Tile) -> str:
+    """Tile identifier (`{z}-{x}-{y}`), as stored in manifests and results."""
+    return f"{tile.z}-{tile.x}-{tile.y}"
+
+
+def parse_tile(tile: str) -> morecantile.Tile:
+    """Parse a `{z}-{x}-{y}` tile identifier."""
+    z, x, y = map(int, tile.split("-"))
+    return morecantile.Tile(x, y, z)
+
+
+@attr.s
+class Manifest:
+    """Tiles to profile and how to read them.
+
+    A manifest can be split in shards (round-robin over the tiles), run on different
+    machines (see `run_manifest`) and the results merged (see `merge_results`).
+
+    Examples:
+        >>> manifest = Manifest("https://...", tiles=[morecantile.Tile(0, 0, 0)])
+        >>> for shard in manifest.split(4):
+                shard.to_json(f"shard-{shard.shard}.json")
+
+    """
+
+    dataset: str = attr.ib()
+    tiles: List[morecantile.Tile] = attr.ib(factory=list)
+    tms: Union[str, Dict] = attr.ib(default="WebMercatorQuad")
+    tilesize: int = attr.ib(default=256)
+    reader: str = attr.ib(default="rio_tiler.io.Reader")
+    reader_params: Dict = attr.ib(factory=dict)
+    config: Dict = attr.ib(factory=dict)
+    shard: int = attr.ib(default=0)
+    shards: int = attr.ib(default=1)
+
+    def split(self, shards: int) -> List["Manifest"]:
+        """Split the tiles in `shards` manifests."""
+        if shards < 1:
+            raise ValueError("Number of shards must be greater than 0")
+
+        if self.shards != 1:
+            raise ValueError("Cannot split a manifest shard")
+
+        return [
+            attr.evolve(self, tiles=self.tiles[i::shards], shard=i, shards=shards)
+            for i in range(shards)
+        ]
+
+    def get_tms(self) -> morecantile.TileMatrixSet:
+        """TileMatrixSet (identifier or TileMatrixSet JSON)."""
+        if isinstance(self.tms, dict):
+            return morecantile.TileMatrixSet(**self.tms)
+
+        return morecantile.tms.get(self.tms)
+
+    def get_reader(self) -> Type[BaseReader]:
+        """rio-tiler Reader (module path)."""
+        module, classname = self.reader.rsplit(".", 1)
+        return getattr(importlib.import_module(module), classname)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the manifest."""
+        return {
+            **attr.asdict(self),
+            "tiles": [tile_id(tile) for tile in self.tiles],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Manifest":
+        """Load a serialized manifest (see `to_dict`)."""
+        return cls(**{**data, "tiles": [parse_tile(tile) for tile in data["tiles"]]})
+
+    def to_json(self, path: Optional[str] = None, **kwargs) -> str:
+        """Export the manifest as JSON (and write it to `path` if provided)."""
+        out = json.dumps(self.to_dict(), **kwargs)
+        if path:
+            with open(path, "w") as f:
+                f.write(out)
+
+        return out
+
+    @classmethod
+    def from_json(cls, path: str) -> "Manifest":
+        """Load a manifest JSON file."""
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def run_manifest(manifest: Manifest) -> Dict[str, Any]:
+    """Profile the tiles of a manifest (or shard).
+
+    Returns:
+        dict: `dataset`, `shard`, `shards`, number of `tiles` and the serialized
+        `Session` (grouped by zoom) to pass to `merge_results`.
+
+    """
+    tms = manifest.get_tms()
+    reader = manifest.get_reader()
+    session = Session()
+
+    @profiler(
+        quiet=True,
+        config={
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_NON_CACHED": parse_path(manifest.dataset).as_vsi(),
+            **manifest.config,
+        },
+        session=session,
+        label=lambda src_path, tile: tile.z,
+    )
+    def _read_tile(src_path: str, tile: morecantile.Tile):
+        with reader(src_path, tms=tms, **manifest.reader_params) as src:
+            return src.tile(tile.x, tile.y, tile.z, tilesize=manifest.tilesize)
+
+    for tile in manifest.tiles:
+        _read_tile(manifest.dataset, tile)
+
+    return {
+        "dataset": manifest.dataset,
+        "shard": manifest.shard,
+        "shards": manifest.shards,
+        "tiles": len(manifest.tiles),
+        "session": session.to_dict(),
+    }
+
+
+def merge_results(
+    results: Sequence[Dict[str, Any]], pricing: Optional[Pricing] = None
+) -> Dict[str, Any]:
+    """Merge the results of the shards of a manifest (see `run_manifest`).
+
+    Counts and sums are exact and percentiles come from the merged histograms, so the
+    result is the same as running the whole manifest at once (timings aside).
+
+    Returns:
+        dict: `dataset`, `shards`, number of `tiles`, the `summary` (per zoom, with the
+        `Cost` of the tiles with `pricing`) and the merged serialized `session`.
+
+    """
+    if not results:
+        raise ValueError("No results to merge")
+
+    datasets = {result["dataset"] for result in results}
+    if len(datasets) > 1:
+        raise ValueError(f"Cannot merge results of different datasets: {datasets}")
+
+    shards = {result["shards"] for result in results}
+    if len(shards) > 1:
+        raise ValueError(f"Cannot merge results of different splits: {shards}")
+
+    ids = [result["shard"] for result in results]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicated shards: {sorted(ids)}")
+
+    nshards = shards.pop()
+    missing = sorted(set(range(nshards)) - set(ids))
+    if missing:
+        warnings.warn(f"Missing shards: {missing}", UserWarning, stacklevel=2)
+
+    session = Session.from_dict(results[0]["session"])
+    for result in results[1:]:
+        session.merge(Session.from_dict(result["session"]))
+
+    return {
+        "dataset": datasets.pop(),
+        "shards": nshards,
+        "tiles": sum(result["tiles"] for result in results),
+        "summary": session.summary(pricing=pricing),
+        "session": session.to_dict(),
+    }
@@ -0,0 +1,100 @@
+"""rio-tiler read methods."""
+
+from typing import Any, Dict, Optional
+
+import morecantile
+from rio_tiler.io import BaseReader
+
+METHODS = ["tile", "part", "preview", "point", "feature", "statistics"]
+
+# Method arguments which, when missing, are derived from a tile
+TILE_ARGUMENTS = {
+    "tile": [],
+    "part": ["bbox"],
+    "point": ["lon", "lat"],
+    "feature": ["shape"],
+}
+
+
+def needs_tile(method: str, params: Optional[Dict] = None) -> bool:
+    """Check if a tile is needed to call `method` with `params`."""
+    if method not in TILE_ARGUMENTS:
+        return False
+
+    params = params or {}
+    return not TILE_ARGUMENTS[method] or any(
+        arg not in params for arg in TILE_ARGUMENTS[method]
+    )
+
+
+def read(
+    src_dst: BaseReader,
+    method: str = "tile",
+    tile: Optional[morecantile.Tile] = None,
+    tilesize: int = 256,
+    **kwargs: Any,
+) -> Any:
+    """Call a rio-tiler reader method.
+
+    When not provided, `part`, `point` and `feature` arguments are derived from `tile`:
+    the tile bounds (read at `tilesize`), the tile center and the tile polygon.
+
+    Args:
+        src_dst (BaseReader): rio-tiler reader.
+        method (str): Reader method (`tile`, `part`, `preview`, `point`, `feature` or `statistics`).
+        tile (morecantile.Tile, optional): Tile (in the reader TileMatrixSet).
+        tilesize (int): Output size for `tile` and tile derived `part`/`feature` reads.
+        kwargs (optional): Options to forward to the method.
+
+    Returns:
+        The method output (`ImageData`, `PointData` or statistics).
+
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported {method} method")
+
+    if needs_tile(method, kwargs) and tile is None:
+        raise ValueError(f"A tile is needed to call {method} without arguments")
+
+    tms = src_dst.tms
+    geographic_crs = tms.rasterio_geographic_crs
+
+    if method == "tile":
+        kwargs = {"tilesize": tilesize, **kwargs}
+        return src_dst.tile(tile.x, tile.y, tile.z, **kwargs)
+
+    if method == "part":
+        if "bbox" not in kwargs:
+            kwargs = {
+                "bbox": tuple(tms.bounds(tile)),
+                "bounds_crs": geographic_crs,
+                "max_size": tilesize,
+                **kwargs,
+            }
+        return src_dst.part(**kwargs)
+
+    if method == "point":
+        if "lon" not in kwargs or "lat" not in kwargs:
+            w, s, e, n = tms.bounds(tile)
+            kwargs = {
+                "lon": (w + e) / 2,
+                "lat": (s + n) / 2,
+                "coord_crs": geographic_crs,
+                **kwargs,
+            }
+        return src_dst.point(**kwargs)
+
+    if method == "feature":
+        if "shape" not in kwargs:
+            kwargs = {
+                "shape": tms.feature(tile)["geometry"],
+                "shape_crs": geographic_crs,
+                "max_size": tilesize,
+                **kwargs,
+            }
+        return src_dst.feature(**kwargs)
+
+    if method == "preview":
+        return src_dst.preview(**kwargs)
+
+    return src_dst.statistics(**kwargs)
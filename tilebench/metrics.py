@@ -0,0 +1,85 @@
+"""Tilebench Prometheus metrics."""
+
+from typing import Any, Dict, Optional
+
+from starlette.types import Scope
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: nocover
+    prometheus_client = None  # type: ignore
+
+UNMATCHED_ROUTE = "__unmatched__"
+
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100)
+BYTES_BUCKETS = tuple(1024 * 4**i for i in range(11))  # 1KiB -> 1GiB
+
+
+def route_template(scope: Scope) -> str:
+    """Get the route template (e.g `/tiles/{z}/{x}/{y}`) matched for a request.
+
+    Raw paths are never used, so the number of label values stays bounded.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class PrometheusMetrics:
+    """Per-route histograms of VSI statistics."""
+
+    def __init__(self, registry: Optional[Any] = None, namespace: str = "tilebench"):
+        """Create metrics in `registry` (a new CollectorRegistry by default)."""
+        assert prometheus_client is not None, (
+            "'prometheus-client' must be installed to use metrics (pip install tilebench[metrics])"
+        )
+
+        self.registry = registry or prometheus_client.CollectorRegistry()
+
+        labels = ["route"]
+        self.get_requests = prometheus_client.Histogram(
+            "get_requests",
+            "Number of GET requests per HTTP request.",
+            labels,
+            namespace=namespace,
+            buckets=COUNT_BUCKETS,
+            registry=self.registry,
+        )
+        self.get_bytes = prometheus_client.Histogram(
+            "get_bytes",
+            "Number of bytes fetched per HTTP request.",
+            labels,
+            namespace=namespace,
+            buckets=BYTES_BUCKETS,
+            registry=self.registry,
+        )
+        self.head_requests = prometheus_client.Histogram(
+            "head_requests",
+            "Number of HEAD requests per HTTP request.",
+            labels,
+            namespace=namespace,
+            buckets=COUNT_BUCKETS,
+            registry=self.registry,
+        )
+        self.request_duration = prometheus_client.Histogram(
+            "request_duration_seconds",
+            "HTTP request latency.",
+            labels,
+            namespace=namespace,
+            registry=self.registry,
+        )
+
+    def observe(self, route: str, results: Dict[str, Any], elapsed: float):
+        """Record parsed VSI statistics for one HTTP request."""
+        self.get_requests.labels(route).observe(results["GET"]["count"])
+        self.get_bytes.labels(route).observe(results["GET"]["bytes"])
+        self.head_requests.labels(route).observe(results["HEAD"]["count"])
+        self.request_duration.labels(route).observe(elapsed)
+
+    def render(self) -> bytes:
+        """Render metrics in Prometheus text format."""
+        return prometheus_client.generate_latest(self.registry)
+
+    @property
+    def content_type(self) -> str:
+        """Metrics response content-type."""
+        return prometheus_client.CONTENT_TYPE_LATEST
@@ -1,19 +1,47 @@
 """Tilebench middlewares."""
 
+import functools
+import itertools
 import logging
-from io import StringIO
-from typing import Dict, List, Optional
+import os
+import random
+from typing import Any, Dict, List, Optional
 
-import rasterio
-from starlette.datastructures import MutableHeaders
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from tilebench import parse_rasterio_io_logs, parse_vsifile_io_logs
+from tilebench import (
+    IO_PARSERS,
+    Timer,
+    _active_handlers,
+    _gdal_env,
+    _LogRecorder,
+    parse_connections,
+)
 
 
-class VSIStatsMiddleware(BaseHTTPMiddleware):
+def vsi_stats_header(results: Dict) -> str:
+    """Format VSI stats for the `VSI-Stats` header."""
+    head_results = "head;count={count}".format(**results["HEAD"])
+    get_results = "get;count={count};size={bytes}".format(**results["GET"])
+    ranges_results = "ranges; values={}".format("|".join(results["GET"]["ranges"]))
+    header = f"{head_results}, {get_results}, {ranges_results}"
+
+    if conn := results.get("Connections"):
+        retries, errors = conn["retries"], conn["errors"]
+        header += (
+            f", conn;new={conn['new']};reused={conn['reused']}"
+            f";tls={conn['tls_handshakes']};redirects={conn['redirects']}"
+            f";retries={retries['count']};backoff={retries['backoff']}"
+            f";4xx={errors['4xx']};5xx={errors['5xx']}"
+        )
+
+    return header
+
+
+class VSIStatsMiddleware:
     """MiddleWare to add VSI stats in response headers."""
 
     def __init__(
@@ -22,55 +50,259 @@ class VSIStatsMiddleware(BaseHTTPMiddleware):
         config: Optional[Dict] = None,
         exclude_paths: Optional[List] = None,
         io: str = "rasterio",
+        metrics: bool = False,
+        metrics_path: str = "/metrics",
+        registry: Optional[Any] = None,
+        tracing: bool = False,
+        sample_rate: float = 1.0,
+        sample_every: Optional[int] = None,
+        route_sample_rates: Optional[Dict[str, float]] = None,
+        force_header: Optional[str] = "X-VSI-Stats",
+        trailers: bool = False,
+        har_dir: Optional[str] = None,
+        har_file: Optional[str] = None,
+        har_max_pages: Optional[int] = 1000,
+        connections: bool = False,
     ) -> None:
-        """Init Middleware."""
-        super().__init__(app)
+        """Init Middleware.
+
+        Args:
+            app (ASGIApp): Starlette/FastAPI application.
+            config (dict, optional): GDAL configuration options.
+            exclude_paths (list, optional): Paths not handled by the middleware.
+            io (str): IO backend (`rasterio`, `vsifile` or `fsspec`).
+            metrics (bool): Record per-route Prometheus histograms and expose them at `metrics_path`.
+            metrics_path (str): Metrics endpoint path. Defaults to `/metrics`.
+            registry (prometheus_client.CollectorRegistry, optional): Registry for the metrics.
+            tracing (bool): Emit OpenTelemetry spans for each request and its HEAD/GET requests.
+            sample_rate (float): Fraction of the requests to capture. Defaults to 1 (all).
+            sample_every (int, optional): Capture every Nth request (overrides `sample_rate`).
+            route_sample_rates (dict, optional): Sample rates per path prefix (e.g `{"/tiles": 0.01}`), the longest matching prefix wins.
+            force_header (str, optional): Request header forcing the capture (e.g `X-VSI-Stats: 1`). Defaults to `X-VSI-Stats`.
+            trailers (bool): Also send the stats as a `VSI-Stats` HTTP trailer, including the requests made while streaming the response body (if supported by the server).
+            har_dir (str, optional): Write the HEAD/GET requests of each captured request to a HAR file in this directory.
+            har_file (str, optional): Append the HEAD/GET requests of each captured request (as one HAR page) to this rolling HAR file.
+            har_max_pages (int, optional): Maximum number of pages kept in `har_file`. Defaults to 1000.
+            connections (bool): Add connection diagnostics (new/reused connections, TLS handshakes, redirects, retries and 4xx/5xx responses) to the `VSI-Stats` header (`rasterio` IO backend only).
+
+        Requests that are not sampled are passed through without any log capture (but
+        with the GDAL `config` applied, so they behave like the sampled ones).
+
+        The `VSI-Stats` header is added when the response starts, so it only accounts for
+        the requests made before the response body is streamed.
+
+        """
+        self.app = app
         self.config: Dict = config or {}
         self.exclude_paths: List = exclude_paths or []
 
-        if io not in ["rasterio", "vsifile"]:
+        if io not in IO_PARSERS:
             raise ValueError(f"Unsupported {io} IO backend")
 
+        if io == "fsspec":
+            from tilebench.fsspec_io import instrument
+
+            instrument()
+
         self.io_backend = io
 
-    async def dispatch(self, request: Request, call_next):
-        """Add VSI stats in headers."""
+        self.metrics_path = metrics_path
+        self.metrics = None
+        if metrics:
+            # Optional integrations are imported only when enabled
+            from tilebench.metrics import PrometheusMetrics
 
-        if request.scope["path"] in self.exclude_paths:
-            return await call_next(request)
+            self.metrics = PrometheusMetrics(registry=registry)
+
+        self.tracing = tracing
+
+        self.sample_rate = sample_rate
+        self.sample_every = sample_every
+        self.route_sample_rates = dict(
+            sorted(
+                (route_sample_rates or {}).items(),
+                key=lambda item: len(item[0]),
+                reverse=True,
+            )
+        )
+        self.force_header = force_header
+        self.trailers = trailers
+        self._counter = itertools.count(1)
+
+        self.har_dir = har_dir
+        self.har_file = har_file
+        self.har_max_pages = har_max_pages
+        self.connections = connections
+        self._har_counter = itertools.count(1)
+        if har_dir:
+            os.makedirs(har_dir, exist_ok=True)
+
+    def sample(self, scope: Scope) -> bool:
+        """Check if VSI stats should be captured for the request."""
+        headers = Headers(scope=scope)
+        forced = headers.get(self.force_header, "") if self.force_header else ""
+        if forced.lower() in ["1", "true", "yes", "on"]:
+            return True
+
+        path = scope["path"]
+        for prefix, rate in self.route_sample_rates.items():
+            if path.startswith(prefix):
+                return random.random() < rate
+
+        if self.sample_every:
+            return next(self._counter) % self.sample_every == 0
+
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def parse(self, logs: List[str]) -> Dict:
+        """Parse IO logs."""
+        parse_logs, _ = IO_PARSERS[self.io_backend]
+        results = parse_logs(logs)
+        if self.io_backend == "rasterio" and self.connections:
+            results["Connections"] = parse_connections(logs)
+
+        return results
+
+    async def export_requests(
+        self, scope: Scope, route: str, t: Timer, requests: List[Dict], results: Dict
+    ):
+        """Export the requests as HAR files and OpenTelemetry spans."""
+        if self.har_dir or self.har_file:
+            from tilebench.har import append_har, har_log, write_har
+
+            har = har_log(f"{scope['method']} {scope['path']}", t.start, t.end, requests)
+            # Files are written in a worker thread, not to block the event loop
+            if self.har_dir:
+                name = f"{int(t.start * 1000)}-{next(self._har_counter)}.har"
+                await anyio.to_thread.run_sync(
+                    write_har, os.path.join(self.har_dir, name), har
+                )
+            if self.har_file:
+                await anyio.to_thread.run_sync(
+                    functools.partial(
+                        append_har, self.har_file, har, max_pages=self.har_max_pages
+                    )
+                )
+
+        if self.tracing:
+            from tilebench.tracing import emit_spans
+
+            emit_spans(
+                f"tilebench {scope['method']} {route}",
+                t.start,
+                t.end,
+                requests,
+                attributes={
+                    "http.route": route,
+                    "tilebench.head.count": results["HEAD"]["count"],
+                    "tilebench.get.count": results["GET"]["count"],
+                    "tilebench.get.bytes": results["GET"]["bytes"],
+                },
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.metrics and scope["path"] == self.metrics_path:
+            response = Response(
+                self.metrics.render(), media_type=self.metrics.content_type
+            )
+            await response(scope, receive, send)
+            return
+
+        if scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.sample(scope):
+            # Claim the request context, so its logs are not recorded by the sampled
+            # requests (records emitted outside any capture context are shared)
+            token = _active_handlers.set((_LogRecorder(),))
+            try:
+                with _gdal_env(**self.config):
+                    await self.app(scope, receive, send)
+            finally:
+                _active_handlers.reset(token)
+            return
+
+        send_trailers = self.trailers and "http.response.trailers" in scope.get(
+            "extensions", {}
+        )
 
-        io_stream = StringIO()
         logger = logging.getLogger(self.io_backend)
         logger.setLevel(logging.DEBUG)
-        handler = logging.StreamHandler(io_stream)
+        handler = _LogRecorder()
         logger.addHandler(handler)
+        token = _active_handlers.set((*_active_handlers.get(), handler))
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers["VSI-Stats"] = vsi_stats_header(
+                    self.parse(list(handler.logs))
+                )
+                if send_trailers:
+                    response_headers["Trailer"] = "VSI-Stats"
+                    message["trailers"] = True
 
-        gdal_config = {"CPL_DEBUG": "ON", "CPL_CURL_VERBOSE": "TRUE"}
-        with rasterio.Env(**gdal_config, **self.config):
-            response = await call_next(request)
+            elif (
+                send_trailers
+                and message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+            ):
+                await send(message)
+                await send(
+                    {
+                        "type": "http.response.trailers",
+                        "headers": [
+                            (
+                                b"vsi-stats",
+                                vsi_stats_header(self.parse(list(handler.logs))).encode(),
+                            )
+                        ],
+                        "more_trailers": False,
+                    }
+                )
+                return
 
-        logger.removeHandler(handler)
-        handler.close()
+            await send(message)
 
-        if io_stream:
-            logs = io_stream.getvalue().splitlines()
+        gdal_config = {**self.config, "CPL_DEBUG": "ON", "CPL_CURL_VERBOSE": "TRUE"}
+        try:
+            # The rasterio.Env is shared by the concurrent requests of the event loop
+            # (see `tilebench._gdal_env`), they can end in any order
+            with _gdal_env(**gdal_config):
+                with Timer() as t:
+                    await self.app(scope, receive, send_wrapper)
 
-            results = {}
-            if self.io_backend == "vsifile":
-                results.update(parse_vsifile_io_logs(logs))
-            else:
-                results.update(parse_rasterio_io_logs(logs))
+        finally:
+            _active_handlers.reset(token)
+            logger.removeHandler(handler)
+            handler.close()
 
-            head_results = "head;count={count}".format(**results["HEAD"])
-            get_results = "get;count={count};size={bytes}".format(**results["GET"])
-            ranges_results = "ranges; values={}".format(
-                "|".join(results["GET"]["ranges"])
-            )
-            response.headers["VSI-Stats"] = (
-                f"{head_results}, {get_results}, {ranges_results}"
-            )
+        logs = handler.logs
+        results = self.parse(logs)
+
+        if not (self.metrics or self.tracing or self.har_dir or self.har_file):
+            return
+
+        from tilebench.metrics import route_template
+
+        route = route_template(scope)
+        if self.metrics:
+            self.metrics.observe(route, results, t.elapsed)
+
+        if not (self.tracing or self.har_dir or self.har_file):
+            return
+
+        _, parse_requests = IO_PARSERS[self.io_backend]
+        requests = parse_requests(logs, handler.timestamps, handler.threads)
 
-        return response
+        await self.export_requests(scope, route, t, requests, results)
 
 
 class NoCacheMiddleware:
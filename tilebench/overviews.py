@@ -0,0 +1,206 @@
+"""Overview coverage and read amplification per TileMatrixSet zoom."""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import morecantile
+import rasterio
+from rasterio.io import DatasetReaderBase
+from rasterio.warp import calculate_default_transform
+
+DEFAULT_TMS = morecantile.tms.get("WebMercatorQuad")
+
+
+def _resolution(src_dst, tms: morecantile.TileMatrixSet) -> float:
+    """Dataset resolution in the TileMatrixSet CRS."""
+    dst_affine, _, _ = calculate_default_transform(
+        src_dst.crs,
+        tms.crs,
+        src_dst.width,
+        src_dst.height,
+        *src_dst.bounds,
+    )
+    return max(abs(dst_affine[0]), abs(dst_affine[4]))
+
+
+def ifd_levels(
+    src_path: str, tms: morecantile.TileMatrixSet = DEFAULT_TMS
+) -> List[Dict[str, Any]]:
+    """Get the size, block size, decimation, resolution and zoom of each IFD.
+
+    Level 0 is the full resolution, level `n` the overview `n - 1`.
+    """
+    with rasterio.open(src_path) as src_dst:
+        try:
+            blocksize = src_dst.block_shapes[0]
+        except Exception:
+            blocksize = src_dst.width
+
+        resolution = _resolution(src_dst, tms)
+        ifd = [
+            {
+                "Level": 0,
+                "Width": src_dst.width,
+                "Height": src_dst.height,
+                "Blocksize": blocksize,
+                "Decimation": 0,
+                "MercatorZoom": tms.zoom_for_res(resolution),
+                "MercatorResolution": resolution,
+            }
+        ]
+
+        try:
+            ovr = src_dst.overviews(1)
+        except Exception:
+            ovr = []
+
+    for ix, decim in enumerate(ovr):
+        with rasterio.open(src_path, OVERVIEW_LEVEL=ix) as ovr_dst:
+            resolution = _resolution(ovr_dst, tms)
+            ifd.append(
+                {
+                    "Level": ix + 1,
+                    "Width": ovr_dst.width,
+                    "Height": ovr_dst.height,
+                    "Blocksize": ovr_dst.block_shapes[0],
+                    "Decimation": decim,
+                    "MercatorZoom": tms.zoom_for_res(resolution),
+                    "MercatorResolution": resolution,
+                }
+            )
+
+    return ifd
+
+
+def reader_levels(
+    src_path: str, src_dst, tms: morecantile.TileMatrixSet = DEFAULT_TMS
+) -> List[Dict[str, Any]]:
+    """Get the IFDs of an open rio-tiler reader (see `ifd_levels`).
+
+    Readers which are not backed by a rasterio dataset (e.g. Xarray) only have the
+    full resolution level, read as one block.
+    """
+    if isinstance(getattr(src_dst, "dataset", None), DatasetReaderBase):
+        return ifd_levels(src_path, tms)
+
+    resolution = _resolution(src_dst, tms)
+    return [
+        {
+            "Level": 0,
+            "Width": src_dst.width,
+            "Height": src_dst.height,
+            "Blocksize": (src_dst.height, src_dst.width),
+            "Decimation": 0,
+            "MercatorZoom": tms.zoom_for_res(resolution),
+            "MercatorResolution": resolution,
+        }
+    ]
+
+
+def select_level(
+    ifd: List[Dict[str, Any]], resolution: float, threshold: float = 1.0
+) -> Dict[str, Any]:
+    """Select the IFD GDAL reads for an output `resolution`.
+
+    The coarsest IFD with a resolution finer than `resolution * threshold` (see
+    `GDAL_OVERVIEW_OVERSAMPLING_THRESHOLD`), or the full resolution.
+    """
+    selected = ifd[0]
+    for level in ifd[1:]:
+        # 1e-6 tolerance for the resolution rounding
+        if level["MercatorResolution"] <= resolution * threshold * (1 + 1e-6):
+            if level["MercatorResolution"] > selected["MercatorResolution"]:
+                selected = level
+
+    return selected
+
+
+def overview_coverage(
+    src_path: str,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+    minzoom: Optional[int] = None,
+    maxzoom: Optional[int] = None,
+    tilesize: int = 256,
+    max_amplification: float = 4.0,
+    threshold: float = 1.0,
+) -> Dict[str, Any]:
+    """Check which IFD serves each zoom and recommend overviews to cap read amplification.
+
+    The read amplification is the number of source pixels read per output pixel:
+    `(output resolution / IFD resolution) ** 2`. Zooms with an amplification above
+    `max_amplification` need an overview with the largest power of 2 decimation
+    below the zoom decimation. Overviews serving none of the zooms can be removed.
+
+    Args:
+        src_path (str): Dataset path or URL.
+        tms (morecantile.TileMatrixSet): TileMatrixSet. Defaults to WebMercatorQuad.
+        minzoom (int, optional): Defaults to the zoom where the dataset fits in one tile.
+        maxzoom (int, optional): Defaults to the full resolution zoom.
+        tilesize (int): Output tile size.
+        max_amplification (float): Maximum source pixels per output pixel.
+        threshold (float): Oversampling threshold used to select the overview.
+
+    Returns:
+        dict: `ifd` info, per zoom `zooms` (selected `level`, requested and selected
+        `decimation`, `amplification` and `full_resolution` flag for zooms read from
+        the full resolution because overviews are missing) and the `add`, `remove`
+        and `recommended` overview decimations.
+
+    """
+    ifd = ifd_levels(src_path, tms)
+    native = ifd[0]
+
+    if maxzoom is None:
+        maxzoom = native["MercatorZoom"]
+
+    if minzoom is None:
+        size = max(native["Width"], native["Height"])
+        minzoom = tms.zoom_for_res(
+            native["MercatorResolution"] * size / tms.matrix(0).tileWidth,
+            zoom_level_strategy="lower",
+        )
+        minzoom = min(minzoom, maxzoom)
+
+    existing = [level["Decimation"] for level in ifd[1:]]
+
+    zooms = []
+    used = set()
+    add = set()
+    for zoom in range(minzoom, maxzoom + 1):
+        matrix = tms.matrix(zoom)
+        resolution = matrix.cellSize * matrix.tileWidth / tilesize
+        level = select_level(ifd, resolution, threshold=threshold)
+        used.add(level["Level"])
+
+        decimation = resolution / native["MercatorResolution"]
+        amplification = (resolution / level["MercatorResolution"]) ** 2
+        zooms.append(
+            {
+                "zoom": zoom,
+                "resolution": resolution,
+                "decimation": decimation,
+                "level": level["Level"],
+                "level_decimation": level["MercatorResolution"]
+                / native["MercatorResolution"],
+                "amplification": amplification,
+                "full_resolution": level["Level"] == 0 and decimation >= 2,
+            }
+        )
+
+        if amplification > max_amplification and decimation >= 2:
+            needed = 2 ** int(math.floor(math.log2(decimation)))
+            if needed not in existing:
+                add.add(needed)
+
+    remove = [level["Decimation"] for level in ifd[1:] if level["Level"] not in used]
+
+    return {
+        "ifd": ifd,
+        "minzoom": minzoom,
+        "maxzoom": maxzoom,
+        "max_amplification": max_amplification,
+        "zooms": zooms,
+        "add": sorted(add),
+        "remove": remove,
+        "recommended": sorted((set(existing) - set(remove)) | add),
+    }
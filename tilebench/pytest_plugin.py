@@ -0,0 +1,208 @@
+"""pytest plugin: IO and latency budgets.
+
+The `tilebench_budget` fixture profiles a block of code (see `tilebench.capture`) and
+fails the test when the HEAD/GET counts, bytes or time are over budget, or over the
+values stored in the snapshot file (updated with `pytest --tilebench-update`).
+
+The plugin is not loaded automatically, enable it with `pytest -p tilebench.pytest_plugin`
+or `pytest_plugins = ["tilebench.pytest_plugin"]` in the root `conftest.py`.
+
+Examples:
+    >>> def test_tile(tilebench_budget):
+            with tilebench_budget(max_get=3, max_bytes=500_000) as stats:
+                with Reader("https://...") as src:
+                    src.tile(0, 0, 0)
+
+"""
+
+import contextlib
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+import attr
+import pytest
+
+from tilebench import capture
+
+# Metrics checked against the budgets and stored in the snapshot
+METRICS = ["HEAD", "GET", "bytes", "Timing"]
+
+
+def _measures(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """HEAD/GET counts, bytes and time of a `capture` result."""
+    return {
+        "HEAD": stats["HEAD"]["count"],
+        "GET": stats["GET"]["count"],
+        "bytes": stats["GET"]["bytes"],
+        "Timing": stats["Timing"],
+    }
+
+
+@attr.s
+class BudgetRecorder:
+    """Measures and snapshot of a pytest session."""
+
+    path: str = attr.ib()
+    update: bool = attr.ib(default=False)
+    tolerance: float = attr.ib(default=0.0)
+    time_tolerance: Optional[float] = attr.ib(default=None)
+
+    snapshot: Dict[str, Dict[str, Any]] = attr.ib(factory=dict)
+    rows: List[Dict[str, Any]] = attr.ib(factory=list)
+
+    def __attrs_post_init__(self):
+        """Load the snapshot."""
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.snapshot = json.load(f)
+
+    def check(
+        self, key: str, measures: Dict[str, Any], budgets: Dict[str, Any], snapshot: bool
+    ) -> List[str]:
+        """Compare measures to the budgets and the snapshot (or update the snapshot)."""
+        failures = [
+            f"{metric}: {measures[metric]} > {budget} (budget)"
+            for metric, budget in budgets.items()
+            if budget is not None and measures[metric] > budget
+        ]
+
+        if snapshot and self.update:
+            self.snapshot[key] = measures
+
+        elif snapshot and key not in self.snapshot:
+            failures.append(
+                f"no snapshot for `{key}` in {self.path} (run pytest --tilebench-update)"
+            )
+
+        elif snapshot:
+            baseline = self.snapshot[key]
+            for metric in METRICS:
+                tolerance = self.time_tolerance if metric == "Timing" else self.tolerance
+                if tolerance is None or metric not in baseline:
+                    continue
+
+                if measures[metric] > baseline[metric] * (1 + tolerance):
+                    failures.append(
+                        f"{metric}: {measures[metric]} > {baseline[metric]} (snapshot)"
+                    )
+
+        self.rows.append({"key": key, **measures, "failures": failures})
+        return failures
+
+    def write(self):
+        """Write the snapshot file."""
+        with open(self.path, "w") as f:
+            json.dump(self.snapshot, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+_recorder_key = pytest.StashKey[BudgetRecorder]()
+
+
+def pytest_addoption(parser):
+    """Add tilebench options."""
+    group = parser.getgroup("tilebench")
+    group.addoption(
+        "--tilebench-update",
+        action="store_true",
+        default=False,
+        help="Update the tilebench snapshot with the measured values.",
+    )
+    parser.addini(
+        "tilebench_snapshot",
+        default="tilebench_snapshot.json",
+        help="tilebench snapshot file (relative to the rootdir).",
+    )
+    parser.addini(
+        "tilebench_tolerance",
+        default="0.0",
+        help="Relative tolerance of HEAD/GET counts and bytes over the snapshot.",
+    )
+    parser.addini(
+        "tilebench_time_tolerance",
+        default="",
+        help="Relative tolerance of the time over the snapshot (not checked by default).",
+    )
+
+
+def pytest_configure(config):
+    """Create the session recorder."""
+    time_tolerance = config.getini("tilebench_time_tolerance")
+    config.stash[_recorder_key] = BudgetRecorder(
+        path=os.path.join(str(config.rootpath), config.getini("tilebench_snapshot")),
+        update=config.getoption("tilebench_update"),
+        tolerance=float(config.getini("tilebench_tolerance")),
+        time_tolerance=float(time_tolerance) if time_tolerance else None,
+    )
+
+
+def pytest_sessionfinish(session):
+    """Write the updated snapshot."""
+    recorder = session.config.stash.get(_recorder_key, None)
+    if recorder is not None and recorder.update and recorder.rows:
+        recorder.write()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Print the measures of the session."""
+    recorder = config.stash.get(_recorder_key, None)
+    if recorder is None or not recorder.rows:
+        return
+
+    terminalreporter.write_sep("=", "tilebench budgets")
+    width = max(len(row["key"]) for row in recorder.rows)
+    terminalreporter.write_line(
+        f"{'test':<{width}} {'HEAD':>5} {'GET':>5} {'bytes':>12} {'time':>9}  status"
+    )
+    for row in recorder.rows:
+        terminalreporter.write_line(
+            f"{row['key']:<{width}} {row['HEAD']:>5} {row['GET']:>5} "
+            f"{row['bytes']:>12} {row['Timing']:>9.4f}  "
+            f"{'FAIL' if row['failures'] else 'ok'}"
+        )
+
+    if recorder.update:
+        terminalreporter.write_line(f"snapshot updated: {recorder.path}")
+
+
+@pytest.fixture
+def tilebench_budget(request):
+    """Profile a block of code and check its HEAD/GET counts, bytes and time.
+
+    Arguments of the returned context manager:
+        name (str, optional): Name of the measure (to profile more than one block per test).
+        max_head (int, optional): HEAD requests budget.
+        max_get (int, optional): GET requests budget.
+        max_bytes (int, optional): Bytes budget.
+        max_time (float, optional): Time budget (in seconds).
+        snapshot (bool): Compare to (or update) the snapshot. Defaults to True.
+        kwargs: `tilebench.capture` options (e.g. `config`).
+
+    """
+    recorder = request.config.stash[_recorder_key]
+
+    @contextlib.contextmanager
+    def _budget(
+        name: Optional[str] = None,
+        max_head: Optional[int] = None,
+        max_get: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_time: Optional[float] = None,
+        snapshot: bool = True,
+        **kwargs: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        key = f"{request.node.nodeid}::{name}" if name else request.node.nodeid
+        with capture(**kwargs) as stats:
+            yield stats
+
+        failures = recorder.check(
+            key,
+            _measures(stats),
+            {"HEAD": max_head, "GET": max_get, "bytes": max_bytes, "Timing": max_time},
+            snapshot,
+        )
+        if failures:
+            pytest.fail(f"{key} over budget:\n" + "\n".join(failures), pytrace=False)
+
+    return _budget
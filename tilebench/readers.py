@@ -0,0 +1,99 @@
+"""rio-tiler readers for datasets read through fsspec."""
+
+from typing import Any, Dict, Optional
+
+import attr
+from morecantile import TileMatrixSet
+from rio_tiler.constants import WEB_MERCATOR_TMS
+from rio_tiler.io.xarray import XarrayReader as BaseXarrayReader
+from rio_tiler.io.xarray import Options
+
+try:
+    import fsspec
+    import xarray
+except ImportError:  # pragma: nocover
+    fsspec = None  # type: ignore
+    xarray = None  # type: ignore
+
+
+def open_dataset(
+    src_path: str,
+    group: Optional[str] = None,
+    engine: Optional[str] = None,
+    decode_times: bool = True,
+) -> "xarray.Dataset":
+    """Open a Zarr store or a NetCDF/HDF5 file (through fsspec).
+
+    The engine defaults to `zarr` for `.zarr` paths and `h5netcdf` otherwise. Zarr stores
+    must have consolidated metadata (HTTP servers do not list the stores).
+    """
+    assert xarray is not None and fsspec is not None, (
+        "'xarray' and 'fsspec' must be installed to use the Xarray reader (pip install tilebench[xarray])"
+    )
+
+    engine = engine or ("zarr" if src_path.rstrip("/").endswith(".zarr") else "h5netcdf")
+    options: Dict[str, Any] = {
+        "engine": engine,
+        "group": group,
+        "decode_times": decode_times,
+        "decode_coords": "all",
+    }
+    if engine == "zarr":
+        return xarray.open_dataset(src_path, consolidated=True, **options)
+
+    return xarray.open_dataset(fsspec.open(src_path).open(), **options)
+
+
+@attr.s
+class XarrayReader(BaseXarrayReader):
+    """rio-tiler XarrayReader opening a variable of a Zarr store or NetCDF file.
+
+    Attributes:
+        src_path (str): Dataset path or URL (read through fsspec).
+        variable (str): Variable (DataArray) name.
+        group (str, optional): Dataset group.
+        engine (str, optional): Xarray engine (see `open_dataset`).
+        decode_times (bool): Decode the time variables. Defaults to True.
+        tms (morecantile.TileMatrixSet, optional): TileMatrixSet grid definition. Defaults to `WebMercatorQuad`.
+
+    Examples:
+        >>> with capture(io="fsspec") as stats:
+                with XarrayReader("https://.../store.zarr", variable="tmax") as src:
+                    src.tile(x, y, z)
+
+    """
+
+    src_path: str = attr.ib()
+    variable: str = attr.ib()
+    group: Optional[str] = attr.ib(default=None)
+    engine: Optional[str] = attr.ib(default=None)
+    decode_times: bool = attr.ib(default=True)
+
+    tms: TileMatrixSet = attr.ib(default=WEB_MERCATOR_TMS)
+    options: Options = attr.ib()
+
+    ds: "xarray.Dataset" = attr.ib(init=False)
+    input: "xarray.DataArray" = attr.ib(init=False)
+
+    @options.default
+    def _options_default(self):
+        return {}
+
+    def __attrs_post_init__(self):
+        """Open the dataset and set the DataArray."""
+        self.ds = open_dataset(
+            self.src_path,
+            group=self.group,
+            engine=self.engine,
+            decode_times=self.decode_times,
+        )
+        self.input = self.ds[self.variable]
+        super().__attrs_post_init__()
+
+    def close(self):
+        """Close the dataset."""
+        self.ds.close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Support using with Context Managers."""
+        self.close()
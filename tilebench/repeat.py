@@ -0,0 +1,77 @@
+"""Statistics of repeated runs."""
+
+import math
+import statistics
+from typing import Any, Dict, List, Sequence
+
+# IO counts which should not change between runs
+IO_METRICS = ["HEAD", "GET", "bytes"]
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Percentile `q` (0-100) of the values (linear interpolation)."""
+    ordered = sorted(values)
+    rank = q / 100 * (len(ordered) - 1)
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def describe(values: Sequence[float]) -> Dict[str, float]:
+    """Min, median, p95, p99, mean and standard deviation of the values."""
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": statistics.fmean(values),
+        "stddev": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+def outliers(values: Sequence[float], k: float = 1.5) -> List[int]:
+    """Index of the values outside of Tukey's fences (`k` times the inter-quartile range).
+
+    At least 4 values are needed, no outliers are reported otherwise.
+    """
+    if len(values) < 4:
+        return []
+
+    q1, _, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    low = q1 - k * (q3 - q1)
+    high = q3 + k * (q3 - q1)
+    return [i for i, v in enumerate(values) if v < low or v > high]
+
+
+def summarize_runs(runs: List[Dict[str, Any]], warmup: int = 0) -> Dict[str, Any]:
+    """Summarize the results of repeated `profile` runs.
+
+    Returns:
+        dict: Number of `runs` and `warmup` runs, `wall` and `cpu` time statistics,
+        `samples` (time and IO counts of each run), `io_mismatch` (runs whose IO counts
+        differ from the most common ones) and `outliers` (runs with an outlier wall time).
+
+    """
+    samples = [
+        {
+            "wall": run["Timing"],
+            "cpu": run["CPU"],
+            "HEAD": run["HEAD"]["count"],
+            "GET": run["GET"]["count"],
+            "bytes": run["GET"]["bytes"],
+        }
+        for run in runs
+    ]
+
+    io = [tuple(sample[k] for k in IO_METRICS) for sample in samples]
+    expected = max(io, key=io.count)
+
+    return {
+        "runs": len(runs),
+        "warmup": warmup,
+        "wall": describe([sample["wall"] for sample in samples]),
+        "cpu": describe([sample["cpu"] for sample in samples]),
+        "samples": samples,
+        "io_mismatch": [i for i, counts in enumerate(io) if counts != expected],
+        "outliers": outliers([sample["wall"] for sample in samples]),
+    }
@@ -0,0 +1,342 @@
+"""Stratified tile sampling with confidence intervals."""
+
+import math
+import random
+import statistics
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import morecantile
+import rasterio
+from rasterio._path import _parse_path as parse_path
+from rasterio.warp import transform_bounds
+from rio_tiler.io import BaseReader, Reader
+
+from tilebench import capture
+from tilebench.overviews import DEFAULT_TMS, reader_levels, select_level
+
+# Metrics estimated per zoom (names of the `Session` summary)
+METRICS = ["GET", "bytes", "Timing"]
+
+
+def _metrics(stats: Dict[str, Any]) -> Dict[str, float]:
+    """GET count, bytes and latency of a `capture` result."""
+    return {
+        "GET": stats["GET"]["count"],
+        "bytes": stats["GET"]["bytes"],
+        "Timing": stats["Timing"],
+    }
+
+
+def tile_pixel_bounds(
+    tile: morecantile.Tile,
+    src_dst,
+    level: Dict[str, Any],
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+) -> Tuple[float, float, float, float]:
+    """Pixel bounds (`col0, row0, col1, row1`) of a tile in the IFD `level`."""
+    bounds = transform_bounds(tms.crs, src_dst.crs, *tms.xy_bounds(tile))
+    col0, row0 = ~src_dst.transform * (bounds[0], bounds[3])
+    col1, row1 = ~src_dst.transform * (bounds[2], bounds[1])
+
+    scale_x = src_dst.width / level["Width"]
+    scale_y = src_dst.height / level["Height"]
+    return (
+        min(col0, col1) / scale_x,
+        min(row0, row1) / scale_y,
+        max(col0, col1) / scale_x,
+        max(row0, row1) / scale_y,
+    )
+
+
+def tile_stratum(
+    tile: morecantile.Tile,
+    src_dst,
+    level: Dict[str, Any],
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+) -> str:
+    """Position of a tile relative to the internal block grid of the IFD it reads.
+
+    Returns:
+        str: Number of blocks the tile intersects horizontally and vertically (e.g.
+        `1x1` for a tile within one block, `2x2` for a tile across 4 blocks).
+
+    """
+    col0, row0, col1, row1 = tile_pixel_bounds(tile, src_dst, level, tms)
+    blockysize, blockxsize = level["Blocksize"]
+
+    nx = _block_span(col0, col1, blockxsize, level["Width"])
+    ny = _block_span(row0, row1, blockysize, level["Height"])
+    return f"{nx}x{ny}"
+
+
+def _block_span(start: float, end: float, size: int, total: int) -> int:
+    """Number of blocks (of `size` pixels) intersecting the pixels `[start, end)`."""
+    nblocks = math.ceil(total / size)
+    # Rounded, not to count an extra block because of floating point errors
+    first = math.floor(round(start, 6)) // size
+    last = (math.ceil(round(end, 6)) - 1) // size
+    first = min(max(first, 0), nblocks - 1)
+    last = min(max(last, first), nblocks - 1)
+    return last - first + 1
+
+
+def _zoom_tiles(
+    bbox: Tuple[float, float, float, float],
+    zoom: int,
+    tms: morecantile.TileMatrixSet,
+    rng: random.Random,
+    pool_size: int,
+) -> Tuple[int, List[morecantile.Tile]]:
+    """Number of tiles of the footprint at `zoom` and a (random) pool of them."""
+    w, s, e, n = bbox
+    ul = tms.tile(w, n, zoom)
+    lr = tms.tile(e, s, zoom)
+    xs = range(ul.x, lr.x + 1)
+    ys = range(ul.y, lr.y + 1)
+
+    total = len(xs) * len(ys)
+    if total <= pool_size:
+        return total, [morecantile.Tile(x, y, zoom) for x in xs for y in ys]
+
+    pool = {
+        morecantile.Tile(rng.choice(xs), rng.choice(ys), zoom) for _ in range(pool_size)
+    }
+    return total, sorted(pool)
+
+
+def stratified_estimate(
+    strata: Dict[str, Dict[str, Any]], confidence: float = 0.95
+) -> Dict[str, Dict[str, Any]]:
+    """Stratified mean estimates with confidence intervals.
+
+    The mean is `sum(W_h * mean_h)` and its variance `sum(W_h^2 * var_h / n_h)`, with
+    `W_h` the weight (share of the tiles) of the stratum `h`. The variance of strata
+    with a known `size` (number of tiles) is corrected for the finite population
+    (`1 - n_h / size`). Strata with a single sample (out of more tiles) have an unknown
+    variance: the error is infinite.
+
+    Args:
+        strata (dict): `weight`, sampled `values` (list of metrics) and optional `size` per stratum.
+        confidence (float): Confidence level of the intervals.
+
+    Returns:
+        dict: `mean`, `error` (confidence interval half-width) and `ci` per metric.
+
+    """
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    sampled = {k: v for k, v in strata.items() if v["values"]}
+    total_weight = sum(stratum["weight"] for stratum in sampled.values()) or 1.0
+
+    estimates = {}
+    for metric in METRICS:
+        mean = 0.0
+        variance = 0.0
+        for stratum in sampled.values():
+            values = [v[metric] for v in stratum["values"]]
+            weight = stratum["weight"] / total_weight
+            mean += weight * statistics.fmean(values)
+            n = len(values)
+            fpc = 1 - n / stratum["size"] if stratum.get("size") else 1.0
+            if not fpc:
+                continue
+
+            if n < 2:
+                variance = math.inf
+                continue
+
+            variance += weight**2 * statistics.variance(values) / n * fpc
+
+        error = z * math.sqrt(variance)
+        estimates[metric] = {
+            "mean": mean,
+            "error": error,
+            "ci": [mean - error, mean + error],
+        }
+
+    return estimates
+
+
+def _converged(estimates: Dict[str, Dict[str, Any]], relative_error: float) -> bool:
+    """Check if all the metric estimates reached the target relative error."""
+    return all(
+        est["error"] <= relative_error * abs(est["mean"]) for est in estimates.values()
+    )
+
+
+def _next_stratum(
+    strata: Dict[str, Dict[str, Any]], min_tiles: int
+) -> Optional[Dict[str, Any]]:
+    """Select the stratum whose next sample reduces the (relative) variance the most."""
+    available = [stratum for stratum in strata.values() if stratum["pool"]]
+    if not available:
+        return None
+
+    for stratum in available:
+        if len(stratum["values"]) < min_tiles:
+            return stratum
+
+    def _gain(stratum: Dict[str, Any]) -> float:
+        n = len(stratum["values"])
+        if n < 2:  # unknown variance
+            return math.inf
+
+        gain = 0.0
+        for metric in METRICS:
+            values = [v[metric] for v in stratum["values"]]
+            mean = statistics.fmean(values) or 1.0
+            gain += stratum["weight"] ** 2 * statistics.variance(values) / mean**2
+        return gain / (n * (n + 1))
+
+    return max(available, key=_gain)
+
+
+def sample_zooms(
+    src_path: str,
+    zooms: Optional[List[int]] = None,
+    relative_error: float = 0.1,
+    confidence: float = 0.95,
+    min_tiles: int = 2,
+    max_tiles: int = 100,
+    pool_size: int = 10000,
+    seed: Optional[int] = None,
+    tilesize: int = 256,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+    reader: Type[BaseReader] = Reader,
+    reader_params: Optional[Dict] = None,
+    config: Optional[Dict] = None,
+) -> Dict[str, Any]:
+    """Estimate the mean GET count, bytes and latency of the tiles of each zoom.
+
+    Tiles are drawn from the dataset footprint, stratified by their position relative
+    to the internal block grid of the IFD they read (see `tile_stratum`). Tiles are
+    profiled until the confidence interval of each mean is within `relative_error` of
+    the mean (or `max_tiles` tiles are profiled), sampling first the strata whose
+    next sample reduces the variance the most.
+
+    Args:
+        src_path (str): Dataset path or URL.
+        zooms (list, optional): Zooms to sample. Defaults to the dataset min to max zoom.
+        relative_error (float): Target confidence interval half-width, relative to the mean.
+        confidence (float): Confidence level of the intervals.
+        min_tiles (int): Minimum number of tiles per stratum (at least 2).
+        max_tiles (int): Maximum number of tiles per zoom.
+        pool_size (int): Number of candidate tiles (drawn at random when the zoom has more tiles) used to weight the strata.
+        seed (int, optional): Random seed.
+        tilesize (int): Output tile size.
+        tms (morecantile.TileMatrixSet): TileMatrixSet. Defaults to WebMercatorQuad.
+        reader (BaseReader): rio-tiler reader. Defaults to `rio_tiler.io.Reader`.
+        reader_params (dict, optional): Reader options.
+        config (dict, optional): GDAL configuration options.
+
+    Returns:
+        dict: Per zoom `zooms` (number of `tiles` in the footprint, `sampled` tiles,
+        `strata` weights and counts, `converged` flag and `GET`, `bytes`, `Timing`
+        estimates with their `error` and `ci`), and the `pyramid` totals (sum over the
+        zooms of the number of tiles times the mean, with their `error`).
+
+    """
+    if min_tiles < 2:
+        raise ValueError("`min_tiles` must be at least 2 to estimate the variances")
+
+    rng = random.Random(seed)
+    reader_params = reader_params or {}
+    gdal_config = {
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+        "CPL_VSIL_CURL_NON_CACHED": parse_path(src_path).as_vsi(),
+        **(config or {}),
+    }
+
+    # The dataset is opened through the reader, with the GDAL config
+    with rasterio.Env(**gdal_config):
+        with reader(src_path, tms=tms, **reader_params) as src_dst:
+            zooms = zooms or list(range(src_dst.minzoom, src_dst.maxzoom + 1))
+            w, s, e, n = src_dst.get_geographic_bounds(tms.rasterio_geographic_crs)
+
+            # Truncate BBox to the TMS bounds
+            bbox = (
+                max(tms.bbox.left, w),
+                max(tms.bbox.bottom, s),
+                min(tms.bbox.right, e),
+                min(tms.bbox.top, n),
+            )
+
+            ifd = reader_levels(src_path, src_dst, tms)
+
+            zoom_strata = []
+            for zoom in zooms:
+                matrix = tms.matrix(zoom)
+                level = select_level(ifd, matrix.cellSize * matrix.tileWidth / tilesize)
+
+                total, pool = _zoom_tiles(bbox, zoom, tms, rng, pool_size)
+                strata: Dict[str, Dict[str, Any]] = {}
+                for tile in pool:
+                    name = tile_stratum(tile, src_dst, level, tms)
+                    strata.setdefault(name, {"pool": [], "values": []})["pool"].append(
+                        tile
+                    )
+
+                for stratum in strata.values():
+                    stratum["weight"] = len(stratum["pool"]) / len(pool)
+                    # All the tiles of the stratum are known (finite population)
+                    stratum["size"] = len(stratum["pool"]) if total == len(pool) else None
+                    rng.shuffle(stratum["pool"])
+
+                zoom_strata.append((zoom, total, level, strata))
+
+    results = []
+    for zoom, total, level, strata in zoom_strata:
+        sampled = 0
+        while sampled < max_tiles:
+            stratum = _next_stratum(strata, min_tiles)
+            if stratum is None:
+                break
+
+            tile = stratum["pool"].pop()
+            with capture(config=gdal_config) as stats:
+                with reader(src_path, tms=tms, **reader_params) as src:
+                    src.tile(tile.x, tile.y, tile.z, tilesize=tilesize)
+
+            stratum["values"].append(_metrics(stats))
+            sampled += 1
+
+            if all(
+                len(s["values"]) >= min_tiles or not s["pool"] for s in strata.values()
+            ):
+                estimates = stratified_estimate(strata, confidence=confidence)
+                if _converged(estimates, relative_error):
+                    break
+
+        estimates = stratified_estimate(strata, confidence=confidence)
+        results.append(
+            {
+                "zoom": zoom,
+                "tiles": total,
+                "sampled": sampled,
+                "level": level["Level"],
+                "strata": {
+                    name: {
+                        "weight": stratum["weight"],
+                        "count": len(stratum["values"]),
+                    }
+                    for name, stratum in sorted(strata.items())
+                },
+                "converged": _converged(estimates, relative_error),
+                **estimates,
+            }
+        )
+
+    pyramid: Dict[str, Any] = {"tiles": sum(z["tiles"] for z in results)}
+    for metric in METRICS:
+        pyramid[metric] = {
+            "total": sum(z["tiles"] * z[metric]["mean"] for z in results),
+            "error": math.sqrt(
+                sum((z["tiles"] * z[metric]["error"]) ** 2 for z in results)
+            ),
+        }
+
+    return {
+        "confidence": confidence,
+        "relative_error": relative_error,
+        "zooms": results,
+        "pyramid": pyramid,
+    }
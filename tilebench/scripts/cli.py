@@ -2,6 +2,8 @@
 
 import importlib
 import json
+import os
+import tempfile
 import warnings
 from random import randint, sample
 
@@ -12,9 +14,10 @@ from loguru import logger as log
 from rasterio._path import _parse_path as parse_path
 from rasterio.rio import options
 from rio_tiler.io import BaseReader, MultiBandReader, MultiBaseReader, Reader
+from rio_tiler.models import ImageData
 
 from tilebench import profile as profiler
-from tilebench.viz import TileDebug
+from tilebench.methods import METHODS, needs_tile, read
 
 default_tms = morecantile.tms.get("WebMercatorQuad")
 
@@ -47,6 +50,82 @@ def options_to_dict(ctx, param, value):
         return out
 
 
+def _parse_value(value: str):
+    """Parse a method parameter value (JSON, comma separated list or `@file.json`)."""
+    if value.startswith("@"):
+        with open(value[1:]) as f:
+            return json.load(f)
+
+    for candidate in [value, f"[{value}]"]:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            pass
+
+    return value
+
+
+def options_to_method_params(ctx, param, value):
+    """click callback to collect `--method-params KEY=VAL` options (with parsed values)."""
+    return {k: _parse_value(v) for k, v in options_to_dict(ctx, param, value).items()}
+
+
+method_option = click.option(
+    "--method",
+    type=click.Choice(METHODS),
+    default="tile",
+    help="Reader method to profile (default: tile).",
+)
+
+method_params_option = click.option(
+    "--method-params",
+    "-m",
+    "method_params",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options_to_method_params,
+    help=(
+        "Method Options (JSON values, e.g `-m bbox=-10,-10,10,10 -m max_size=512` or "
+        "`-m shape=@feature.geojson`). `part`, `point` and `feature` arguments default "
+        "to the tile bounds, center and polygon."
+    ),
+)
+
+pricing_option = click.option(
+    "--pricing",
+    type=str,
+    help="Object storage pricing (`s3`, `gcs`, `azure` or a `--pricing-file` entry) to add the requests and egress `Cost`.",
+)
+
+pricing_tier_option = click.option(
+    "--pricing-tier",
+    type=str,
+    help="Storage tier of the pricing (e.g. `standard-ia`, `nearline`, `cool`).",
+)
+
+pricing_file_option = click.option(
+    "--pricing-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help='JSON file overriding the pricing presets (e.g. `{"s3": {"egress": 0}}`).',
+)
+
+
+def _load_pricing(pricing, pricing_tier, pricing_file):
+    """Load the `--pricing` options."""
+    if not pricing:
+        if pricing_tier or pricing_file:
+            raise click.UsageError("--pricing-tier and --pricing-file require --pricing")
+
+        return None
+
+    from tilebench.cost import load_pricing
+
+    try:
+        return load_pricing(pricing, tier=pricing_tier, path=pricing_file)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--pricing") from e
+
+
 # The CLI command group.
 @click.group(help="Command line interface for the tilebench Python package.")
 def cli():
@@ -76,6 +155,54 @@ def cli():
     default=False,
     help="Print cProfile stats.",
 )
+@click.option(
+    "--add-timeline",
+    is_flag=True,
+    default=False,
+    help="Add HEAD/GET requests timeline and concurrency to the output.",
+)
+@click.option(
+    "--add-urls",
+    is_flag=True,
+    default=False,
+    help="Add HEAD/GET statistics per URL to the output.",
+)
+@click.option(
+    "--add-connections",
+    is_flag=True,
+    default=False,
+    help="Add connections, TLS handshakes, redirects, retries and 4xx/5xx counts to the output.",
+)
+@click.option(
+    "--add-encoding",
+    is_flag=True,
+    default=False,
+    help="Benchmark the encoding of the output image (PNG, JPEG, WEBP, JPEG2000, GTiff, NPY).",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of (measured) runs, summarized in a `Repeat` entry of the output.",
+)
+@click.option(
+    "--warmup",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of runs before the measured ones.",
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a Chrome trace-event JSON file (Perfetto, chrome://tracing).",
+)
+@click.option(
+    "--har-file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write HEAD/GET requests to a HAR (HTTP Archive) file.",
+)
 @click.option(
     "--reader",
     type=str,
@@ -106,10 +233,15 @@ def cli():
 @click.option(
     "--io",
     "io_backend",
-    type=click.Choice(["vsifile", "rasterio"], case_sensitive=True),
+    type=click.Choice(["vsifile", "rasterio", "fsspec"], case_sensitive=True),
     help="IO Backend Options.",
     default="rasterio",
 )
+@method_option
+@method_params_option
+@pricing_option
+@pricing_tier_option
+@pricing_file_option
 def profile(
     input,
     tile,
@@ -118,13 +250,31 @@ def profile(
     add_kernels,
     add_stdout,
     add_cprofile,
+    add_timeline,
+    add_urls,
+    add_connections,
+    add_encoding,
+    repeat,
+    warmup,
+    trace_file,
+    har_file,
     reader,
     tms,
     config,
     reader_params,
     io_backend,
+    method,
+    method_params,
+    pricing,
+    pricing_tier,
+    pricing_file,
 ):
-    """Profile Reader Tile read."""
+    """Profile Reader Tile read (or any other reader method)."""
+    if add_encoding and method in ["point", "statistics"]:
+        raise click.UsageError(f"--add-encoding is not supported for `{method}`")
+
+    pricing = _load_pricing(pricing, pricing_tier, pricing_file)
+
     tilematrixset = default_tms
     if tms:
         with open(tms, "r") as f:
@@ -138,9 +288,11 @@ def profile(
 
     DstReader = reader or Reader
 
-    if not tile:
+    if not needs_tile(method, method_params):
+        target_tile = None
+    elif not tile:
         with rasterio.Env(CPL_VSIL_CURL_NON_CACHED=parse_path(input).as_vsi()):
-            with Reader(input, tms=tilematrixset, **reader_params) as cog:
+            with DstReader(input, tms=tilematrixset, **reader_params) as cog:
                 if zoom is None:
                     zoom = randint(cog.minzoom, cog.maxzoom)
 
@@ -162,10 +314,15 @@ def profile(
 
         tile_x = sample(range(extrema["x"]["min"], extrema["x"]["max"]), 1)[0]
         tile_y = sample(range(extrema["y"]["min"], extrema["y"]["max"]), 1)[0]
-        tile_z = zoom
-        log.debug(f"reading tile: {tile_z}-{tile_x}-{tile_y}")
+        target_tile = morecantile.Tile(tile_x, tile_y, zoom)
+        log.debug(f"reading tile: {zoom}-{tile_x}-{tile_y}")
     else:
         tile_z, tile_x, tile_y = list(map(int, tile.split("-")))
+        target_tile = morecantile.Tile(tile_x, tile_y, tile_z)
+
+    if repeat > 1 or warmup:
+        # Do not reuse the cached data of the previous runs
+        config = {"CPL_VSIL_CURL_NON_CACHED": parse_path(input).as_vsi(), **config}
 
     @profiler(
         kernels=add_kernels,
@@ -175,12 +332,25 @@ def profile(
         cprofile=add_cprofile,
         config=config,
         io=io_backend,
+        timeline=add_timeline,
+        urls=add_urls,
+        connections=add_connections,
+        trace_file=trace_file,
+        har_file=har_file,
+        repeat=repeat,
+        warmup=warmup,
+        pricing=pricing,
     )
-    def _read_tile(src_path: str, x: int, y: int, z: int, tilesize: int = 256):
+    def _read(src_path: str, tile: morecantile.Tile, tilesize: int = 256):
         with DstReader(src_path, tms=tilematrixset, **reader_params) as cog:
-            return cog.tile(x, y, z, tilesize=tilesize)
+            return read(cog, method, tile=tile, tilesize=tilesize, **method_params)
 
-    (_, _), stats = _read_tile(input, tile_x, tile_y, tile_z, tilesize)
+    img, stats = _read(input, target_tile, tilesize)
+
+    if add_encoding and isinstance(img, ImageData):
+        from tilebench.encoding import benchmark_encoding
+
+        stats["Encoding"] = benchmark_encoding(img)
 
     click.echo(json.dumps(stats))
 
@@ -286,6 +456,653 @@ def random(input, zoom, reader, tms, reader_params):
     click.echo(f"{zoom}-{x}-{y}")
 
 
+@cli.command()
+@options.file_in_arg
+@click.option(
+    "--ovr-level",
+    type=int,
+    help="Overview level (default: full resolution).",
+)
+@click.option(
+    "--max-blocks",
+    type=int,
+    help="Maximum number of blocks to benchmark.",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def codec(input, ovr_level, max_blocks, config):
+    """Benchmark blocks fetch and decompression of a GeoTIFF."""
+    from tilebench.codec import benchmark_codec
+
+    click.echo(
+        json.dumps(
+            benchmark_codec(
+                input, ovr_level=ovr_level, max_blocks=max_blocks, config=config
+            )
+        )
+    )
+
+
+@cli.command()
+@options.file_in_arg
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def header(input, config):
+    """Measure the dataset open cost and recommend GDAL_INGESTED_BYTES_AT_OPEN."""
+    from tilebench.header import analyze_open
+
+    report = analyze_open(input, config=config)
+    if not report["layout"]["contiguous"]:
+        log.warning("IFDs are not contiguous at the start of the file")
+
+    click.echo(json.dumps(report))
+
+
+@cli.command()
+@options.file_in_arg
+@click.option(
+    "--tms",
+    help="Path to TileMatrixSet JSON file.",
+    type=click.Path(),
+)
+@click.option("--minzoom", type=int, help="Minimum zoom to check.")
+@click.option("--maxzoom", type=int, help="Maximum zoom to check.")
+@click.option("--tilesize", type=int, default=256, show_default=True, help="Tile Size.")
+@click.option(
+    "--max-amplification",
+    type=float,
+    default=4.0,
+    show_default=True,
+    help="Maximum source pixels read per output pixel.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Overview oversampling threshold (GDAL_OVERVIEW_OVERSAMPLING_THRESHOLD).",
+)
+def advise(input, tms, minzoom, maxzoom, tilesize, max_amplification, threshold):
+    """Check overview coverage and read amplification per zoom."""
+    from tilebench.overviews import overview_coverage
+
+    tilematrixset = default_tms
+    if tms:
+        with open(tms, "r") as f:
+            tilematrixset = morecantile.TileMatrixSet(**json.load(f))
+
+    report = overview_coverage(
+        input,
+        tms=tilematrixset,
+        minzoom=minzoom,
+        maxzoom=maxzoom,
+        tilesize=tilesize,
+        max_amplification=max_amplification,
+        threshold=threshold,
+    )
+    for zoom in report["zooms"]:
+        if zoom["full_resolution"]:
+            log.warning(
+                f"zoom {zoom['zoom']} is read from the full resolution (amplification: {zoom['amplification']:.1f})"
+            )
+
+    click.echo(json.dumps(report))
+
+
+@cli.command()
+@options.file_in_arg
+@click.option(
+    "--blocksize",
+    type=int,
+    multiple=True,
+    default=[512],
+    show_default=True,
+    help="Internal block size.",
+)
+@click.option(
+    "--compress",
+    type=str,
+    multiple=True,
+    default=["deflate"],
+    show_default=True,
+    help="Compression.",
+)
+@click.option(
+    "--overviews",
+    type=str,
+    multiple=True,
+    default=["auto"],
+    show_default=True,
+    help="Number of overview levels (`auto`: until the overview fits in one block).",
+)
+@click.option(
+    "--overview-resampling",
+    type=str,
+    multiple=True,
+    default=["nearest"],
+    show_default=True,
+    help="Overview resampling method.",
+)
+@click.option(
+    "--interleave",
+    type=click.Choice(["pixel", "band"]),
+    multiple=True,
+    default=["pixel"],
+    show_default=True,
+    help="Interleaving.",
+)
+@click.option("--zoom", "-z", type=int, multiple=True, help="Zooms to sample tiles from.")
+@click.option(
+    "--tiles",
+    "tiles_per_zoom",
+    type=int,
+    default=5,
+    show_default=True,
+    help="Number of random tiles per zoom.",
+)
+@click.option("--tile", type=str, multiple=True, help="Tile(s) to read (Z-X-Y).")
+@click.option("--seed", type=int, help="Random seed for the tiles sample.")
+@click.option(
+    "--latency",
+    type=float,
+    default=0.0,
+    help="Simulated latency (in seconds) for each HTTP request.",
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Directory where to write the variants (temporary directory by default).",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def variants(
+    input,
+    blocksize,
+    compress,
+    overviews,
+    overview_resampling,
+    interleave,
+    zoom,
+    tiles_per_zoom,
+    tile,
+    seed,
+    latency,
+    output_dir,
+    config,
+):
+    """Write COG layout variants and profile the same tiles against each."""
+    from tilebench.variants import profile_variants, sample_tiles, variant_matrix
+
+    matrix = variant_matrix(
+        blocksize=blocksize,
+        compress=compress,
+        overviews=[int(ovr) if ovr.isdigit() else ovr for ovr in overviews],
+        overview_resampling=overview_resampling,
+        interleave=interleave,
+    )
+
+    if tile:
+        tiles = [
+            morecantile.Tile(x, y, z)
+            for z, x, y in (map(int, t.split("-")) for t in tile)
+        ]
+    else:
+        tiles = sample_tiles(input, zooms=zoom, count=tiles_per_zoom, seed=seed)
+
+    log.debug(f"reading tiles: {[f'{t.z}-{t.x}-{t.y}' for t in tiles]}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        rows = profile_variants(
+            input,
+            matrix,
+            tiles,
+            output_dir or tmpdir,
+            latency=latency,
+            config=config,
+        )
+
+    click.echo(json.dumps(rows))
+
+
+@cli.command()
+@options.file_in_arg
+@click.option(
+    "--zoom", "-z", type=int, multiple=True, help="Zooms to sample (default: all)."
+)
+@click.option(
+    "--relative-error",
+    type=float,
+    default=0.1,
+    show_default=True,
+    help="Target confidence interval half-width, relative to the mean.",
+)
+@click.option(
+    "--confidence",
+    type=float,
+    default=0.95,
+    show_default=True,
+    help="Confidence level.",
+)
+@click.option(
+    "--min-tiles",
+    type=click.IntRange(min=2),
+    default=2,
+    show_default=True,
+    help="Minimum number of tiles per stratum.",
+)
+@click.option(
+    "--max-tiles",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Maximum number of tiles per zoom.",
+)
+@click.option("--seed", type=int, help="Random seed.")
+@click.option("--tilesize", type=int, default=256, show_default=True, help="Tile Size.")
+@click.option(
+    "--reader",
+    type=str,
+    help="rio-tiler Reader (BaseReader). Default is `rio_tiler.io.Reader`",
+)
+@click.option(
+    "--tms",
+    help="Path to TileMatrixSet JSON file.",
+    type=click.Path(),
+)
+@click.option(
+    "--reader-params",
+    "-p",
+    "reader_params",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options_to_dict,
+    help="Reader Options.",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def estimate(
+    input,
+    zoom,
+    relative_error,
+    confidence,
+    min_tiles,
+    max_tiles,
+    seed,
+    tilesize,
+    reader,
+    tms,
+    reader_params,
+    config,
+):
+    """Estimate the GET count, bytes and latency per zoom from stratified tile samples."""
+    from tilebench.sampling import sample_zooms
+
+    tilematrixset = default_tms
+    if tms:
+        with open(tms, "r") as f:
+            tilematrixset = morecantile.TileMatrixSet(**json.load(f))
+
+    if reader:
+        module, classname = reader.rsplit(".", 1)
+        reader = getattr(importlib.import_module(module), classname)  # noqa
+        if not issubclass(reader, (BaseReader, MultiBandReader, MultiBaseReader)):
+            warnings.warn(f"Invalid reader type: {type(reader)}", stacklevel=1)
+
+    report = sample_zooms(
+        input,
+        zooms=list(zoom),
+        relative_error=relative_error,
+        confidence=confidence,
+        min_tiles=min_tiles,
+        max_tiles=max_tiles,
+        seed=seed,
+        tilesize=tilesize,
+        tms=tilematrixset,
+        reader=reader or Reader,
+        reader_params=reader_params,
+        config=config,
+    )
+
+    for z in report["zooms"]:
+        log.info(
+            f"zoom {z['zoom']}: {z['sampled']}/{z['tiles']} tiles, "
+            f"GET {z['GET']['mean']:.2f} ± {z['GET']['error']:.2f}, "
+            f"bytes {z['bytes']['mean']:.0f} ± {z['bytes']['error']:.0f}, "
+            f"Timing {z['Timing']['mean']:.4f} ± {z['Timing']['error']:.4f}s"
+        )
+        if not z["converged"]:
+            log.warning(
+                f"zoom {z['zoom']} did not reach the target error with {max_tiles} tiles"
+            )
+
+    click.echo(json.dumps(report))
+
+
+@cli.command()
+@options.file_in_arg
+@click.option("--zoom", "-z", type=int, multiple=True, help="Zooms to take tiles from.")
+@click.option(
+    "--tiles",
+    "tiles_per_zoom",
+    type=int,
+    help="Number of random tiles per zoom (default: all the tiles).",
+)
+@click.option("--tile", type=str, multiple=True, help="Tile(s) to read (Z-X-Y).")
+@click.option("--seed", type=int, help="Random seed for the tiles sample.")
+@click.option("--tilesize", type=int, default=256, show_default=True, help="Tile Size.")
+@click.option(
+    "--factor",
+    type=float,
+    default=2.0,
+    show_default=True,
+    help="Flag tiles above this factor of their neighbours median GET count or bytes.",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=1.5,
+    show_default=True,
+    help="Flag tiles above this factor of the GET count or bytes predicted by the block layout.",
+)
+@click.option(
+    "--layout/--no-layout",
+    default=True,
+    show_default=True,
+    help="Compare the tiles to the block layout (GDAL datasets only).",
+)
+@click.option(
+    "--geojson",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the anomalous tiles as GeoJSON (see `tilebench viz --anomalies`).",
+)
+@click.option(
+    "--reader",
+    type=str,
+    help="rio-tiler Reader (BaseReader). Default is `rio_tiler.io.Reader`",
+)
+@click.option(
+    "--tms",
+    help="Path to TileMatrixSet JSON file.",
+    type=click.Path(),
+)
+@click.option(
+    "--reader-params",
+    "-p",
+    "reader_params",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options_to_dict,
+    help="Reader Options.",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def anomalies(
+    input,
+    zoom,
+    tiles_per_zoom,
+    tile,
+    seed,
+    tilesize,
+    factor,
+    tolerance,
+    layout,
+    geojson,
+    reader,
+    tms,
+    reader_params,
+    config,
+):
+    """Profile tiles and rank the anomalous ones (expensive, full resolution or empty)."""
+    from tilebench.anomalies import anomalies_geojson, find_anomalies
+
+    tilematrixset = default_tms
+    if tms:
+        with open(tms, "r") as f:
+            tilematrixset = morecantile.TileMatrixSet(**json.load(f))
+
+    if reader:
+        module, classname = reader.rsplit(".", 1)
+        reader = getattr(importlib.import_module(module), classname)  # noqa
+        if not issubclass(reader, (BaseReader, MultiBandReader, MultiBaseReader)):
+            warnings.warn(f"Invalid reader type: {type(reader)}", stacklevel=1)
+
+    tiles = None
+    if tile:
+        tiles = [
+            morecantile.Tile(x, y, z)
+            for z, x, y in (map(int, t.split("-")) for t in tile)
+        ]
+
+    report = find_anomalies(
+        input,
+        zooms=list(zoom),
+        tiles=tiles,
+        count=tiles_per_zoom,
+        seed=seed,
+        tilesize=tilesize,
+        tms=tilematrixset,
+        reader=reader or Reader,
+        reader_params=reader_params,
+        config=config,
+        layout=layout,
+        factor=factor,
+        tolerance=tolerance,
+    )
+
+    for record in report["anomalies"][:10]:
+        log.info(f"#{record['rank']} {record['tile']}: {record['explanation']}")
+
+    if geojson:
+        with open(geojson, "w") as f:
+            json.dump(anomalies_geojson(report["anomalies"], tilematrixset), f)
+
+    click.echo(json.dumps(report))
+
+
+@cli.group()
+def manifest():
+    """Create, split and run benchmark manifests and merge their results."""
+
+
+@manifest.command()
+@options.file_in_arg
+@click.option("--zoom", "-z", type=int, multiple=True, help="Zooms to take tiles from.")
+@click.option(
+    "--tiles",
+    "tiles_per_zoom",
+    type=int,
+    help="Number of random tiles per zoom (default: all the tiles).",
+)
+@click.option("--tile", type=str, multiple=True, help="Tile(s) to read (Z-X-Y).")
+@click.option("--seed", type=int, help="Random seed for the tiles sample.")
+@click.option("--tilesize", type=int, default=256, show_default=True, help="Tile Size.")
+@click.option(
+    "--reader",
+    type=str,
+    default="rio_tiler.io.Reader",
+    show_default=True,
+    help="rio-tiler Reader (BaseReader).",
+)
+@click.option(
+    "--tms",
+    help="Path to TileMatrixSet JSON file.",
+    type=click.Path(),
+)
+@click.option(
+    "--reader-params",
+    "-p",
+    "reader_params",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options_to_dict,
+    help="Reader Options.",
+)
+@click.option(
+    "--config",
+    "config",
+    metavar="NAME=VALUE",
+    multiple=True,
+    callback=options._cb_key_val,
+    help="GDAL configuration options.",
+)
+def create(
+    input,
+    zoom,
+    tiles_per_zoom,
+    tile,
+    seed,
+    tilesize,
+    reader,
+    tms,
+    reader_params,
+    config,
+):
+    """Create a manifest of the tiles to profile."""
+    from tilebench.manifest import Manifest
+    from tilebench.variants import sample_tiles
+
+    tilematrixset = default_tms
+    tms_def = tilematrixset.id
+    if tms:
+        with open(tms, "r") as f:
+            tms_def = json.load(f)
+            tilematrixset = morecantile.TileMatrixSet(**tms_def)
+
+    if tile:
+        tiles = [
+            morecantile.Tile(x, y, z)
+            for z, x, y in (map(int, t.split("-")) for t in tile)
+        ]
+    else:
+        tiles = sample_tiles(
+            input, zooms=zoom, count=tiles_per_zoom, seed=seed, tms=tilematrixset
+        )
+
+    click.echo(
+        Manifest(
+            input,
+            tiles=tiles,
+            tms=tms_def,
+            tilesize=tilesize,
+            reader=reader,
+            reader_params=reader_params,
+            config=dict(config),
+        ).to_json()
+    )
+
+
+@manifest.command()
+@click.argument("manifest_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--shards", "-n", type=int, required=True, help="Number of shards.")
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    default=".",
+    show_default=True,
+    help="Directory where to write the shards (`shard-{i}.json`).",
+)
+def split(manifest_file, shards, output_dir):
+    """Split a manifest in shards."""
+    from tilebench.manifest import Manifest
+
+    os.makedirs(output_dir, exist_ok=True)
+    for shard in Manifest.from_json(manifest_file).split(shards):
+        path = os.path.join(output_dir, f"shard-{shard.shard}.json")
+        shard.to_json(path)
+        click.echo(path)
+
+
+@manifest.command("run-shard")
+@click.argument("manifest_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--shard",
+    type=int,
+    help="Shard to run (splitting the manifest in `--shards` on the fly).",
+)
+@click.option("--shards", "-n", type=int, help="Number of shards.")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the results to a file.",
+)
+def run_shard(manifest_file, shard, shards, output):
+    """Profile the tiles of a manifest (or shard)."""
+    from tilebench.manifest import Manifest, run_manifest
+
+    if (shard is None) != (shards is None):
+        raise click.UsageError("--shard and --shards must be used together")
+
+    shard_manifest = Manifest.from_json(manifest_file)
+    if shards is not None:
+        if not 0 <= shard < shards:
+            raise click.UsageError(f"--shard must be between 0 and {shards - 1}")
+
+        shard_manifest = shard_manifest.split(shards)[shard]
+
+    log.debug(f"profiling shard {shard_manifest.shard}/{shard_manifest.shards}")
+    out = json.dumps(run_manifest(shard_manifest))
+    if output:
+        with open(output, "w") as f:
+            f.write(out)
+    else:
+        click.echo(out)
+
+
+@manifest.command()
+@click.argument(
+    "results", type=click.Path(exists=True, dir_okay=False), nargs=-1, required=True
+)
+@pricing_option
+@pricing_tier_option
+@pricing_file_option
+def merge(results, pricing, pricing_tier, pricing_file):
+    """Merge the results of the shards of a manifest."""
+    from tilebench.manifest import merge_results
+
+    pricing = _load_pricing(pricing, pricing_tier, pricing_file)
+
+    shard_results = []
+    for path in results:
+        with open(path, "r") as f:
+            shard_results.append(json.load(f))
+
+    click.echo(json.dumps(merge_results(shard_results, pricing=pricing)))
+
+
 @cli.command()
 @click.argument("src_path", type=str, nargs=1, required=True)
 @click.option("--port", type=int, default=8080, help="Webserver port (default: 8080)")
@@ -326,12 +1143,34 @@ def random(input, zoom, reader, tms, reader_params):
 @click.option(
     "--io",
     "io_backend",
-    type=click.Choice(["vsifile", "rasterio"], case_sensitive=True),
+    type=click.Choice(["vsifile", "rasterio", "fsspec"], case_sensitive=True),
     help="IO Backend Options.",
     default="rasterio",
 )
-def viz(src_path, port, host, server_only, reader, config, reader_params, io_backend):
+@method_option
+@method_params_option
+@click.option(
+    "--anomalies",
+    "anomalies_file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Anomalous tiles GeoJSON to overlay (see `tilebench anomalies --geojson`).",
+)
+def viz(
+    src_path,
+    port,
+    host,
+    server_only,
+    reader,
+    config,
+    reader_params,
+    io_backend,
+    method,
+    method_params,
+    anomalies_file,
+):
     """WEB UI to visualize VSI statistics for a web mercator tile requests."""
+    from tilebench.viz import TileDebug
+
     if reader:
         module, classname = reader.rsplit(".", 1)
         reader = getattr(importlib.import_module(module), classname)  # noqa
@@ -342,6 +1181,11 @@ def viz(src_path, port, host, server_only, reader, config, reader_params, io_bac
 
     config = config or {}
 
+    anomalies = None
+    if anomalies_file:
+        with open(anomalies_file, "r") as f:
+            anomalies = json.load(f)
+
     application = TileDebug(
         src_path=src_path,
         reader=DstReader,
@@ -350,6 +1194,9 @@ def viz(src_path, port, host, server_only, reader, config, reader_params, io_bac
         host=host,
         config=config,
         io_backend=io_backend,
+        method=method,
+        method_params=method_params,
+        anomalies=anomalies,
     )
     if not server_only:
         click.echo(f"Viewer started at {application.template_url}", err=True)
@@ -0,0 +1,89 @@
+"""Local static file server with HTTP Range support."""
+
+import functools
+import multiprocessing
+import os
+import re
+import time
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Iterator, Type
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler with HTTP Range support (and keep-alive connections)."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are sent separately, avoid delayed ACK stalls on keep-alive
+    disable_nagle_algorithm = True
+
+    # Simulated latency (in seconds) added to each request
+    latency: float = 0.0
+
+    def log_message(self, *args):
+        """Do not log requests."""
+
+    def send_head(self):
+        """Send response headers (and body stream) for HEAD/GET requests."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return None
+
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if rng := self.headers.get("Range"):
+                start, end = re.match(r"bytes=(\d+)-(\d*)", rng).groups()
+                start = int(start)
+                end = min(int(end) if end else size - 1, size - 1)
+                f.seek(start)
+                body = f.read(end - start + 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                body = f.read()
+                self.send_response(200)
+
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        return BytesIO(body)
+
+
+def _serve(directory: str, latency: float, handler: Type[RangeRequestHandler], queue):
+    """Serve `directory` and send the server port through `queue`."""
+    handler_class = functools.partial(
+        type("Handler", (handler,), {"latency": latency}),
+        directory=directory,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+@contextmanager
+def serve(
+    directory: str,
+    latency: float = 0.0,
+    handler: Type[RangeRequestHandler] = RangeRequestHandler,
+) -> Iterator[str]:
+    """Serve a directory over HTTP (with Range support) and yield the server URL.
+
+    The server runs in its own process because GDAL holds the GIL while fetching data.
+    A `RangeRequestHandler` subclass can be provided (e.g. to simulate errors).
+
+    """
+    queue: multiprocessing.Queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve, args=(directory, latency, handler, queue), daemon=True
+    )
+    process.start()
+    try:
+        yield f"http://127.0.0.1:{queue.get(timeout=10)}"
+    finally:
+        process.terminate()
+        process.join()
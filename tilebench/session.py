@@ -0,0 +1,272 @@
+"""Tilebench profiling sessions."""
+
+import json
+import math
+import threading
+from typing import Any, Dict, Optional
+
+import attr
+
+from tilebench.cost import Pricing
+
+
+@attr.s
+class Histogram:
+    """HDR-style histogram with bounded relative error.
+
+    Values are stored in logarithmic buckets (`gamma = (1 + a) / (1 - a)`), so memory
+    only depends on the range of recorded values and every percentile is within
+    `relative_accuracy` of the true value. Histograms with the same accuracy can be
+    merged exactly.
+
+    """
+
+    relative_accuracy: float = attr.ib(default=0.01)
+
+    buckets: Dict[int, int] = attr.ib(factory=dict)
+    zeros: int = attr.ib(default=0)
+    count: int = attr.ib(default=0)
+    sum: float = attr.ib(default=0.0)
+    min: Optional[float] = attr.ib(default=None)
+    max: Optional[float] = attr.ib(default=None)
+
+    @property
+    def gamma(self) -> float:
+        """Bucket growth factor."""
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    def add(self, value: float):
+        """Record a (positive) value."""
+        if value < 0:
+            raise ValueError(f"Histogram only supports positive values, got {value}")
+
+        if value == 0:
+            self.zeros += 1
+        else:
+            key = math.ceil(math.log(value, self.gamma))
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        """Merge another histogram in place."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different accuracy")
+
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Get the value at percentile `q` (0-100)."""
+        if not self.count:
+            return None
+
+        rank = q / 100 * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # bucket `key` holds values in (gamma^(key-1), gamma^key]
+                value = 2 * self.gamma**key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean value."""
+        return self.sum / self.count if self.count else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Summary statistics."""
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the histogram."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": {str(k): v for k, v in sorted(self.buckets.items())},
+            "zeros": self.zeros,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        """Create a histogram from `Histogram.to_dict` output."""
+        return cls(
+            relative_accuracy=data["relative_accuracy"],
+            buckets={int(k): v for k, v in data["buckets"].items()},
+            zeros=data["zeros"],
+            count=data["count"],
+            sum=data["sum"],
+            min=data["min"],
+            max=data["max"],
+        )
+
+
+@attr.s
+class Session:
+    """Aggregate the results of many profiled calls.
+
+    Results are grouped by a user label (e.g. zoom level or endpoint) and only
+    aggregated values are kept (counts, sums and histograms).
+
+    Examples:
+        >>> session = Session()
+        >>> @profile(quiet=True, session=session, label=lambda x, y, z: z)
+            def read_tile(x, y, z):
+                ...
+        >>> session.summary()
+
+    """
+
+    relative_accuracy: float = attr.ib(default=0.01)
+
+    groups: Dict[str, Dict[str, Any]] = attr.ib(factory=dict)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    def _new_group(self) -> Dict[str, Any]:
+        return {
+            "count": 0,
+            "HEAD": 0,
+            "GET": 0,
+            "bytes": 0,
+            "Timing": Histogram(self.relative_accuracy),
+            "GETs": Histogram(self.relative_accuracy),
+            "Bytes": Histogram(self.relative_accuracy),
+        }
+
+    def record(self, results: Dict[str, Any], label: Any = "all"):
+        """Add one `profile` result to the session."""
+        label = str(label)
+        with self._lock:
+            group = self.groups.setdefault(label, self._new_group())
+            group["count"] += 1
+            group["HEAD"] += results["HEAD"]["count"]
+            group["GET"] += results["GET"]["count"]
+            group["bytes"] += results["GET"]["bytes"]
+            group["Timing"].add(results["Timing"])
+            group["GETs"].add(results["GET"]["count"])
+            group["Bytes"].add(results["GET"]["bytes"])
+
+    def summary(self, pricing: Optional[Pricing] = None) -> Dict[str, Dict[str, Any]]:
+        """Summary statistics per label.
+
+        With `pricing`, a `Cost` entry is added with the cost of all the calls (see
+        `tilebench.cost.Pricing.cost`), the mean cost per call (`tile`) and the
+        projected cost for one million calls (`per_million`).
+        """
+        with self._lock:
+            summary = {
+                label: {
+                    "count": group["count"],
+                    "HEAD": {
+                        "count": group["HEAD"],
+                        "mean": group["HEAD"] / group["count"],
+                    },
+                    "GET": {
+                        **group["GETs"].summary(),
+                        "count": group["GET"],
+                        "bytes": group["bytes"],
+                    },
+                    "bytes": group["Bytes"].summary(),
+                    "Timing": group["Timing"].summary(),
+                }
+                for label, group in self.groups.items()
+            }
+
+            if pricing is not None:
+                for label, group in self.groups.items():
+                    costs = pricing.cost(
+                        head=group["HEAD"], get=group["GET"], nbytes=group["bytes"]
+                    )
+                    tile = costs["total"] / group["count"]
+                    summary[label]["Cost"] = {
+                        "pricing": pricing.name,
+                        "tier": pricing.tier,
+                        **costs,
+                        "tile": tile,
+                        "per_million": tile * 1e6,
+                    }
+
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the session (mergeable)."""
+        with self._lock:
+            return {
+                "relative_accuracy": self.relative_accuracy,
+                "groups": {
+                    label: {
+                        k: v.to_dict() if isinstance(v, Histogram) else v
+                        for k, v in group.items()
+                    }
+                    for label, group in self.groups.items()
+                },
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        """Load a serialized session (see `to_dict`)."""
+        return cls(
+            relative_accuracy=data["relative_accuracy"],
+            groups={
+                label: {
+                    k: Histogram.from_dict(v) if isinstance(v, dict) else v
+                    for k, v in group.items()
+                }
+                for label, group in data["groups"].items()
+            },
+        )
+
+    def merge(self, other: "Session"):
+        """Merge another session into this one.
+
+        Counts and sums are added and histograms merged, so the result is the same
+        as if all the calls had been recorded in one session.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sessions with different accuracy")
+
+        groups = Session.from_dict(other.to_dict()).groups
+        with self._lock:
+            for label, group in groups.items():
+                target = self.groups.setdefault(label, self._new_group())
+                for k, v in group.items():
+                    if isinstance(v, Histogram):
+                        target[k].merge(v)
+                    else:
+                        target[k] += v
+
+    def to_json(self, path: Optional[str] = None, **kwargs) -> str:
+        """Export the session summary as JSON (and write it to `path` if provided)."""
+        out = json.dumps(self.summary(), **kwargs)
+        if path:
+            with open(path, "w") as f:
+                f.write(out)
+
+        return out
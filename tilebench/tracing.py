@@ -0,0 +1,71 @@
+"""Tilebench OpenTelemetry integration."""
+
+from typing import Any, Dict, List, Optional
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: nocover
+    trace = None  # type: ignore
+
+
+def _ns(ts: float) -> int:
+    """Convert a `time.time()` timestamp to nanoseconds."""
+    return int(ts * 1e9)
+
+
+def emit_spans(
+    name: str,
+    start: float,
+    end: float,
+    requests: List[Dict[str, Any]],
+    attributes: Optional[Dict[str, Any]] = None,
+    tracer: Optional[Any] = None,
+):
+    """Emit one span for a tile read and one child span per HEAD/GET request.
+
+    Spans are created after the fact from the log timestamps, the parent span is
+    attached to the current OpenTelemetry context (e.g. an instrumented HTTP request).
+
+    Args:
+        name (str): Parent span name.
+        start (float): Parent span start (`time.time()` timestamp).
+        end (float): Parent span end (`time.time()` timestamp).
+        requests (list): Requests from `parse_rasterio_requests`/`parse_vsifile_requests`.
+        attributes (dict, optional): Parent span attributes.
+        tracer (opentelemetry.trace.Tracer, optional): Tracer. Defaults to the `tilebench` tracer from the global provider.
+
+    """
+    assert trace is not None, (
+        "'opentelemetry-api' must be installed to use tracing (pip install tilebench[tracing])"
+    )
+
+    tracer = tracer or trace.get_tracer("tilebench")
+
+    parent = tracer.start_span(name, start_time=_ns(start), attributes=attributes)
+    ctx = trace.set_span_in_context(parent)
+    for req in requests:
+        attrs = {
+            "http.request.method": req["method"],
+            "tilebench.bytes": req["bytes"],
+        }
+        if req["url"]:
+            attrs["url.full"] = req["url"]
+        if req["range"]:
+            attrs["http.request.header.range"] = req["range"]
+        if req["status"] is not None:
+            attrs["http.response.status_code"] = req["status"]
+        if req["connection"] is not None:
+            attrs["tilebench.connection"] = req["connection"]
+
+        span = tracer.start_span(
+            req["method"],
+            context=ctx,
+            kind=trace.SpanKind.CLIENT,
+            start_time=_ns(req["start"]),
+            attributes=attrs,
+        )
+        if req["status"] is not None and req["status"] >= 400:
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+        span.end(end_time=_ns(req["end"]))
+
+    parent.end(end_time=_ns(end))
@@ -0,0 +1,196 @@
+"""COG layout variants benchmark."""
+
+import itertools
+import os
+import random
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import morecantile
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.shutil import copy
+from rio_tiler.io import Reader
+
+from tilebench import profile as profiler
+from tilebench.server import serve
+from tilebench.session import Session
+
+DEFAULT_TMS = morecantile.tms.get("WebMercatorQuad")
+
+
+def variant_matrix(
+    blocksize: Sequence[int] = (512,),
+    compress: Sequence[str] = ("deflate",),
+    overviews: Sequence[Union[str, int]] = ("auto",),
+    overview_resampling: Sequence[str] = ("nearest",),
+    interleave: Sequence[str] = ("pixel",),
+) -> List[Dict[str, Any]]:
+    """Create all the combinations of layout options."""
+    return [
+        {
+            "blocksize": bs,
+            "compress": comp,
+            "overviews": ovr,
+            "overview_resampling": resampling,
+            "interleave": inter,
+        }
+        for bs, comp, ovr, resampling, inter in itertools.product(
+            blocksize, compress, overviews, overview_resampling, interleave
+        )
+    ]
+
+
+def variant_name(variant: Dict[str, Any]) -> str:
+    """Variant file name (without extension)."""
+    return "bs{blocksize}_{compress}_ovr{overviews}_{overview_resampling}_{interleave}".format(
+        **variant
+    ).lower()
+
+
+def _overview_factors(width: int, height: int, blocksize: int, overviews) -> List[int]:
+    """Overview decimations: `auto` (until the overview fits in one block) or a count."""
+    factors = []
+    factor = 2
+    while max(width, height) / factor >= 1:
+        if overviews == "auto" and max(width, height) / (factor // 2) <= blocksize:
+            break
+        factors.append(factor)
+        factor *= 2
+
+    return factors if overviews == "auto" else factors[: int(overviews)]
+
+
+def write_variant(
+    src_path: str,
+    dst_path: str,
+    blocksize: int = 512,
+    compress: str = "deflate",
+    overviews: Union[str, int] = "auto",
+    overview_resampling: str = "nearest",
+    interleave: str = "pixel",
+):
+    """Write a Cloud Optimized GeoTIFF with a given layout.
+
+    The raster is first copied to an uncompressed tiled GeoTIFF with internal overviews,
+    then copied to `dst_path` with `COPY_SRC_OVERVIEWS` (so all the interleaving options
+    are supported, whatever the GDAL COG driver version).
+
+    """
+    tmp_path = f"{dst_path}.tmp.tif"
+    tiling = {
+        "TILED": "YES",
+        "BLOCKXSIZE": blocksize,
+        "BLOCKYSIZE": blocksize,
+        "INTERLEAVE": interleave.upper(),
+    }
+    try:
+        copy(src_path, tmp_path, driver="GTiff", COMPRESS="NONE", **tiling)
+        with rasterio.open(tmp_path, "r+") as dst:
+            factors = _overview_factors(dst.width, dst.height, blocksize, overviews)
+            if factors:
+                dst.build_overviews(factors, Resampling[overview_resampling.lower()])
+
+        copy(
+            tmp_path,
+            dst_path,
+            driver="GTiff",
+            COPY_SRC_OVERVIEWS="YES",
+            COMPRESS=compress.upper(),
+            **tiling,
+        )
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def sample_tiles(
+    src_path: str,
+    zooms: Optional[Sequence[int]] = None,
+    count: Optional[int] = 5,
+    seed: Optional[int] = None,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+) -> List[morecantile.Tile]:
+    """Pick `count` random tiles (intersecting the dataset) per zoom.
+
+    Zooms default to the dataset max zoom. All the tiles are returned if `count` is None.
+    """
+    rng = random.Random(seed)
+    with Reader(src_path, tms=tms) as src_dst:
+        zooms = zooms or [src_dst.maxzoom]
+        w, s, e, n = src_dst.get_geographic_bounds(tms.rasterio_geographic_crs)
+
+    # Truncate BBox to the TMS bounds
+    w = max(tms.bbox.left, w)
+    s = max(tms.bbox.bottom, s)
+    e = min(tms.bbox.right, e)
+    n = min(tms.bbox.top, n)
+
+    tiles = []
+    for zoom in zooms:
+        candidates = list(tms.tiles(w, s, e, n, [zoom]))
+        if count is None:
+            tiles.extend(candidates)
+        else:
+            tiles.extend(rng.sample(candidates, min(count, len(candidates))))
+
+    return tiles
+
+
+def profile_variants(
+    src_path: str,
+    variants: List[Dict[str, Any]],
+    tiles: List[morecantile.Tile],
+    output_dir: str,
+    latency: float = 0.0,
+    config: Optional[Dict] = None,
+    tms: morecantile.TileMatrixSet = DEFAULT_TMS,
+) -> List[Dict[str, Any]]:
+    """Write each variant and profile the same tiles against all of them.
+
+    Variants are served from `output_dir` by a local HTTP server (with `latency`
+    seconds added to each request, to simulate an object storage).
+
+    Returns:
+        list: One row per variant with its `name`, layout options, `file_size` and the
+        `Session` summary of the tile reads (`count`, `HEAD`, `GET`, `bytes`, `Timing`).
+
+    """
+    for variant in variants:
+        write_variant(
+            src_path, os.path.join(output_dir, f"{variant_name(variant)}.tif"), **variant
+        )
+
+    rows = []
+    with serve(output_dir, latency=latency) as url:
+        for variant in variants:
+            name = variant_name(variant)
+            variant_url = f"{url}/{name}.tif"
+
+            session = Session()
+
+            @profiler(
+                quiet=True,
+                config={
+                    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+                    "CPL_VSIL_CURL_NON_CACHED": f"/vsicurl/{variant_url}",
+                    **(config or {}),
+                },
+                session=session,
+            )
+            def _read_tile(src_path: str, x: int, y: int, z: int):
+                with Reader(src_path, tms=tms) as cog:
+                    return cog.tile(x, y, z)
+
+            for tile in tiles:
+                _read_tile(variant_url, tile.x, tile.y, tile.z)
+
+            rows.append(
+                {
+                    "name": name,
+                    **variant,
+                    "file_size": os.path.getsize(os.path.join(output_dir, f"{name}.tif")),
+                    **session.summary().get("all", {"count": 0}),
+                }
+            )
+
+    return rows
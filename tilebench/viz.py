@@ -1,6 +1,5 @@
 """Tilebench."""
 
-import math
 import pathlib
 from typing import Dict, Optional, Tuple, Type
 
@@ -14,7 +13,7 @@ from fastapi.staticfiles import StaticFiles
 from rasterio import windows
 from rasterio._path import _parse_path as parse_path
 from rasterio.crs import CRS
-from rasterio.warp import calculate_default_transform, transform_geom
+from rasterio.warp import transform_geom
 from rio_tiler.io import BaseReader, Reader
 from rio_tiler.utils import render
 from starlette.requests import Request
@@ -24,7 +23,10 @@ from typing_extensions import Annotated
 
 from tilebench import Timer
 from tilebench import profile as profiler
+from tilebench.codec import block_windows, dims  # noqa
+from tilebench.methods import METHODS, read
 from tilebench.middleware import NoCacheMiddleware
+from tilebench.overviews import reader_levels
 from tilebench.resources.responses import GeoJSONResponse, PNGResponse
 
 template_dir = str(pathlib.Path(__file__).parent.joinpath("templates"))
@@ -102,22 +104,6 @@ def bbox_to_feature(
     return {"type": "FeatureCollection", "features": features}
 
 
-def dims(total: int, chop: int):
-    """Given a total number of pixels, chop into equal chunks.
-
-    yeilds (offset, size) tuples
-    >>> list(dims(512, 256))
-    [(0, 256), (256, 256)]
-    >>> list(dims(502, 256))
-    [(0, 256), (256, 246)]
-    >>> list(dims(522, 256))
-    [(0, 256), (256, 256), (512, 10)]
-    """
-    for a in range(int(math.ceil(total / chop))):
-        offset = a * chop
-        yield offset, chop
-
-
 @attr.s
 class TileDebug:
     """Creates a very minimal server using fastAPI + Uvicorn."""
@@ -132,6 +118,9 @@ class TileDebug:
     host: str = attr.ib(default="127.0.0.1")
     config: Dict = attr.ib(default=dict)
     io_backend: str = attr.ib(default="rasterio")
+    method: str = attr.ib(default="tile", validator=attr.validators.in_(METHODS))
+    method_params: Dict = attr.ib(factory=dict)
+    anomalies: Optional[Dict] = attr.ib(default=None)
 
     router: Optional[APIRouter] = attr.ib(init=False)
 
@@ -220,10 +209,15 @@ class TileDebug:
             )
             def _read_tile(src_path: str, x: int, y: int, z: int):
                 with self.reader(src_path, **self.reader_params) as src_dst:
-                    return src_dst.tile(x, y, z)
+                    return read(
+                        src_dst,
+                        self.method,
+                        tile=morecantile.Tile(x, y, z),
+                        **self.method_params,
+                    )
 
             with Timer() as t:
-                (_, _), stats = _read_tile(self.src_path, x, y, z)
+                _, stats = _read_tile(self.src_path, x, y, z)
 
             head_results = "head;count={count}".format(**stats["HEAD"])
             get_results = "get;count={count};size={bytes}".format(**stats["GET"])
@@ -265,72 +259,15 @@ class TileDebug:
                     "height": height,
                     "bounds": bounds,
                     "crs": src_dst.crs.to_epsg(),
+                    "minzoom": src_dst.minzoom,
+                    "maxzoom": src_dst.maxzoom,
                 }
 
-                dst_affine, _, _ = calculate_default_transform(
-                    src_dst.crs,
-                    tms.crs,
-                    width,
-                    height,
-                    *src_dst.bounds,
-                )
-
-                # Raw resolution Zoom and IFD info
-                resolution = max(abs(dst_affine[0]), abs(dst_affine[4]))
-                zoom = tms.zoom_for_res(resolution)
-                info["maxzoom"] = zoom
-
-                try:
-                    blocksize = src_dst.dataset.block_shapes[0]
-                except Exception:
-                    blocksize = src_dst.width
-
-                ifd = [
-                    {
-                        "Level": 0,
-                        "Width": width,
-                        "Height": height,
-                        "Blocksize": blocksize,
-                        "Decimation": 0,
-                        "MercatorZoom": zoom,
-                        "MercatorResolution": resolution,
-                    }
-                ]
-
-                try:
-                    ovr = src_dst.dataset.overviews(1)
-                except Exception:
-                    ovr = []
-
-            info["overviews"] = len(ovr)
-
-            # Overviews Zooms and IFD info
-            for ix, decim in enumerate(ovr):
-                with rasterio.open(self.src_path, OVERVIEW_LEVEL=ix) as ovr_dst:
-                    dst_affine, _, _ = calculate_default_transform(
-                        ovr_dst.crs,
-                        tms.crs,
-                        ovr_dst.width,
-                        ovr_dst.height,
-                        *ovr_dst.bounds,
-                    )
-                    resolution = max(abs(dst_affine[0]), abs(dst_affine[4]))
-                    zoom = tms.zoom_for_res(resolution)
-
-                    ifd.append(
-                        {
-                            "Level": ix + 1,
-                            "Width": ovr_dst.width,
-                            "Height": ovr_dst.height,
-                            "Blocksize": ovr_dst.block_shapes[0],
-                            "Decimation": decim,
-                            "MercatorZoom": zoom,
-                            "MercatorResolution": resolution,
-                        }
-                    )
+                # Raw resolution and Overviews Zooms and IFD info
+                ifd = reader_levels(self.src_path, src_dst, tms)
 
+            info["overviews"] = len(ifd) - 1
             info["ifd"] = ifd
-            info["minzoom"] = zoom  # either the same has maxzoom or last IFD
 
             return bbox_to_feature(info["bounds"], properties=info)
 
@@ -346,15 +283,7 @@ class TileDebug:
                 options = {"OVERVIEW_LEVEL": ovr_level - 1} if ovr_level else {}
                 with rasterio.open(self.src_path, **options) as src_dst:
                     feats = []
-                    blockxsize, blockysize = src_dst.block_shapes[0]
-                    winds = (
-                        windows.Window(
-                            col_off=col_off, row_off=row_off, width=w, height=h
-                        )
-                        for row_off, h in dims(src_dst.height, blockysize)
-                        for col_off, w in dims(src_dst.width, blockxsize)
-                    )
-                    for window in winds:
+                    for window in block_windows(src_dst):
                         fc = bbox_to_feature(windows.bounds(window, src_dst.transform))
                         for feat in fc.get("features", []):
                             geom = transform_geom(
@@ -373,6 +302,15 @@ class TileDebug:
 
             return {"type": "FeatureCollection", "features": feats}
 
+        @self.router.get(
+            r"/anomalies.geojson",
+            response_model_exclude_none=True,
+            response_class=GeoJSONResponse,
+        )
+        def anomalies():
+            """Return the anomalous tiles (see `tilebench.anomalies.anomalies_geojson`)."""
+            return self.anomalies or {"type": "FeatureCollection", "features": []}
+
         @self.router.get(
             "/",
             responses={200: {"description": "Simple COG viewer."}},
@@ -386,6 +324,7 @@ class TileDebug:
                     "request": request,
                     "geojson_endpoint": str(request.url_for("info")),
                     "grid_endpoint": str(request.url_for("grid")),
+                    "anomalies_endpoint": str(request.url_for("anomalies")),
                     "tile_endpoint": str(
                         request.url_for("tile", z="${z}", x="${x}", y="${y}")
                     ),